@@ -0,0 +1,129 @@
+"""
+오프라인 모의 API 서버 (실시간 도착정보 / CardSubwayTime)
+- 실제 서울 API와 같은 URL 구조와 응답 형식을 흉내 냅니다.
+    /api/subway/<키>/json/realtimeStationArrival/<시작>/<끝>/<역명>
+    /<키>/json/CardSubwayTime/<시작>/<끝>/<YYYYMM>
+- latency(초), error_rate(0~1)로 지연과 오류 응답(ERROR-xxx)을 섞을 수 있습니다.
+- 단독 실행: python bench/mock_server.py 8099
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from synthetic import arrival_items, line_of, station_names
+
+# CardSubwayTime 응답의 시간대 컬럼 (HR_4 ~ HR_3)
+_HOURS = list(range(4, 24)) + list(range(0, 4))
+
+
+class MockMetroServer:
+    def __init__(self, port: int = 0, n_stations: int = 100, latency: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 11):
+        self.n_stations = n_stations
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def realtime_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/subway"
+
+    @property
+    def stats_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # ---------- 응답 생성 ----------
+    def _rng(self, key: str) -> random.Random:
+        # 요청 내용별로 고정된 난수 -> 같은 요청은 항상 같은 응답
+        return random.Random(f"{self.seed}:{key}")
+
+    def realtime_response(self, station: str) -> dict:
+        rng = self._rng(station)
+        if rng.random() < self.error_rate:
+            return {"status": 500, "code": "ERROR-336", "message": "데이터요청은 한번에 최대 1000건을 넘을 수 없습니다."}
+        items = arrival_items(rng, station)
+        return {
+            "errorMessage": {"status": 200, "code": "INFO-000", "message": "정상 처리되었습니다.", "total": len(items)},
+            "realtimeArrivalList": items,
+        }
+
+    def stats_response(self, month: str, start: int, end: int) -> dict:
+        rng = self._rng(f"{month}:{start}")
+        if rng.random() < self.error_rate:
+            return {"RESULT": {"CODE": "ERROR-500", "MESSAGE": "서버 오류입니다."}}
+        names = station_names(self.n_stations)
+        total = len(names)
+        rows = []
+        for i in range(start - 1, min(end, total)):
+            row = {"USE_MON": month, "LINE_NUM": line_of(i), "SUB_STA_NM": names[i]}
+            for h in _HOURS:
+                row[f"HR_{h}_GET_ON_NUM"] = rng.randint(0, 200000)
+                row[f"HR_{h}_GET_OFF_NUM"] = rng.randint(0, 200000)
+            row["WORK_DT"] = f"{month}03"
+            rows.append(row)
+        return {"CardSubwayTime": {
+            "list_total_count": total,
+            "RESULT": {"CODE": "INFO-000", "MESSAGE": "정상 처리되었습니다"},
+            "row": rows,
+        }}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                parts = [unquote(p) for p in self.path.strip("/").split("/")]
+                if "realtimeStationArrival" in parts:
+                    payload = server.realtime_response(parts[-1])
+                elif "CardSubwayTime" in parts:
+                    i = parts.index("CardSubwayTime")
+                    payload = server.stats_response(parts[i + 3], int(parts[i + 1]), int(parts[i + 2]))
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    server = MockMetroServer(port=port, latency=0.05, error_rate=0.02)
+    print(f"🧪 모의 API 서버 실행 중: {server.realtime_url} / {server.stats_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,219 @@
+"""
+엔드투엔드 벤치마크 (실제 API / 실제 CSV 없이 실행)
+- 합성 데이터 + 모의 API 서버로 파이프라인 단계별 소요 시간을 잽니다.
+    fetch_sequential / fetch_concurrent : 실시간 도착정보 수집 (역 N개)
+    process_csv_data                    : stats_collector 변환
+    realtime_json_scan                  : 원본 스냅샷 JSON 적재 (DuckDB JSON 리더)
+    duckdb_join                         : 베이스라인 + 실시간 + 좌표 조인 리포트 (Parquet 저장 포함)
+    add_coords                          : 리포트 좌표 매핑
+    tableau_csv_export                  : 리포트 Parquet -> 태블로용 CSV 내보내기
+    risk_score_batch                    : 요일 유형별 프로필 배열로 스냅샷 전체 위험 판정
+- 결과는 bench/results/<시각>_<커밋>.json 에 저장되고, 직전 결과보다 20% 이상 느려진 단계를 표시합니다.
+- 실행: python bench/run_bench.py --stations 100 --days 30 --snapshots 200
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+RESULTS_DIR = BENCH_DIR / "results"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_server import MockMetroServer  # noqa: E402
+from stations import normalize_station_name  # noqa: E402
+from synthetic import station_names, write_passenger_csv, write_raw_snapshots, write_station_coords  # noqa: E402
+
+REGRESSION_RATIO = 1.2
+
+
+def timed(fn, repeat: int) -> dict:
+    """fn 을 repeat 번 실행해 최소/중앙값(초)을 기록"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return {"min_sec": round(min(times), 6), "median_sec": round(statistics.median(times), 6),
+            "repeat": repeat, "_result": result}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_stage(results: dict, name: str, fn, repeat: int, describe=None):
+    """단계 하나를 실행. 의존 라이브러리가 없는 단계는 건너뛰고 이유를 기록"""
+    try:
+        stage = timed(fn, repeat)
+    except ImportError as e:
+        results[name] = {"skipped": f"의존성 없음: {e.name}"}
+        print(f"⏭️ {name:<20} 건너뜀 (의존성 없음: {e.name})")
+        return
+    output = stage.pop("_result")
+    if describe:
+        stage["output"] = describe(output)
+    results[name] = stage
+    print(f"⏱️ {name:<20} min {stage['min_sec']:.4f}s / median {stage['median_sec']:.4f}s {stage.get('output', '')}")
+
+
+def run_benchmarks(args) -> dict:
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="metro_bench_")
+    os.chdir(workdir)  # 파이프라인 모듈은 data/... 상대 경로를 씀
+
+    print(f"🧪 합성 데이터 생성: 역 {args.stations}개, {args.days}일, 스냅샷 {args.snapshots}개 ({workdir})")
+    csv_rows = write_passenger_csv("data/station_passenger.csv", args.stations, args.days)
+    arrival_rows = write_raw_snapshots("data/raw", args.snapshots, args.stations)
+    write_station_coords("data/station_coords.csv", args.stations)
+
+    server = MockMetroServer(n_stations=args.stations, latency=args.latency, error_rate=args.error_rate).start()
+    os.environ.setdefault("SEOUL_API_KEY", "bench-key")
+    try:
+        def make_api():
+            from api_client import SeoulMetroAPI
+            from key_pool import ApiKeyPool
+            SeoulMetroAPI.BASE_URL_REALTIME = server.realtime_url
+            SeoulMetroAPI.BASE_URL_STATS = server.stats_url
+            # 모의 서버에는 호출 한도가 없으므로 쿼터에 걸려 단계가 잘리지 않게 함
+            return SeoulMetroAPI(key_pool=ApiKeyPool(["bench-key"], daily_limit=10 ** 9))
+
+        stations = [normalize_station_name(n) for n in station_names(args.stations)]
+        run_stage(results, "fetch_sequential",
+                  lambda: make_api().get_multiple_stations(stations, concurrent=False),
+                  1, lambda r: f"({len(r)}/{len(stations)}역 응답)")
+        run_stage(results, "fetch_concurrent",
+                  lambda: make_api().get_multiple_stations(stations, concurrent=True),
+                  args.repeat, lambda r: f"({len(r)}/{len(stations)}역 응답)")
+
+        def csv_stage():
+            from stats_collector import process_csv_data
+            return process_csv_data("data/station_passenger.csv")
+        run_stage(results, "process_csv_data", csv_stage, args.repeat, lambda r: f"({len(r)}행)")
+
+        def json_stage():
+            import duckdb
+            from duckdb_processor import raw_json_scan_sql
+            return duckdb.connect().execute(f"SELECT COUNT(*) FROM ({raw_json_scan_sql()})").fetchone()[0]
+        run_stage(results, "realtime_json_scan", json_stage, args.repeat, lambda r: f"({r}건)")
+
+        report = {}
+
+        def join_stage():
+            from duckdb_processor import process_data_with_duckdb
+            report["df"] = process_data_with_duckdb()
+            return report["df"]
+        run_stage(results, "duckdb_join", join_stage, args.repeat, lambda r: f"({len(r)}행)")
+
+        def coords_stage():
+            from add_coords import add_coordinates
+            return add_coordinates(report["df"])
+        if "df" in report:
+            run_stage(results, "add_coords", coords_stage, args.repeat,
+                      lambda r: f"(좌표 매핑 {int(r['위도(Latitude)'].notna().sum())}행)")
+        else:
+            results["add_coords"] = {"skipped": "duckdb_join 결과 없음"}
+
+        def tableau_csv_stage():
+            from report_stage import export_tableau_csv
+            return export_tableau_csv()
+        if "df" in report:
+            run_stage(results, "tableau_csv_export", tableau_csv_stage, args.repeat,
+                      lambda r: f"({os.path.getsize(r) // 1024}KB)")
+
+        scoring = {}
+
+        def score_stage():
+            import numpy as np
+            from baseline_profile import DAY_TYPES, BaselineProfile, RiskScorer, RiskThresholds
+            if "scorer" not in scoring:
+                rng = np.random.default_rng(5)
+                n = args.stations
+                rows = [(s, h, d, v, v * 1.3) for s in range(1, n + 1) for h in range(24)
+                        for d in range(len(DAY_TYPES)) for v in [float(rng.uniform(0, 8000))]]
+                # 월별 프로필은 상반기만 채워 월별 조회와 전체 평균 대체 경로를 함께 잼
+                monthly_rows = [(s, m, h, d, v * 0.9) for s, h, d, v, _ in rows for m in range(1, 7)]
+                scoring["scorer"] = RiskScorer(BaselineProfile.from_rows(rows, monthly_rows=monthly_rows),
+                                               RiskThresholds())
+                size = max(arrival_rows // max(args.snapshots, 1), 1)  # 스냅샷 하나 분량
+                scoring["batch"] = (rng.integers(0, n + 1, size), rng.integers(0, 24, size),
+                                    rng.integers(0, len(DAY_TYPES), size), rng.integers(0, 600, size),
+                                    rng.integers(1, 13, size))
+            return scoring["scorer"].score_batch(*scoring["batch"])
+        run_stage(results, "risk_score_batch", score_stage, args.repeat,
+                  lambda r: f"({len(r[1])}건 중 위험 {int(r[1].sum())}건)")
+    finally:
+        server.stop()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "params": {"stations": args.stations, "days": args.days, "snapshots": args.snapshots,
+                   "latency": args.latency, "error_rate": args.error_rate,
+                   "csv_rows": csv_rows, "arrival_rows": arrival_rows},
+        "mock_requests": server.request_count,
+        "stages": results,
+    }
+
+
+def compare_with_previous(report: dict):
+    """같은 파라미터로 돌린 직전 결과와 비교해 느려진 단계를 출력"""
+    previous = None
+    for path in sorted(glob.glob(str(RESULTS_DIR / "*.json")), reverse=True):
+        with open(path, "r", encoding="utf-8") as f:
+            candidate = json.load(f)
+        if candidate.get("params") == report["params"]:
+            previous = candidate
+            break
+    if previous is None:
+        print("ℹ️ 비교할 이전 결과가 없습니다 (같은 파라미터 기준).")
+        return
+
+    print(f"\n📈 이전 결과({previous['revision']}, {previous['timestamp']})와 비교")
+    for name, stage in report["stages"].items():
+        old = previous["stages"].get(name, {})
+        if "min_sec" not in stage or "min_sec" not in old:
+            continue
+        ratio = stage["min_sec"] / old["min_sec"] if old["min_sec"] else float("inf")
+        mark = "🚨 느려짐" if ratio > REGRESSION_RATIO else "✅"
+        print(f"   {name:<20} {old['min_sec']:.4f}s -> {stage['min_sec']:.4f}s (x{ratio:.2f}) {mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="지하철 파이프라인 벤치마크")
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--snapshots", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="모의 API 응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="모의 API 오류 비율(0~1)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    compare_with_previous(report)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report['revision']}.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 벤치마크 결과 저장: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+벤치마크용 합성 데이터 생성기 (seed 고정 -> 항상 같은 데이터)
+- 역 N개 x M일치 시간대별 승하차 CSV (data/station_passenger.csv 와 같은 형식)
+- 실시간 스냅샷 K개 (data/raw/arrivals_*.json, 수집기 예전 저장 형식)
+"""
+import csv
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 역 이름 정규화 규칙과 CSV 시간대 컬럼은 src/ 의 것을 그대로 씀 (mock_server 단독 실행에서도 찾도록 경로 추가)
+SRC_DIR = str(Path(__file__).resolve().parent.parent / "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from stations import normalize_station_name  # noqa: E402
+from time_slots import TIME_SLOTS  # noqa: E402
+
+# 실제 역 이름 몇 개 + 가상 역 이름 (좌표/조인 경로가 둘 다 타도록)
+REAL_STATIONS = ['서울역', '강남', '홍대입구', '신도림', '잠실', '시청', '종각', '종로3가', '여의도', '역삼']
+
+# 시간대별 혼잡 곡선 (출퇴근 시간 피크, TIME_SLOTS 순서)
+_HOUR_SHAPE = [0.2, 0.5, 1.6, 2.2, 1.0, 0.7, 0.7, 0.8, 0.8, 0.8,
+               0.9, 1.0, 1.5, 2.0, 1.3, 0.9, 0.8, 0.6, 0.4, 0.1]
+
+
+def station_names(n: int) -> list:
+    names = REAL_STATIONS[:n]
+    names += [f"가상{i:03d}" for i in range(len(names), n)]
+    return names
+
+
+def line_of(index: int) -> str:
+    return f"{index % 9 + 1}호선"
+
+
+def write_passenger_csv(path: str, n_stations: int, n_days: int, seed: int = 42,
+                        start_date: str = "2024-01-01") -> int:
+    """시간대별 승하차 CSV를 만들고 데이터 행 수를 반환합니다."""
+    rng = random.Random(seed)
+    names = station_names(n_stations)
+    scale = [rng.uniform(200, 6000) for _ in names]
+    start = datetime.fromisoformat(start_date)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(['연번', '날짜', '호선', '역번호', '역명', '구분', *TIME_SLOTS])
+        for day in range(n_days):
+            date = (start + timedelta(days=day)).strftime("%Y-%m-%d")
+            weekend = 0.6 if (start + timedelta(days=day)).weekday() >= 5 else 1.0
+            for i, name in enumerate(names):
+                for kind in ('승차', '하차'):
+                    counts = [int(scale[i] * shape * weekend * rng.uniform(0.8, 1.2)) for shape in _HOUR_SHAPE]
+                    # 원본 데이터처럼 천 단위 콤마가 섞인 값도 생성
+                    values = [f"{c:,}" if rng.random() < 0.3 else str(c) for c in counts]
+                    rows += 1
+                    writer.writerow([rows, date, line_of(i), 100 + i, name, kind] + values)
+    return rows
+
+
+def arrival_items(rng: random.Random, station: str, n_trains: int = 4) -> list:
+    """API realtimeArrivalList 항목 형식의 열차 목록"""
+    items = []
+    for t in range(n_trains):
+        stations_away = rng.randint(0, 9)
+        if stations_away == 0:
+            message = rng.choice([f"{station} 도착", f"{station} 출발", "전역 도착"])
+        else:
+            message = f"[{stations_away}]번째 전역 (가상{rng.randint(0, 999):03d})"
+        items.append({
+            "statnNm": station,
+            "subwayId": str(1001 + t % 9),
+            "updnLine": "상행" if t % 2 == 0 else "하행",
+            "trainLineNm": f"종착{t % 3}행 - 방면{t % 2}",
+            "btrainNo": str(1000 + t),
+            "arvlMsg2": message,
+            "arvlCd": str(rng.choice([0, 1, 2, 3, 4, 5, 99])),
+            "barvlDt": str(stations_away * 120),
+        })
+    return items
+
+
+def write_raw_snapshots(raw_dir: str, n_snapshots: int, n_stations: int, seed: int = 7,
+                        start: str = "2024-01-01T05:00:00", interval_sec: int = 600) -> int:
+    """수집기 예전 형식(data/raw/arrivals_*.json)의 스냅샷 K개를 만들고 레코드 수를 반환합니다."""
+    rng = random.Random(seed)
+    names = [normalize_station_name(n) for n in station_names(n_stations)]
+    t0 = datetime.fromisoformat(start)
+    Path(raw_dir).mkdir(parents=True, exist_ok=True)
+
+    total = 0
+    for k in range(n_snapshots):
+        collected = t0 + timedelta(seconds=k * interval_sec)
+        arrivals = []
+        for name in names:
+            for item in arrival_items(rng, name):
+                arrivals.append({
+                    "station_name": name,
+                    "train_line": item["trainLineNm"],
+                    "arrival_message": item["arvlMsg2"],
+                    "arrival_time_sec": item["barvlDt"],
+                })
+        path = Path(raw_dir) / f"arrivals_{collected.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"collected_at": collected.isoformat(), "arrivals": arrivals}, f, ensure_ascii=False, indent=2)
+        total += len(arrivals)
+    return total
+
+
+def write_station_coords(path: str, n_stations: int, seed: int = 3) -> int:
+    """서울 범위 안의 가상 좌표 CSV (add_coords 용)"""
+    rng = random.Random(seed)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(['역사명', '호선', '위도', '경도'])
+        for i, name in enumerate(station_names(n_stations)):
+            writer.writerow([name, line_of(i), round(rng.uniform(37.45, 37.70), 6), round(rng.uniform(126.80, 127.15), 6)])
+    return n_stations
@@ -1,6 +1,13 @@
+import math
+import os
+
+import numpy as np
 import pandas as pd
 
+from stations import normalize_station_name
+
 # 📌 주요 지하철역 위경도 하드코딩 (필요한 역은 구글 맵에서 복사해서 추가 가능!)
+# data/station_coords.csv (서울시 역사마스터 정보 등)가 있으면 그 파일이 우선입니다.
 STATION_COORDS = {
     '서울': (37.554648, 126.972559),
     '강남': (37.497942, 127.027621),
@@ -13,35 +20,164 @@ STATION_COORDS = {
     '여의도': (37.521574, 126.924340)
 }
 
+COORDS_CSV_PATH = 'data/station_coords.csv'
+
+# 좌표 CSV에서 허용하는 컬럼 이름들 (공공데이터마다 헤더가 조금씩 다름)
+_NAME_COLUMNS = ['station_name', '역사명', '역명']
+_LAT_COLUMNS = ['latitude', '위도']
+_LNG_COLUMNS = ['longitude', '경도']
+
+EARTH_RADIUS_M = 6_371_000
+
+
+def _pick_column(df, candidates):
+    for col in candidates:
+        if col in df.columns:
+            return col
+    raise KeyError(f"좌표 CSV에 {candidates} 중 하나의 컬럼이 필요합니다.")
+
+
+def load_station_coords(csv_path: str = COORDS_CSV_PATH) -> pd.DataFrame:
+    """
+    역 좌표 테이블을 [station_key, latitude, longitude] DataFrame으로 읽습니다.
+    - 같은 역이 여러 호선으로 나오면 좌표 평균을 사용
+    - 파일이 없으면 STATION_COORDS 하드코딩 값을 사용
+    """
+    if os.path.exists(csv_path):
+        try:
+            raw = pd.read_csv(csv_path, encoding='utf-8')
+        except UnicodeDecodeError:
+            raw = pd.read_csv(csv_path, encoding='cp949')
+        coords = pd.DataFrame({
+            'station_key': raw[_pick_column(raw, _NAME_COLUMNS)].map(normalize_station_name),
+            'latitude': pd.to_numeric(raw[_pick_column(raw, _LAT_COLUMNS)], errors='coerce'),
+            'longitude': pd.to_numeric(raw[_pick_column(raw, _LNG_COLUMNS)], errors='coerce'),
+        }).dropna()
+    else:
+        coords = pd.DataFrame(
+            [(name, lat, lng) for name, (lat, lng) in STATION_COORDS.items()],
+            columns=['station_key', 'latitude', 'longitude']
+        )
+    return coords.groupby('station_key', as_index=False)[['latitude', 'longitude']].mean()
+
+
+class StationSpatialIndex:
+    """
+    역 좌표 격자(grid) 인덱스
+    - 좌표는 numpy 배열로 들고, 약 1km 격자 칸별로 역 번호 목록을 미리 나눠 둡니다.
+    - 반경 검색은 겹치는 칸의 역들만, 최근접 검색은 가까운 칸부터 넓혀 가며 거리를 계산합니다.
+    """
+
+    def __init__(self, names, lats, lngs, cell_deg: float = 0.01):
+        self.names = np.asarray(names, dtype=object)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        self.cell_deg = cell_deg
+
+        rows = np.floor(self.lats / cell_deg).astype(np.int64)
+        cols = np.floor(self.lngs / cell_deg).astype(np.int64)
+        self.cells = {}
+        for idx, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            self.cells.setdefault(key, []).append(idx)
+        self.cells = {key: np.array(idx, dtype=np.int64) for key, idx in self.cells.items()}
+        self._row_range = (rows.min(), rows.max()) if len(rows) else (0, 0)
+        self._col_range = (cols.min(), cols.max()) if len(cols) else (0, 0)
+
+    @classmethod
+    def from_frame(cls, coords: pd.DataFrame):
+        return cls(coords['station_key'].to_numpy(), coords['latitude'].to_numpy(), coords['longitude'].to_numpy())
+
+    def _distances(self, lat: float, lng: float, idx: np.ndarray) -> np.ndarray:
+        """하버사인 거리(m)를 후보 역들에 대해 한 번에 계산"""
+        lat1, lng1 = math.radians(lat), math.radians(lng)
+        lat2, lng2 = np.radians(self.lats[idx]), np.radians(self.lngs[idx])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+    def _candidates(self, lat: float, lng: float, ring_rows: int, ring_cols: int) -> np.ndarray:
+        row = math.floor(lat / self.cell_deg)
+        col = math.floor(lng / self.cell_deg)
+        found = [self.cells[(r, c)]
+                 for r in range(row - ring_rows, row + ring_rows + 1)
+                 for c in range(col - ring_cols, col + ring_cols + 1)
+                 if (r, c) in self.cells]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def within_radius(self, lat: float, lng: float, radius_m: float) -> list:
+        """(lat, lng) 반경 radius_m 안의 역을 [(역명, 거리m), ...] 가까운 순으로 반환"""
+        cell_m = self.cell_deg * 111_320
+        ring_rows = math.ceil(radius_m / cell_m)
+        ring_cols = math.ceil(radius_m / (cell_m * max(math.cos(math.radians(lat)), 1e-6)))
+        idx = self._candidates(lat, lng, ring_rows, ring_cols)
+        if not len(idx):
+            return []
+        dist = self._distances(lat, lng, idx)
+        mask = dist <= radius_m
+        idx, dist = idx[mask], dist[mask]
+        order = np.argsort(dist)
+        return list(zip(self.names[idx[order]].tolist(), dist[order].tolist()))
+
+    def nearest(self, lat: float, lng: float, n: int = 5) -> list:
+        """(lat, lng)에서 가장 가까운 역 n개를 [(역명, 거리m), ...]로 반환"""
+        n = min(n, len(self.names))
+        if n <= 0:
+            return []
+        cell_m = self.cell_deg * 111_320 * max(math.cos(math.radians(lat)), 1e-6)
+        max_ring = max(self._row_range[1] - self._row_range[0], self._col_range[1] - self._col_range[0]) + 1
+        ring = 1
+        while ring <= max_ring:
+            idx = self._candidates(lat, lng, ring, ring)
+            # 격자 ring 칸 안쪽 거리까지는 빠진 역이 없다고 보장됨
+            if len(idx) >= n:
+                dist = self._distances(lat, lng, idx)
+                top = np.argpartition(dist, n - 1)[:n]
+                if dist[top].max() <= ring * cell_m:
+                    order = top[np.argsort(dist[top])]
+                    return list(zip(self.names[idx[order]].tolist(), dist[order].tolist()))
+            ring *= 2
+        # 격자 범위를 벗어난 먼 지점: 전체 역 대상으로 계산
+        idx = np.arange(len(self.names))
+        dist = self._distances(lat, lng, idx)
+        order = np.argsort(dist)[:n]
+        return list(zip(self.names[order].tolist(), dist[order].tolist()))
+
+
+def add_coordinates(df: pd.DataFrame, coords: pd.DataFrame = None, name_column: str = '역명') -> pd.DataFrame:
+    """리포트 DataFrame에 위도/경도 컬럼을 한 번의 조인으로 붙입니다."""
+    if coords is None:
+        coords = load_station_coords()
+    # 역 이름 정규화는 고유값에 대해서만 수행
+    names = df[name_column].astype(str)
+    unique_names = names.unique()
+    key_map = dict(zip(unique_names, (normalize_station_name(n) for n in unique_names)))
+    keys = names.map(key_map)
+
+    merged = pd.DataFrame({'station_key': keys}).merge(coords, on='station_key', how='left')
+    df = df.copy()
+    df['위도(Latitude)'] = merged['latitude'].to_numpy()
+    df['경도(Longitude)'] = merged['longitude'].to_numpy()
+    return df
+
+
 def add_coordinates_to_report():
-    print("🗺️ 실시간 리포트에 위경도 데이터를 매핑합니다...")
-    
-    # 1. 아까 만든 실시간 혼잡도 결과 파일 읽기
+    """
+    태블로용 CSV 를 만듭니다.
+    좌표는 리포트 단계(report_stage)에서 이미 DuckDB 조인으로 붙어 있으므로, 여기서는 Parquet 을 CSV 로 내보내기만 합니다.
+    """
+    from report_stage import TABLEAU_CSV_PATH, export_tableau_csv
+
+    print("🗺️ 위경도가 포함된 리포트를 태블로용 CSV로 내보냅니다...")
     try:
-        df = pd.read_csv('data/realtime_congestion_report.csv')
+        output_path = export_tableau_csv()
     except FileNotFoundError:
-        print("🚨 realtime_congestion_report.csv 파일을 먼저 생성해주세요!")
+        print("🚨 리포트 Parquet(data/report)을 먼저 생성해주세요! (python duckdb_processor.py)")
         return
 
-    # 2. 위도(Latitude), 경도(Longitude) 매핑 함수
-    def get_lat(station):
-        return STATION_COORDS.get(station, (None, None))[0]
-
-    def get_lng(station):
-        return STATION_COORDS.get(station, (None, None))[1]
-
-    # 3. 데이터프레임에 새로운 컬럼 2개 추가
-    df['위도(Latitude)'] = df['역명'].apply(get_lat)
-    df['경도(Longitude)'] = df['역명'].apply(get_lng)
-
-    # 4. 태블로용 최종 파일로 저장
-    output_path = 'data/realtime_report_for_tableau.csv'
-    df.to_csv(output_path, index=False, encoding='utf-8-sig')
-    
     print(f"✅ 매핑 완료! 태블로용 파일이 저장되었습니다: {output_path}")
     print("-" * 60)
     # 데이터가 잘 들어갔는지 샘플 출력
-    print(df[['역명', '현재시간_예상하차인원(명)', '위도(Latitude)', '경도(Longitude)']].head(5))
+    df = pd.read_csv(TABLEAU_CSV_PATH, nrows=5)
+    print(df[['역명', '현재시간_예상하차인원(명)', '위도(Latitude)', '경도(Longitude)']])
 
 if __name__ == "__main__":
-    add_coordinates_to_report()
\ No newline at end of file
+    add_coordinates_to_report()
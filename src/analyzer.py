@@ -0,0 +1,10 @@
+"""
+데이터 분석기 진입점 (docker compose 의 analyzer 서비스)
+- python cli.py process 와 같습니다. 옵션도 그대로 넘깁니다. (예: python analyzer.py --full --csv)
+"""
+import sys
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["process", *sys.argv[1:]]))
@@ -0,0 +1,159 @@
+"""
+API 응답 캐시 (TTL + LRU + 동시 요청 합치기)
+- 역할: 같은 역/같은 달을 반복해서 조회할 때 API 호출 한도를 쓰지 않도록 응답을 재사용
+- 메모리 캐시(LRU) + 선택적인 디스크 캐시(data/cache/api/...)
+- 같은 키에 대한 동시 요청은 한 번만 호출하고 결과를 나눠 가집니다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+# 엔드포인트별 기본 TTL(초). None 이면 만료 없음
+DEFAULT_TTL = {
+    "realtime": 30,          # 실시간 도착정보는 짧게
+    "stats": 24 * 3600,      # 이번 달 통계는 하루 (지난달 이전은 stats_ttl()에서 영구 보관)
+}
+
+
+def stats_ttl(month: str):
+    """CardSubwayTime: 이미 지난 달 데이터는 바뀌지 않으므로 영구 캐시, 이번 달 이후는 하루"""
+    current = datetime.now().strftime("%Y%m")
+    return None if month[:6] < current else DEFAULT_TTL["stats"]
+
+
+class _InFlight:
+    """진행 중인 호출 하나 (같은 키로 들어온 다른 스레드는 이 결과를 기다림)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, disk_dir: str = None, ttl: dict = None):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self._entries = OrderedDict()   # (endpoint, key) -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    # ---------- 디스크 캐시 ----------
+    def _disk_path(self, endpoint: str, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.disk_dir / endpoint / f"{digest}.json"
+
+    def _disk_get(self, endpoint: str, key: str):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(endpoint, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry["expires_at"] is not None and entry["expires_at"] < time.time():
+            return None
+        return entry["expires_at"], entry["value"]
+
+    def _disk_put(self, endpoint: str, key: str, expires_at, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(endpoint, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "expires_at": expires_at, "value": value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # ---------- 메모리 캐시 ----------
+    def _memory_get(self, cache_key):
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < time.time():
+            del self._entries[cache_key]
+            return None
+        self._entries.move_to_end(cache_key)
+        return entry
+
+    def _memory_put(self, cache_key, expires_at, value):
+        self._entries[cache_key] = (expires_at, value)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_or_fetch(self, endpoint: str, key: str, fetch, ttl="default", should_cache=bool):
+        """
+        캐시에 있으면 바로 반환하고, 없으면 fetch()를 한 번만 호출해 결과를 저장합니다.
+        - should_cache(결과)가 거짓이면 저장하지 않습니다. (기본: 빈 응답 {}는 저장 안 함)
+        - ttl 을 주지 않으면 엔드포인트 기본값, None 이면 만료 없음
+        """
+        if ttl == "default":
+            ttl = self.ttl.get(endpoint)
+        cache_key = (endpoint, key)
+
+        with self._lock:
+            entry = self._memory_get(cache_key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return entry[1]
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                inflight = self._inflight[cache_key] = _InFlight()
+                owner = True
+            else:
+                self._stats["coalesced"] += 1
+                owner = False
+
+        if not owner:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result
+
+        try:
+            disk_entry = self._disk_get(endpoint, key)
+            if disk_entry is not None:
+                expires_at, value = disk_entry
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    self._memory_put(cache_key, expires_at, value)
+            else:
+                with self._lock:
+                    self._stats["misses"] += 1
+                value = fetch()
+                if should_cache(value):
+                    expires_at = None if ttl is None else time.time() + ttl
+                    with self._lock:
+                        self._memory_put(cache_key, expires_at, value)
+                    self._disk_put(endpoint, key, expires_at, value)
+            inflight.result = value
+            return value
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            inflight.event.set()
+
+    def stats(self) -> dict:
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"] + self._stats["coalesced"]
+            served = lookups - self._stats["misses"]
+            return {**self._stats, "size": len(self._entries),
+                    "hit_ratio": round(served / lookups, 3) if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -3,10 +3,23 @@
 - 실시간 도착 정보 (Real-time)
 - 시간대별 승하차 인원 통계 (Statistics)
 """
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from api_cache import ResponseCache, stats_ttl
+from arrival_record import ArrivalRecord
+from key_pool import QUOTA_ERROR_CODES, ApiKeyPool, key_label
+from metrics import API_CALLS, API_LATENCY, API_RESPONSES, get_logger, log_event
+from stations import normalize_station_name
+
+logger = get_logger("api_client")
+
 # .env 파일에서 환경변수 로드
 load_dotenv()
 
@@ -20,90 +33,197 @@ class SeoulMetroAPI:
     # 서울시 열린데이터 광장 공통 URL (통계 데이터용)
     BASE_URL_STATS = "http://openapi.seoul.go.kr:8088"
 
-    def __init__(self):
-        # 1. 실시간 도착 정보용 API 키
-        self.api_key = os.getenv("SEOUL_API_KEY")
+    # 동시 조회 기본값 (역별 타임아웃 / 한 틱 전체 마감 시간 / 스레드 수)
+    STATION_TIMEOUT = 5
+    TICK_DEADLINE = 15
+    MAX_WORKERS = 16
+
+    def __init__(self, cache: ResponseCache = None, key_pool: ApiKeyPool = None, max_workers: int = None):
+        # 1. 실시간 도착 정보용 API 키 풀 (SEOUL_API_KEYS 여러 개면 키별 한도를 보며 돌려 씀)
+        self.key_pool = key_pool or ApiKeyPool.from_env()
+        self.api_key = self.key_pool.keys[0]
         
-        # 2. 통계 데이터용 API 키 (별도로 없으면 SEOUL_API_KEY 공용 사용)
+        # 2. 통계 데이터용 API 키 (별도로 없으면 첫 번째 실시간 키 공용 사용)
         self.stat_api_key = os.getenv("STAT_API_KEY", self.api_key)
 
-        if not self.api_key:
-            raise ValueError("SEOUL_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+        # 3. Keep-Alive 커넥션을 재사용하는 세션 (역마다 새 TCP 연결을 맺지 않음)
+        #    커넥션 풀 크기 = 동시 조회 스레드 수 (풀보다 스레드가 많으면 연결을 버리거나 기다리게 됨)
+        self.max_workers = max(max_workers or self.MAX_WORKERS, 1)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # 4. (선택) 응답 캐시: 같은 역/같은 달 반복 조회 시 API 호출 한도를 아낌
+        self.cache = cache
 
-    def get_arrival_info(self, station_name: str) -> dict:
+    def cache_stats(self) -> dict:
+        """캐시 적중/미스 통계 (캐시를 쓰지 않으면 빈 dict)"""
+        return self.cache.stats() if self.cache else {}
+
+    def get_arrival_info(self, station_name: str, timeout: float = 10) -> dict:
         """
         특정 역의 실시간 도착 정보를 조회합니다.
         """
-        clean_name = station_name.replace("역", "")
-        url = f"{self.BASE_URL_REALTIME}/{self.api_key}/json/realtimeStationArrival/0/10/{clean_name}"
+        if self.cache:
+            return self.cache.get_or_fetch(
+                "realtime", normalize_station_name(station_name),
+                lambda: self._fetch_arrival_info(station_name, timeout)
+            )
+        return self._fetch_arrival_info(station_name, timeout)
+
+    def _fetch_arrival_info(self, station_name: str, timeout: float) -> dict:
+        # '서울역' -> '서울' (끝의 '역'만 제거, '역삼' 같은 이름은 그대로)
+        clean_name = normalize_station_name(station_name)
+        api_key = self.key_pool.acquire()
+        if api_key is None:
+            API_RESPONSES.inc(endpoint="realtime", code="quota_exhausted")
+            log_event(logger, logging.WARNING, "🔑 모든 API 키의 오늘 호출 한도를 다 썼습니다.", station=station_name)
+            return {}
+        url = f"{self.BASE_URL_REALTIME}/{api_key}/json/realtimeStationArrival/0/10/{clean_name}"
+        API_CALLS.inc(endpoint="realtime")
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            # [디버깅 코드 추가] 
-            # API가 정확히 뭐라고 응답하는지 눈으로 확인해야 원인을 압니다!
-            print(f"🔍 DEBUG [{station_name}] 응답 전체: {data}") 
-
-            if "errorMessage" in data:
-
-                code = data["errorMessage"].get("code")
-                msg = data["errorMessage"].get("message")
-                
-                # 정상이 아니면 에러 내용을 출력
-                if code != "INFO-000":
-                    print(f"⚠️ [API 에러] {station_name}: {code} - {msg}")
-                    return {}
-                
+            with API_LATENCY.time(endpoint="realtime"):
+                response = self.session.get(url, timeout=timeout)
+                response.raise_for_status()
+                data = response.json()
+
+            # 응답 전체는 LOG_LEVEL=DEBUG 일 때만 출력 (꺼져 있으면 문자열도 만들지 않음)
+            log_event(logger, logging.DEBUG, "🔍 응답 전체", station=station_name, response=data)
+
+            # 오류 응답은 errorMessage 없이 code/message 가 최상위에 오기도 함
+            error = data.get("errorMessage", data)
+            code = error.get("code", "INFO-000" if "realtimeArrivalList" in data else "NO_DATA")
+            API_RESPONSES.inc(endpoint="realtime", code=code)
+
+            # 일일 한도 초과 키는 오늘 더 쓰지 않음 (다음 요청부터 다른 키 사용)
+            if code in QUOTA_ERROR_CODES:
+                self.key_pool.mark_exhausted(api_key)
+                log_event(logger, logging.WARNING, "🔑 API 키 한도 초과, 다른 키로 전환", key=key_label(api_key))
+
+            # 정상이 아니면 에러 내용을 출력
+            if code != "INFO-000":
+                log_event(logger, logging.WARNING, "⚠️ [API 에러]", station=station_name,
+                          code=code, error_message=error.get("message"))
+                return {}
 
             # 데이터가 아예 없는 경우 (realtimeArrivalList 키가 없음)
             if "realtimeArrivalList" not in data:
-                print(f"⚠️ [데이터 없음] {station_name}: 서버 응답에 도착 정보가 없습니다.")
+                log_event(logger, logging.WARNING, "⚠️ [데이터 없음] 서버 응답에 도착 정보가 없습니다.",
+                          station=station_name)
                 return {}
-            
+
             return data
-        
-        
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ [네트워크 오류] {station_name}: {e}")
+            API_RESPONSES.inc(endpoint="realtime", code="network_error")
+            log_event(logger, logging.ERROR, "❌ [네트워크 오류]", station=station_name, error=str(e))
             return {}
 
     def get_passenger_stats(self, date: str, start_index: int = 1, end_index: int = 100) -> dict:
+        if self.cache:
+            # 지난 달 통계는 바뀌지 않으므로 영구 캐시
+            return self.cache.get_or_fetch(
+                "stats", f"{date}/{start_index}/{end_index}",
+                lambda: self._fetch_passenger_stats(date, start_index, end_index),
+                ttl=stats_ttl(date),
+                should_cache=lambda data: "CardSubwayTime" in data   # 오류 응답(RESULT만 있음)은 저장 안 함
+            )
+        return self._fetch_passenger_stats(date, start_index, end_index)
+
+    def _fetch_passenger_stats(self, date: str, start_index: int, end_index: int) -> dict:
         # 사용자가 제공한 URL에 따르면 서비스명은 CardSubwayTime 입니다.
         service_name = "CardSubwayTime" 
         
         # date 인자는 YYYYMM 형식이어야 함 (예: 202401)
         url = f"{self.BASE_URL_STATS}/{self.stat_api_key}/json/{service_name}/{start_index}/{end_index}/{date}"
         
+        API_CALLS.inc(endpoint="stats")
         try:
-            print(f"📡 통계 데이터 요청: {date} ({start_index}~{end_index})")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-            
+            log_event(logger, logging.INFO, "📡 통계 데이터 요청", date=date, start=start_index, end=end_index)
+            with API_LATENCY.time(endpoint="stats"):
+                response = self.session.get(url, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+            result = data.get(service_name, data).get("RESULT", {})
+            API_RESPONSES.inc(endpoint="stats", code=result.get("CODE", "UNKNOWN"))
+            return data
+
         except requests.exceptions.RequestException as e:
-            print(f"❌ [통계 수집 오류] {date}: {e}")
+            API_RESPONSES.inc(endpoint="stats", code="network_error")
+            log_event(logger, logging.ERROR, "❌ [통계 수집 오류]", date=date, error=str(e))
             return {}
 
-    def get_multiple_stations(self, station_names: list) -> list:
+    def get_multiple_stations(self, station_names: list, concurrent: bool = True,
+                              timeout: float = None, deadline: float = None,
+                              max_workers: int = None) -> list:
         """
         여러 역의 실시간 도착 정보를 한 번에 조회합니다.
+        - concurrent=True 이면 스레드 풀로 동시에 요청하고 커넥션 풀을 공유합니다.
+        - timeout: 역 하나당 타임아웃(초), deadline: 틱 전체 마감 시간(초)
+        - 마감 시간까지 응답하지 않은 역은 건너뛰고 받은 결과만 돌려줍니다.
+        - max_workers 는 생성할 때 정한 커넥션 풀 크기(self.max_workers)를 넘지 않습니다.
+        """
+        timeout = timeout or self.STATION_TIMEOUT
+        if not concurrent:
+            results = []
+            for station in station_names:
+                data = self.get_arrival_info(station, timeout=timeout)
+                if data:
+                    results.append({
+                        "station": station,
+                        "data": data
+                    })
+            return results
+
+        deadline = deadline or self.TICK_DEADLINE
+        workers = min(max_workers or self.max_workers, self.max_workers, max(len(station_names), 1))
+        ends_at = time.monotonic() + deadline
+
+        # with 문을 쓰면 느린 역이 끝날 때까지 기다리게 되므로 직접 shutdown 합니다.
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metro-fetch")
+        futures = {pool.submit(self.get_arrival_info, s, timeout): s for s in station_names}
+        done_data = {}
+        pending = set(futures)
+        try:
+            while pending:
+                remaining = ends_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    data = fut.result()
+                    if data:
+                        done_data[futures[fut]] = data
+        finally:
+            for fut in pending:
+                fut.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if pending:
+            late = [futures[f] for f in pending]
+            log_event(logger, logging.WARNING, "⏱️ [마감 초과] 응답 지연으로 제외", count=len(late),
+                      stations=",".join(late))
+
+        # 요청한 역 순서를 유지해서 반환
+        return [{"station": s, "data": done_data[s]} for s in station_names if s in done_data]
+
+    def get_arrival_records(self, station_names: list, collected_at=None, **kwargs) -> dict:
         """
-        results = []
-        for station in station_names:
-            data = self.get_arrival_info(station)
-            if data:
-                results.append({
-                    "station": station,
-                    "data": data
-                })
-        return results
+        get_multiple_stations() 결과를 역별 ArrivalRecord 목록 {역: [레코드, ...]} 으로 바꿔 돌려줍니다.
+        응답은 했지만 도착 정보가 없는 역은 빈 목록, 응답하지 않은 역은 키가 없습니다.
+        """
+        return {
+            r["station"]: [ArrivalRecord.from_api(item, collected_at)
+                           for item in r["data"].get("realtimeArrivalList", [])]
+            for r in self.get_multiple_stations(station_names, **kwargs)
+        }
 
 
 # 테스트 코드
 if __name__ == "__main__":
-    api = SeoulMetroAPI()
+    # 테스트를 반복 실행해도 호출 한도를 쓰지 않도록 디스크 캐시 사용
+    api = SeoulMetroAPI(cache=ResponseCache(disk_dir="data/cache/api"))
 
     # 1. 실시간 도착 정보 테스트
     print("\n=== 실시간 도착 정보 테스트 ===")
@@ -125,4 +245,6 @@ if __name__ == "__main__":
         if rows:
             print(f"예시: {rows[0]['SUB_STA_NM']} ({rows[0]['LINE_NUM']})")
     else:
-        print("통계 데이터 응답이 없거나 서비스명이 다를 수 있습니다.")
\ No newline at end of file
+        print("통계 데이터 응답이 없거나 서비스명이 다를 수 있습니다.")
+
+    print(f"\n📊 캐시 통계: {api.cache_stats()}")
\ No newline at end of file
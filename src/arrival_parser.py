@@ -0,0 +1,150 @@
+"""
+실시간 도착정보 한 건(realtimeArrivalList 항목)을 수집 시점에 한 번만 해석합니다.
+- arvlMsg2 자유 문자열("[9]번째 전역 (가산디지털단지)", "전역 도착", "3분 20초 후 (역삼)")에서
+  남은 정거장 수, 열차 현재 위치(역명)를 꺼냄
+- arvlCd(도착 코드)를 도착 상태 값(ArrivalState)으로 변환 (코드가 없으면 메시지로 추정)
+- barvlDt(남은 초)는 정수로 변환 (0/누락이면 메시지의 "N분 M초 후"에서 계산)
+- 헤드웨이 분석(headway.py)에 필요한 호선 ID, 상하행, 열차번호도 함께 남깁니다.
+"""
+import re
+from enum import Enum
+
+from stations import normalize_station_name
+
+
+class ArrivalState(str, Enum):
+    APPROACHING = "approaching"            # 당역 진입
+    ARRIVED = "arrived"                    # 당역 도착
+    DEPARTED = "departed"                  # 당역 출발
+    PREV_DEPARTED = "prev_departed"        # 전역 출발
+    PREV_APPROACHING = "prev_approaching"  # 전역 진입
+    PREV_ARRIVED = "prev_arrived"          # 전역 도착
+    RUNNING = "running"                    # 운행중 (그 밖의 위치)
+    UNKNOWN = "unknown"
+
+
+# arvlCd -> 상태 (서울 실시간 도착정보 API 코드표)
+ARRIVAL_CODES = {
+    "0": ArrivalState.APPROACHING,
+    "1": ArrivalState.ARRIVED,
+    "2": ArrivalState.DEPARTED,
+    "3": ArrivalState.PREV_DEPARTED,
+    "4": ArrivalState.PREV_APPROACHING,
+    "5": ArrivalState.PREV_ARRIVED,
+    "99": ArrivalState.RUNNING,
+}
+
+# 상태별 남은 정거장 수 (메시지에 숫자가 없는 경우)
+_STATIONS_AWAY = {
+    ArrivalState.APPROACHING: 0,
+    ArrivalState.ARRIVED: 0,
+    ArrivalState.DEPARTED: 0,
+    ArrivalState.PREV_DEPARTED: 1,
+    ArrivalState.PREV_APPROACHING: 1,
+    ArrivalState.PREV_ARRIVED: 1,
+}
+
+_COUNT_RE = re.compile(r"\[(\d+)\]번째 전역")
+_LOCATION_RE = re.compile(r"\(([^()]+)\)\s*$")
+_MIN_SEC_RE = re.compile(r"(?:(\d+)분)?\s*(?:(\d+)초)?\s*후")
+_MESSAGE_STATES = (
+    ("전역 진입", ArrivalState.PREV_APPROACHING),
+    ("전역 도착", ArrivalState.PREV_ARRIVED),
+    ("전역 출발", ArrivalState.PREV_DEPARTED),
+    ("진입", ArrivalState.APPROACHING),
+    ("도착", ArrivalState.ARRIVED),
+    ("출발", ArrivalState.DEPARTED),
+)
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_message(message: str, code=None, station: str = None) -> dict:
+    """
+    arvlMsg2 (와 arvlCd) 에서 남은 정거장 수, 현재 위치, 상태, 메시지상 남은 초를 꺼냅니다.
+    예) "[9]번째 전역 (가산디지털단지)" -> stations_away=9, current_station='가산디지털단지', running
+        "전역 도착" -> stations_away=1, prev_arrived
+    """
+    message = (message or "").strip()
+    state = ARRIVAL_CODES.get(str(code).strip()) if code not in (None, "") else None
+    if state is None:
+        state = ArrivalState.UNKNOWN
+        for keyword, candidate in _MESSAGE_STATES:
+            if keyword in message:
+                state = candidate
+                break
+        else:
+            if _COUNT_RE.search(message) or _MIN_SEC_RE.search(message):
+                state = ArrivalState.RUNNING
+
+    count = _COUNT_RE.search(message)
+    stations_away = int(count.group(1)) if count else _STATIONS_AWAY.get(state)
+
+    location = _LOCATION_RE.search(message)
+    if location:
+        current_station = normalize_station_name(location.group(1))
+    elif state in (ArrivalState.APPROACHING, ArrivalState.ARRIVED, ArrivalState.DEPARTED) and station:
+        current_station = normalize_station_name(station)
+    else:
+        current_station = None
+
+    message_sec = None
+    min_sec = _MIN_SEC_RE.search(message)
+    if min_sec and (min_sec.group(1) or min_sec.group(2)):
+        message_sec = int(min_sec.group(1) or 0) * 60 + int(min_sec.group(2) or 0)
+
+    return {
+        "stations_away": stations_away,
+        "current_station": current_station,
+        "arrival_state": state.value,
+        "message_sec": message_sec,
+    }
+
+
+def parse_arrival(item: dict) -> dict:
+    """API 응답 항목 하나를 저장/스트림용 타입이 정해진 레코드로 변환합니다."""
+    station = item.get("statnNm")
+    message = item.get("arvlMsg2")
+    parsed = parse_message(message, item.get("arvlCd"), station)
+
+    seconds = _to_int(item.get("barvlDt"))
+    if not seconds and parsed["message_sec"] is not None:
+        seconds = parsed["message_sec"]
+
+    return {
+        "station_name": normalize_station_name(station),
+        "train_line": item.get("trainLineNm"),
+        "arrival_message": message,
+        "arrival_time_sec": seconds if seconds is not None else 0,  # 남은 초
+        "stations_away": parsed["stations_away"],
+        "current_station": parsed["current_station"],
+        "arrival_state": parsed["arrival_state"],
+        "line_id": item.get("subwayId"),
+        "direction": item.get("updnLine"),
+        "train_no": item.get("btrainNo"),
+    }
+
+
+def fill_parsed_fields(record: dict) -> dict:
+    """
+    예전 형식 레코드(station_name/train_line/arrival_message/arrival_time_sec 만 있음)에
+    메시지에서 꺼낼 수 있는 필드를 채웁니다. (raw JSON -> 저장소 합치기용)
+    """
+    if record.get("arrival_state"):
+        return record
+    parsed = parse_message(record.get("arrival_message"), station=record.get("station_name"))
+    seconds = _to_int(record.get("arrival_time_sec"))
+    if not seconds and parsed["message_sec"] is not None:
+        seconds = parsed["message_sec"]
+    return {
+        **record,
+        "arrival_time_sec": seconds if seconds is not None else 0,
+        "stations_away": parsed["stations_away"],
+        "current_station": parsed["current_station"],
+        "arrival_state": parsed["arrival_state"],
+    }
@@ -0,0 +1,216 @@
+"""
+도착 레코드의 메모리 표현 (API 클라이언트 / 수집기 / 프로세서 공용)
+- ArrivalRecord : 레코드 하나. __slots__ 로 필드를 고정하고 숫자는 int 로 보관 (dict 보다 작고 빠름)
+    dict 처럼 rec["station_name"], rec.get(...), {**rec} 도 되므로 저장소/스트림 코드는 그대로 받습니다.
+    keys() 는 FIELDS 만 돌려주므로 {**rec} 에는 collected_at 이 없습니다. (틱 단위 값이라 저장소/스트림이 따로 붙임)
+    rec["collected_at"] / rec.get("collected_at") 은 저장 형식과 같은 ISO 문자열을 돌려줍니다.
+- ArrivalBatch  : 많은 레코드를 열(column) 단위로 보관
+    - 문자열 열(역명, 행선지, 메시지, 호선 ...)은 사전 인코딩: 고유 문자열 목록 + 행마다 정수 코드(array 'i')
+    - 숫자 열은 array('i'), 수집시각은 epoch 마이크로초 정수(array 'q') - 행마다 파이썬 객체를 만들지 않음
+    - to_pandas() 는 코드 배열을 그대로 Categorical 로 넘기므로 행 단위 변환이 없습니다.
+- NULL 은 문자열 코드 -1, 숫자 INT_NULL 로 표시합니다.
+"""
+from array import array
+from datetime import datetime, timedelta
+
+from arrival_parser import parse_arrival
+
+# 레코드 필드 (arrival_parser.parse_arrival 의 키와 같은 순서)
+STRING_FIELDS = ("station_name", "train_line", "arrival_message", "current_station",
+                 "arrival_state", "line_id", "direction", "train_no")
+INT_FIELDS = ("arrival_time_sec", "stations_away")
+FIELDS = ("station_name", "train_line", "arrival_message", "arrival_time_sec", "stations_away",
+          "current_station", "arrival_state", "line_id", "direction", "train_no")
+
+INT_NULL = -(2 ** 31)
+TS_NULL = -(2 ** 63)  # numpy datetime64 의 NaT 와 같은 값
+_EPOCH = datetime(1970, 1, 1)
+_MICRO = timedelta(microseconds=1)
+
+
+def to_epoch_us(value) -> int:
+    """ISO 문자열 / datetime -> epoch 마이크로초 (시간대 변환 없이 벽시계 시각 그대로)"""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value.replace(tzinfo=None) - _EPOCH) // _MICRO
+
+
+def from_epoch_us(value: int) -> str:
+    """epoch 마이크로초 -> ISO 문자열 (저장소/스트림의 collected_at 형식)"""
+    if value is None:
+        return None
+    return (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ArrivalRecord:
+    __slots__ = FIELDS + ("collected_at",)
+
+    def __init__(self, station_name=None, train_line=None, arrival_message=None, arrival_time_sec=None,
+                 stations_away=None, current_station=None, arrival_state=None, line_id=None,
+                 direction=None, train_no=None, collected_at=None):
+        self.station_name = station_name
+        self.train_line = train_line
+        self.arrival_message = arrival_message
+        self.arrival_time_sec = _int_or_none(arrival_time_sec)
+        self.stations_away = _int_or_none(stations_away)
+        self.current_station = current_station
+        self.arrival_state = arrival_state
+        self.line_id = line_id
+        self.direction = direction
+        self.train_no = train_no
+        self.collected_at = to_epoch_us(collected_at)  # epoch 마이크로초
+
+    @classmethod
+    def from_api(cls, item: dict, collected_at=None):
+        """API 응답 항목(realtimeArrivalList 의 원소) -> 레코드 (메시지 해석은 parse_arrival 규칙)"""
+        return cls(**parse_arrival(item), collected_at=collected_at)
+
+    @classmethod
+    def from_dict(cls, row: dict, collected_at=None):
+        return cls(**{name: row.get(name) for name in FIELDS},
+                   collected_at=collected_at if collected_at is not None else row.get("collected_at"))
+
+    # ---------- dict 호환 (저장소 / 델타 / 스트림 발행 코드가 그대로 받도록) ----------
+    def keys(self):
+        return FIELDS
+
+    def __getitem__(self, name):
+        if name == "collected_at":
+            return from_epoch_us(self.collected_at)
+        if name not in FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def to_dict(self, with_time: bool = False) -> dict:
+        row = {name: getattr(self, name) for name in FIELDS}
+        if with_time:
+            row["collected_at"] = from_epoch_us(self.collected_at)
+        return row
+
+    def __eq__(self, other):
+        return isinstance(other, ArrivalRecord) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"ArrivalRecord({self.station_name!r}, {self.train_line!r}, {self.arrival_time_sec}s)"
+
+
+class StringDictionary:
+    """문자열 <-> 정수 코드 (처음 본 순서대로 0, 1, 2 ...; None 은 -1)"""
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int):
+        return None if code < 0 else self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ArrivalBatch:
+    """
+    도착 레코드 묶음 (열 단위). 대량 이력(델타 저장소 복원 등)을 DataFrame/DuckDB 로 넘길 때 사용합니다.
+    행을 하나씩 꺼내면 ArrivalRecord 로 돌려주지만, 적재 경로에서는 to_pandas() 로 열째 넘기세요.
+    """
+
+    def __init__(self):
+        self.dictionaries = {name: StringDictionary() for name in STRING_FIELDS}
+        self.codes = {name: array("i") for name in STRING_FIELDS}
+        self.ints = {name: array("i") for name in INT_FIELDS}
+        self.collected_at = array("q")
+
+    def __len__(self):
+        return len(self.collected_at)
+
+    def append(self, row, collected_at=None, station_name: str = None):
+        """
+        레코드 하나를 추가합니다. row 는 ArrivalRecord 또는 같은 키의 dict.
+        collected_at / station_name 을 주면 row 의 값 대신 사용합니다. (틱/역 단위로 같은 값일 때)
+        """
+        if collected_at is None:
+            collected_at = row.get("collected_at")
+        ts = to_epoch_us(collected_at)
+        self.collected_at.append(TS_NULL if ts is None else ts)
+        for name in STRING_FIELDS:
+            value = station_name if name == "station_name" and station_name is not None else row.get(name)
+            self.codes[name].append(self.dictionaries[name].encode(value))
+        for name in INT_FIELDS:
+            value = _int_or_none(row.get(name))
+            self.ints[name].append(INT_NULL if value is None else value)
+
+    def extend(self, rows, collected_at=None, station_name: str = None):
+        """같은 틱(수집시각)/같은 역의 레코드 여러 개를 추가. 시각은 한 번만 변환합니다."""
+        ts = to_epoch_us(collected_at)
+        for row in rows:
+            self.append(row, ts, station_name)
+
+    def record(self, i: int) -> ArrivalRecord:
+        values = {name: self.dictionaries[name].decode(self.codes[name][i]) for name in STRING_FIELDS}
+        values.update({name: None if self.ints[name][i] == INT_NULL else self.ints[name][i] for name in INT_FIELDS})
+        ts = self.collected_at[i]
+        return ArrivalRecord(**values, collected_at=None if ts == TS_NULL else ts)
+
+    def __iter__(self):
+        return (self.record(i) for i in range(len(self)))
+
+    def to_dicts(self) -> list:
+        """JSON 저장용 dict 목록 (collected_at 은 ISO 문자열)"""
+        return [rec.to_dict(with_time=True) for rec in self]
+
+    def nbytes(self) -> int:
+        """열 배열 + 사전 문자열의 대략적인 메모리 크기(바이트)"""
+        arrays = list(self.codes.values()) + list(self.ints.values()) + [self.collected_at]
+        strings = sum(len(v.encode("utf-8")) + 49 for d in self.dictionaries.values() for v in d.values)
+        return sum(a.itemsize * len(a) for a in arrays) + strings
+
+    def to_pandas(self, columns: list = None):
+        """
+        DataFrame 으로 변환 (문자열 열은 Categorical, 숫자 열은 nullable Int32, 수집시각은 datetime64[us]).
+        코드 배열 버퍼를 그대로 넘기므로 행 단위 파이썬 변환이 없습니다.
+        """
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name in STRING_FIELDS:
+            codes = np.frombuffer(self.codes[name], dtype=np.int32) if len(self) else np.empty(0, np.int32)
+            data[name] = pd.Categorical.from_codes(codes, categories=pd.Index(self.dictionaries[name].values,
+                                                                               dtype=object))
+        for name in INT_FIELDS:
+            values = np.frombuffer(self.ints[name], dtype=np.int32) if len(self) else np.empty(0, np.int32)
+            data[name] = pd.arrays.IntegerArray(values.copy(), values == INT_NULL)
+        # TS_NULL 은 numpy 의 NaT 와 같은 값이라 그대로 결측으로 변환됨
+        ts = np.frombuffer(self.collected_at, dtype=np.int64) if len(self) else np.empty(0, np.int64)
+        data["collected_at"] = ts.astype("datetime64[us]")
+
+        df = pd.DataFrame(data)
+        return df[columns] if columns else df
@@ -0,0 +1,214 @@
+"""
+요일 유형별 베이스라인 프로필 + 배열 조회 기반 혼잡 위험 판정
+- 요일 유형(day type): 평일 / 토요일 / 휴일(일요일, 공휴일). 출퇴근 피크가 있는 평일과
+  주말/공휴일을 한 평균으로 섞지 않습니다.
+- 프로필: station_id x 시간(0~23) x 요일 유형 의 조밀한 NumPy 배열 (평균, 90퍼센타일)
+    - 선택: 월별 배열 station_id x 월 x 시간 x 요일 유형 (값이 없으면 전체 평균으로 대체)
+    - station_id 0 은 '모르는 역' 자리 (항상 0)
+- 판정: 레코드 하나는 배열 인덱스 한 번(O(1)), 스냅샷 전체는 벡터 연산 한 번
+- 기준값: RISK_PASSENGERS(기본 5000), RISK_ARRIVAL_SEC(기본 60), RISK_STAT(mean / p90, 기본 mean)
+- 공휴일: 양력 고정 공휴일 + data/holidays.txt (YYYY-MM-DD 한 줄씩, 설/추석/부처님오신날/대체공휴일 등)
+    음력 공휴일은 data/holidays.txt 에만 있으므로, 파일에 없는 연도는 휴일 분류가 불완전합니다. (매년 추가)
+"""
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+
+from stations import normalize_station_name
+
+DAY_TYPES = ("weekday", "saturday", "holiday")
+WEEKDAY, SATURDAY, HOLIDAY = range(len(DAY_TYPES))
+
+HOLIDAYS_PATH = os.path.join("data", "holidays.txt")
+PROFILE_DIR = os.path.join("data", "cache")
+# 매년 같은 날짜인 양력 공휴일 (MMDD)
+FIXED_HOLIDAYS = ("0101", "0301", "0505", "0606", "0815", "1003", "1009", "1225")
+
+STATISTICS = ("mean", "p90")
+
+
+def load_holidays(path: str = HOLIDAYS_PATH) -> frozenset:
+    """data/holidays.txt 의 추가 공휴일 (파일이 없으면 빈 집합)"""
+    if not os.path.exists(path):
+        return frozenset()
+    with open(path, "r", encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+
+_HOLIDAYS = None
+
+
+def day_type(value) -> int:
+    """date / datetime / ISO 문자열 -> WEEKDAY, SATURDAY, HOLIDAY"""
+    global _HOLIDAYS
+    if _HOLIDAYS is None:
+        _HOLIDAYS = load_holidays()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    if value.weekday() == 6 or value.strftime("%m%d") in FIXED_HOLIDAYS or value.isoformat() in _HOLIDAYS:
+        return HOLIDAY
+    return SATURDAY if value.weekday() == 5 else WEEKDAY
+
+
+def day_type_sql(column: str) -> str:
+    """day_type() 과 같은 규칙의 SQL 식 (DuckDB, column 은 DATE/TIMESTAMP)"""
+    fixed = ", ".join(f"'{d}'" for d in FIXED_HOLIDAYS)
+    extra = ", ".join(f"DATE '{d}'" for d in sorted(load_holidays()))
+    extra_cond = f" OR CAST({column} AS DATE) IN ({extra})" if extra else ""
+    return (f"CASE WHEN dayofweek({column}) = 0 OR strftime(CAST({column} AS DATE), '%m%d') IN ({fixed}){extra_cond} "
+            f"THEN {HOLIDAY} WHEN dayofweek({column}) = 6 THEN {SATURDAY} ELSE {WEEKDAY} END")
+
+
+class RiskThresholds:
+    """혼잡 위험 판정 기준 (예상 하차 인원 기준값, 도착 임박 초, 비교할 통계값)"""
+
+    def __init__(self, passengers: float = 5000, arrival_sec: int = 60, statistic: str = "mean"):
+        if statistic not in STATISTICS:
+            raise ValueError(f"statistic 은 {STATISTICS} 중 하나여야 합니다: {statistic}")
+        self.passengers = passengers
+        self.arrival_sec = arrival_sec
+        self.statistic = statistic
+
+    @classmethod
+    def from_env(cls):
+        return cls(passengers=float(os.environ.get("RISK_PASSENGERS", "5000")),
+                   arrival_sec=int(os.environ.get("RISK_ARRIVAL_SEC", "60")),
+                   statistic=os.environ.get("RISK_STAT", "mean"))
+
+
+class BaselineProfile:
+    """
+    station_id x 시간 x 요일 유형 베이스라인 배열
+    - mean, p90: shape (최대 station_id + 1, 24, 3), float32
+    - monthly_mean: shape (최대 station_id + 1, 12, 24, 3), 값이 없는 칸은 NaN (없으면 None)
+    - aliases: 역 표기 -> station_id (스트림처럼 이름만 있는 레코드용)
+    """
+
+    def __init__(self, mean: np.ndarray, p90: np.ndarray, aliases: dict = None, monthly_mean: np.ndarray = None):
+        self.mean = mean
+        self.p90 = p90
+        self.aliases = aliases or {}
+        self.monthly_mean = monthly_mean
+
+    @classmethod
+    def from_rows(cls, rows, aliases: dict = None, monthly_rows=None):
+        """
+        rows: (station_id, hour, day_type, mean, p90) 반복 가능 객체
+        monthly_rows: (station_id, month(1~12), hour, day_type, mean)
+        """
+        rows = np.asarray(list(rows), dtype=np.float64).reshape(-1, 5)
+        n = int(rows[:, 0].max()) + 1 if len(rows) else 1
+        mean = np.zeros((n, 24, len(DAY_TYPES)), dtype=np.float32)
+        p90 = np.zeros_like(mean)
+        idx = (rows[:, 0].astype(int), rows[:, 1].astype(int) % 24, rows[:, 2].astype(int))
+        mean[idx] = rows[:, 3]
+        p90[idx] = rows[:, 4]
+
+        monthly = None
+        if monthly_rows is not None:
+            m = np.asarray(list(monthly_rows), dtype=np.float64).reshape(-1, 5)
+            monthly = np.full((n, 12, 24, len(DAY_TYPES)), np.nan, dtype=np.float32)
+            keep = m[:, 0] < n
+            m = m[keep]
+            monthly[m[:, 0].astype(int), m[:, 1].astype(int) - 1, m[:, 2].astype(int) % 24, m[:, 3].astype(int)] = m[:, 4]
+        return cls(mean, p90, aliases, monthly)
+
+    # ---------- 저장 / 불러오기 (.npz) ----------
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        arrays = {"mean": self.mean, "p90": self.p90,
+                  "alias_names": np.array(list(self.aliases.keys()), dtype=str),
+                  "alias_ids": np.array(list(self.aliases.values()), dtype=np.int32)}
+        if self.monthly_mean is not None:
+            arrays["monthly_mean"] = self.monthly_mean
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            aliases = dict(zip(data["alias_names"].tolist(), data["alias_ids"].tolist()))
+            monthly = data["monthly_mean"] if "monthly_mean" in data.files else None
+            return cls(data["mean"], data["p90"], aliases, monthly)
+
+    # ---------- 조회 ----------
+    def station_id(self, name: str) -> int:
+        """역 표기 -> station_id (모르는 역은 0)"""
+        if name in self.aliases:
+            return self.aliases[name]
+        return self.aliases.get(normalize_station_name(name), 0)
+
+    def expected(self, station_id: int, hour: int, day: int, statistic: str = "mean", month: int = None) -> float:
+        """O(1) 조회. month(1~12)를 주면 월별 평균을 쓰고, 값이 없으면 전체 평균으로 대체"""
+        if not 0 <= station_id < len(self.mean):
+            return 0.0
+        hour %= 24
+        if month and 1 <= month <= 12 and statistic == "mean" and self.monthly_mean is not None:
+            value = self.monthly_mean[station_id, month - 1, hour, day]
+            if not np.isnan(value):
+                return float(value)
+        table = self.p90 if statistic == "p90" else self.mean
+        return float(table[station_id, hour, day])
+
+    def expected_batch(self, station_ids, hours, days, statistic: str = "mean", months=None) -> np.ndarray:
+        """
+        벡터 조회 (범위 밖 station_id 는 0 번 칸 = 0)
+        months(1~12 배열)를 주면 expected() 와 같이 월별 평균을 쓰고, NaN 이거나 월이 범위 밖이면 전체 평균으로 대체
+        """
+        ids = np.asarray(station_ids, dtype=np.int64)
+        ids = np.where((ids >= 0) & (ids < len(self.mean)), ids, 0)
+        hours = np.asarray(hours, dtype=np.int64) % 24
+        days = np.asarray(days, dtype=np.int64)
+        table = self.p90 if statistic == "p90" else self.mean
+        values = table[ids, hours, days]
+        if months is None or statistic != "mean" or self.monthly_mean is None:
+            return values
+        months = np.asarray(months, dtype=np.int64)
+        valid = (months >= 1) & (months <= 12)
+        monthly = self.monthly_mean[ids, np.where(valid, months - 1, 0), hours, days]
+        return np.where(valid & ~np.isnan(monthly), monthly, values)
+
+
+class RiskScorer:
+    """BaselineProfile + RiskThresholds 로 도착 레코드의 혼잡 위험을 판정"""
+
+    def __init__(self, profile: BaselineProfile, thresholds: RiskThresholds = None):
+        self.profile = profile
+        self.thresholds = thresholds or RiskThresholds.from_env()
+
+    def score(self, station_id: int, hour: int, day: int, arrival_sec: int, month: int = None) -> tuple:
+        """(예상 하차 인원 평균, 위험 여부)"""
+        t = self.thresholds
+        expected = self.profile.expected(station_id, hour, day, month=month)
+        compared = expected if t.statistic == "mean" else self.profile.expected(station_id, hour, day, t.statistic)
+        return expected, compared > t.passengers and arrival_sec <= t.arrival_sec
+
+    def score_record(self, record: dict) -> tuple:
+        """스트림 레코드(station_name, collected_at, arrival_time_sec) 판정"""
+        collected = datetime.fromisoformat(record["collected_at"])
+        return self.score(self.profile.station_id(record["station_name"]), collected.hour,
+                          day_type(collected), int(record.get("arrival_time_sec") or 0), collected.month)
+
+    def score_batch(self, station_ids, hours, days, arrival_secs, months=None) -> tuple:
+        """
+        스냅샷 전체를 한 번에 판정: (예상 하차 인원 배열, 위험 여부 bool 배열)
+        months 를 주면 score() 처럼 월별 평균을 씀 (같은 레코드는 score() 와 같은 결과)
+        """
+        t = self.thresholds
+        expected = self.profile.expected_batch(station_ids, hours, days, months=months)
+        compared = expected if t.statistic == "mean" else self.profile.expected_batch(station_ids, hours, days,
+                                                                                     t.statistic)
+        risky = (compared > t.passengers) & (np.asarray(arrival_secs) <= t.arrival_sec)
+        return expected, risky
+
+
+def load_latest_scorer(profile_dir: str = PROFILE_DIR, thresholds: RiskThresholds = None):
+    """duckdb_processor 가 만들어 둔 가장 최근 프로필(profile_*.npz)로 RiskScorer 생성 (없으면 None)"""
+    paths = glob.glob(os.path.join(profile_dir, "profile_*.npz"))
+    if not paths:
+        return None
+    return RiskScorer(BaselineProfile.load(max(paths, key=os.path.getmtime)), thresholds)
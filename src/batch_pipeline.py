@@ -0,0 +1,208 @@
+"""
+여러 달 승하차 CSV 일괄 처리 (프로세스 풀)
+- 입력: 폴더(그 안의 *.csv) 또는 glob 패턴 ("data/monthly/*.csv")
+- 파일 하나 = 작업 하나: 인코딩 판별 -> 세로형 변환(unpivot) -> 정제 -> 월 파티션 Parquet 저장
+    data/stats/passenger/month=YYYYMM/part-<원본 해시 16자>.parquet
+- 멱등: 원본 파일 내용 해시를 _manifest.json 에 기록하고, 해시가 같고 결과 파일이 있으면 건너뜁니다.
+  (파일이 바뀌면 그 파일이 예전에 만든 파티션 파일을 지우고 다시 만듦)
+- 마지막에 월 파티션 전체를 베이스라인 저장소(duckdb_processor.ensure_baseline 의 Parquet 캐시)로 합칩니다.
+- 실행: python batch_pipeline.py "data/monthly/*.csv" [--workers N] [--force]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from metrics import get_logger, log_event
+
+logger = get_logger("batch_pipeline")
+
+HISTORY_DIR = os.path.join("data", "stats", "passenger")
+MANIFEST_NAME = "_manifest.json"
+
+
+def discover_csvs(source: str) -> list:
+    """폴더면 그 안의 *.csv, 아니면 glob 패턴(파일 하나도 가능)"""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+    return sorted(glob.glob(source))
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(history_dir: str = HISTORY_DIR) -> dict:
+    path = os.path.join(history_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, history_dir: str = HISTORY_DIR):
+    os.makedirs(history_dir, exist_ok=True)
+    path = os.path.join(history_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def history_fingerprint(history_dir: str = HISTORY_DIR) -> str:
+    """처리된 원본 해시 목록으로 만든 지문 (베이스라인 캐시 키). 처리된 파일이 없으면 None"""
+    manifest = load_manifest(history_dir)
+    if not manifest:
+        return None
+    hashes = sorted(entry["sha256"] for entry in manifest.values())
+    return hashlib.sha256("\n".join(hashes).encode("utf-8")).hexdigest()
+
+
+def _month_of(date_value: str) -> str:
+    digits = re.sub(r"\D", "", str(date_value or ""))
+    return digits[:6] if len(digits) >= 6 else "unknown"
+
+
+def _part_path(history_dir: str, month: str, sha: str) -> Path:
+    return Path(history_dir) / f"month={month}" / f"part-{sha[:16]}.parquet"
+
+
+def process_month_file(csv_path: str, sha: str, history_dir: str = HISTORY_DIR, chunksize: int = 100_000) -> dict:
+    """
+    (작업 프로세스에서 실행) CSV 하나를 변환해 월 파티션에 씁니다.
+    파일 하나에 여러 달이 섞여 있으면 달마다 나눠 씁니다.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from stats_collector import detect_encoding, stats_schema, transform_chunk
+
+    start = time.perf_counter()
+    schema = stats_schema()
+    encoding = detect_encoding(csv_path)
+    writers, tmp_paths, rows = {}, {}, 0
+    try:
+        for chunk in pd.read_csv(csv_path, encoding=encoding, chunksize=chunksize, dtype=str):
+            out = transform_chunk(chunk)
+            rows += len(out)
+            for month, part in out.groupby(out["date"].map(_month_of), sort=False):
+                if month not in writers:
+                    path = _part_path(history_dir, month, sha)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_paths[month] = str(path) + ".tmp"
+                    writers[month] = pq.ParquetWriter(tmp_paths[month], schema, compression="zstd")
+                writers[month].write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    # 다 쓴 뒤에만 제자리로 옮겨서, 중간에 죽으면 결과 파일이 남지 않게 함
+    for month, tmp_path in tmp_paths.items():
+        os.replace(tmp_path, str(_part_path(history_dir, month, sha)))
+
+    return {"path": csv_path, "sha256": sha, "encoding": encoding, "rows": rows,
+            "months": sorted(writers), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _is_done(entry: dict, sha: str, history_dir: str) -> bool:
+    return (entry is not None and entry.get("sha256") == sha
+            and all(_part_path(history_dir, m, sha).exists() for m in entry.get("months", [])))
+
+
+def run_batch(source: str, history_dir: str = HISTORY_DIR, workers: int = None,
+              force: bool = False, merge: bool = True) -> dict:
+    """
+    source 의 CSV 들을 프로세스 풀로 병렬 처리하고 (이미 처리된 파일은 건너뜀) 베이스라인으로 합칩니다.
+    {"processed": [...], "skipped": [...], "failed": {...}} 를 반환합니다.
+    """
+    files = discover_csvs(source)
+    if not files:
+        log_event(logger, logging.WARNING, "⚠️ 처리할 CSV가 없습니다", source=source)
+        return {"processed": [], "skipped": [], "failed": {}}
+
+    manifest = load_manifest(history_dir)
+    pending, skipped = {}, []
+    for path in files:
+        sha = file_sha256(path)
+        key = os.path.abspath(path)
+        if not force and _is_done(manifest.get(key), sha, history_dir):
+            skipped.append(path)
+            continue
+        # 내용이 바뀐 파일은 예전 결과 파티션을 지우고 다시 처리
+        old = manifest.get(key)
+        if old and old.get("sha256") != sha:
+            for month in old.get("months", []):
+                stale = _part_path(history_dir, month, old["sha256"])
+                if stale.exists():
+                    stale.unlink()
+            manifest.pop(key)
+        pending[path] = sha
+
+    workers = workers or min(len(pending), os.cpu_count() or 1) or 1
+    log_event(logger, logging.INFO, "🗂️ CSV 일괄 처리 시작", files=len(files), pending=len(pending),
+              skipped=len(skipped), workers=workers)
+
+    processed, failed = [], {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_month_file, path, sha, history_dir): path
+                       for path, sha in pending.items()}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed[path] = str(e)
+                    log_event(logger, logging.ERROR, "❌ CSV 처리 실패", path=path, error=str(e))
+                    continue
+                # 완료될 때마다 기록해 두면 중간에 멈춰도 다음 실행은 남은 파일만 처리
+                manifest[os.path.abspath(path)] = {
+                    "sha256": result["sha256"], "months": result["months"], "rows": result["rows"],
+                    "encoding": result["encoding"], "processed_at": datetime.now().isoformat(timespec="seconds"),
+                }
+                save_manifest(manifest, history_dir)
+                processed.append(path)
+                log_event(logger, logging.INFO, "   ✅ CSV 처리 완료", file=os.path.basename(path),
+                          rows=result["rows"], months=",".join(result["months"]),
+                          encoding=result["encoding"], seconds=result["seconds"])
+
+    if merge and load_manifest(history_dir):
+        merge_into_baseline(history_dir)
+    log_event(logger, logging.INFO, "🏁 일괄 처리 완료", processed=len(processed), skipped=len(skipped),
+              failed=len(failed))
+    return {"processed": processed, "skipped": skipped, "failed": failed}
+
+
+def merge_into_baseline(history_dir: str = HISTORY_DIR):
+    """history_dir 의 월 파티션 전체로 베이스라인 캐시를 (바뀌었을 때만) 다시 만듭니다."""
+    import duckdb
+
+    from duckdb_processor import ensure_baseline
+
+    con = duckdb.connect(database=":memory:")
+    try:
+        ensure_baseline(con, history_dir)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="여러 달 승하차 CSV 일괄 처리")
+    parser.add_argument("source", help="CSV 폴더 또는 glob 패턴 (예: \"data/monthly/*.csv\")")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--force", action="store_true", help="이미 처리된 파일도 다시 처리")
+    parser.add_argument("--no-merge", action="store_true", help="베이스라인 캐시 갱신 생략")
+    args = parser.parse_args()
+    result = run_batch(args.source, workers=args.workers, force=args.force, merge=not args.no_merge)
+    sys.exit(1 if result["failed"] else 0)
@@ -0,0 +1,167 @@
+"""
+CardSubwayTime 통계 대량 수집기 (병렬 페이지네이션)
+- 역할: 월 단위 CardSubwayTime 전체 결과를 페이지별로 병렬 수집해 Parquet 파일로 바로 저장
+- 저장 위치: data/stats/card_subway_time/month=YYYYMM/part-00001.parquet ...
+- 중단된 달은 이미 저장된 페이지를 건너뛰고 이어서 수집합니다. (완료된 달은 _SUCCESS 표시)
+  전체 건수/페이지 수는 _checkpoint.json 에 남겨 두므로, 이어서 수집할 때 첫 페이지를 다시 요청하지 않습니다.
+"""
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from api_client import SeoulMetroAPI
+
+SERVICE_NAME = "CardSubwayTime"
+
+# 서울 열린데이터 광장은 한 번에 최대 1000건까지만 반환
+PAGE_SIZE = 1000
+
+# 문자열로 유지할 컬럼 (나머지 *_NUM 컬럼은 정수로 저장)
+STRING_COLUMNS = {"USE_MON", "LINE_NUM", "SUB_STA_NM", "WORK_DT", "JOB_YMD"}
+
+
+def month_range(start_month: str, end_month: str) -> list:
+    """'202301', '202312' -> ['202301', ..., '202312']"""
+    year, month = int(start_month[:4]), int(start_month[4:])
+    end_year, end_mon = int(end_month[:4]), int(end_month[4:])
+    months = []
+    while (year, month) <= (end_year, end_mon):
+        months.append(f"{year:04d}{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def build_schema(sample_row: dict) -> pa.Schema:
+    """첫 페이지의 컬럼 구성을 보고 타입이 고정된 스키마를 만듭니다."""
+    fields = []
+    for col in sample_row:
+        if col in STRING_COLUMNS or not col.endswith("_NUM"):
+            fields.append(pa.field(col, pa.string()))
+        else:
+            fields.append(pa.field(col, pa.int64()))
+    return pa.schema(fields)
+
+
+def rows_to_table(rows: list, schema: pa.Schema) -> pa.Table:
+    columns = {}
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if pa.types.is_integer(field.type):
+            values = [int(float(v)) if v not in (None, "") else None for v in values]
+        columns[field.name] = pa.array(values, type=field.type)
+    return pa.table(columns, schema=schema)
+
+
+class CardSubwayTimeBulkLoader:
+    """월 범위의 CardSubwayTime 데이터를 페이지 단위로 병렬 수집합니다."""
+
+    def __init__(self, api: SeoulMetroAPI = None, output_dir: str = None, max_workers: int = 4):
+        if output_dir is None:
+            output_dir = os.path.join(os.environ.get("DATA_DIR", "./data"), "stats", "card_subway_time")
+        self.api = api or SeoulMetroAPI()
+        self.output_dir = Path(output_dir)
+        # 통계 API도 일일 호출 한도가 있으므로 동시 요청 수를 작게 제한
+        self.max_workers = max_workers
+
+    def _month_dir(self, month: str) -> Path:
+        return self.output_dir / f"month={month}"
+
+    def _fetch_page(self, month: str, page: int) -> list:
+        start = (page - 1) * PAGE_SIZE + 1
+        data = self.api.get_passenger_stats(month, start, start + PAGE_SIZE - 1)
+        body = data.get(SERVICE_NAME)
+        if not body:
+            raise RuntimeError(f"{month} {page}페이지 응답이 비어 있습니다: {data.get('RESULT', data)}")
+        return body.get("row", [])
+
+    def _write_page(self, month_dir: Path, page: int, rows: list, schema: pa.Schema):
+        # 임시 파일에 쓴 뒤 이름을 바꿔서, 중간에 죽어도 깨진 페이지가 남지 않게 함
+        final_path = month_dir / f"part-{page:05d}.parquet"
+        tmp_path = month_dir / f".part-{page:05d}.parquet.tmp"
+        pq.write_table(rows_to_table(rows, schema), tmp_path, compression="zstd")
+        os.replace(tmp_path, final_path)
+
+    def load_month(self, month: str) -> int:
+        """한 달치 데이터를 모두 수집하고 저장된 페이지 수를 반환합니다."""
+        month_dir = self._month_dir(month)
+        if (month_dir / "_SUCCESS").exists():
+            print(f"⏭️ {month}: 이미 수집 완료된 달입니다.")
+            return 0
+        month_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = month_dir / "_checkpoint.json"
+        done_pages = {int(p.stem.split("-")[1]) for p in month_dir.glob("part-*.parquet")}
+
+        # 1. 전체 건수와 스키마 파악: 중단된 달이면 체크포인트 + 저장된 1페이지에서 읽어 첫 페이지를 다시 요청하지 않음
+        checkpoint = self._read_checkpoint(checkpoint_path, month)
+        resumed = bool(checkpoint) and 1 in done_pages
+        if resumed:
+            total, pages = checkpoint["total"], checkpoint["pages"]
+            schema = pq.read_schema(month_dir / "part-00001.parquet")
+        else:
+            first = self.api.get_passenger_stats(month, 1, PAGE_SIZE)
+            body = first.get(SERVICE_NAME)
+            if not body or not body.get("row"):
+                print(f"⚠️ {month}: 데이터가 없거나 API 오류입니다. ({first.get('RESULT', first)})")
+                return 0
+            total = int(body.get("list_total_count", len(body["row"])))
+            pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+            schema = build_schema(body["row"][0])
+            self._write_page(month_dir, 1, body["row"], schema)
+            done_pages.add(1)
+            with open(checkpoint_path, "w", encoding="utf-8") as f:
+                json.dump({"month": month, "total": total, "pages": pages}, f)
+
+        todo = [p for p in range(2, pages + 1) if p not in done_pages]
+        print(f"📡 {month}: 총 {total}건 / {pages}페이지 (남은 페이지 {len(todo)}개)")
+
+        # 2. 남은 페이지를 제한된 동시성으로 수집하고, 도착하는 대로 바로 파일로 씀
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._fetch_page, month, p): p for p in todo}
+            for fut in as_completed(futures):
+                page = futures[fut]
+                try:
+                    rows = fut.result()
+                    self._write_page(month_dir, page, rows, schema)
+                except Exception as e:
+                    print(f"❌ {month} {page}페이지 실패: {e}")
+                    failed.append(page)
+
+        if failed:
+            print(f"⚠️ {month}: {len(failed)}개 페이지 실패. 다시 실행하면 이어서 수집합니다.")
+        else:
+            (month_dir / "_SUCCESS").touch()
+            print(f"✅ {month}: 수집 완료 ({total}건)")
+        return len(todo) - len(failed) + (0 if resumed else 1)
+
+    @staticmethod
+    def _read_checkpoint(path: Path, month: str) -> dict:
+        """이전 실행이 남긴 {month, total, pages} (없거나 깨졌거나 다른 달이면 None)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if checkpoint.get("month") != month or not {"total", "pages"} <= checkpoint.keys():
+            return None
+        return checkpoint
+
+    def load_months(self, start_month: str, end_month: str):
+        for month in month_range(start_month, end_month):
+            self.load_month(month)
+        print(f"💾 저장 위치: {self.output_dir}")
+
+
+if __name__ == "__main__":
+    # 사용법: python bulk_loader.py 202301 202312
+    if len(sys.argv) < 2:
+        print("사용법: python bulk_loader.py 시작월(YYYYMM) [종료월(YYYYMM)]")
+        sys.exit(1)
+    start = sys.argv[1]
+    end = sys.argv[2] if len(sys.argv) > 2 else start
+    CardSubwayTimeBulkLoader().load_months(start, end)
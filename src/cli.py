@@ -0,0 +1,225 @@
+"""
+지하철 혼잡도 파이프라인 통합 CLI
+- 실행: python cli.py <명령> [옵션]
+    collect   실시간 도착정보 수집 (collector)
+    stats     승하차 통계 CSV 변환 / 여러 달 일괄 처리 (stats_collector, batch_pipeline)
+    process   적재 + 혼잡도 리포트 (duckdb_processor)
+    enrich    리포트 Parquet -> 태블로용 CSV (좌표 포함), 지난 파티션 정리 (report_stage)
+    diagnose  데이터 상태 점검 (수집 최신성, 쿼터, 캐시, 리포트) + 조인 커버리지 진단 (diagnostics)
+    serve     실시간 혼잡도 조회 서비스 (query_service)
+- pandas / duckdb / numpy 같은 무거운 라이브러리는 그 명령을 실행할 때만 불러옵니다.
+  (cron 작업이나 헬스 체크는 표준 라이브러리만으로 바로 시작)
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+
+# 수집 시각이 이 시간(분)보다 오래되면 diagnose 가 실패(종료 코드 1)로 봄
+STALE_AFTER_MIN = 10
+
+
+def cmd_collect(args) -> int:
+    from collector import collect_and_save_realtime_data
+
+    collect_and_save_realtime_data()
+    return 0
+
+
+def cmd_stats(args) -> int:
+    if args.batch:
+        from batch_pipeline import run_batch
+
+        result = run_batch(args.batch, workers=args.workers, force=args.force, merge=not args.no_merge)
+        return 1 if result["failed"] else 0
+
+    if not os.path.exists(args.csv):
+        print(f"⚠️ 파일을 찾을 수 없습니다: {args.csv}")
+        return 1
+    if args.stream:
+        from stats_collector import process_csv_streaming
+
+        process_csv_streaming(args.csv)
+        return 0
+
+    from stats_collector import process_csv_data, save_stats_to_json
+
+    processed = process_csv_data(args.csv)
+    if not processed:
+        return 1
+    save_stats_to_json(processed)
+    return 0
+
+
+def cmd_process(args) -> int:
+    from duckdb_processor import run_pipeline
+
+    code = run_pipeline(full=args.full, export_csv=args.csv)
+    if code == 0 and args.diagnose:
+        return _run_diagnostics()
+    return code
+
+
+def cmd_enrich(args) -> int:
+    from report_stage import compact_report, export_tableau_csv
+
+    if args.compact:
+        compact_report()
+    try:
+        path = export_tableau_csv(output_path=args.output)
+    except FileNotFoundError as e:
+        print(f"🚨 {e} (먼저 python cli.py process 를 실행해주세요)")
+        return 1
+    print(f"✅ 태블로용 파일이 저장되었습니다: {path}")
+    return 0
+
+
+def _latest(paths: list):
+    """(가장 최근 수정된 파일, 수정 시각) - 없으면 (None, None)"""
+    if not paths:
+        return None, None
+    path = max(paths, key=os.path.getmtime)
+    return path, datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def _quota_status(state_dir: str = os.path.join("data", "state")) -> dict:
+    """오늘 키별 사용량 {파일 이름: (사용, 한도)} - 키 없이 상태 파일만 읽음"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    status = {}
+    for path in sorted(glob.glob(os.path.join(state_dir, "quota*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        spent = int(state.get("spent", 0)) if state.get("date") == today else 0
+        status[os.path.basename(path)] = (spent, state.get("daily_limit"))
+    return status
+
+
+def _run_diagnostics(date_from: str = None, station: str = None) -> int:
+    from diagnostics import print_diagnostics, run_diagnostics
+    from metrics import REGISTRY
+
+    print("\n🔎 조인 커버리지 진단")
+    try:
+        result = run_diagnostics(date_from=date_from, station=station)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        return 1
+    print_diagnostics(result)
+    REGISTRY.write_files()
+    return 0
+
+
+def cmd_diagnose(args) -> int:
+    """
+    파일 메타데이터만으로 파이프라인 상태를 점검합니다. (무거운 라이브러리 없이 수 ms)
+    가장 최근 수집이 --max-age 분보다 오래됐으면 종료 코드 1 (헬스 체크용)
+    --quick 이 아니면 이어서 조인 커버리지 진단을 실행합니다.
+    """
+    from delta_store import delta_partition_files
+    from report_stage import REPORT_DIR
+    from snapshot_store import partition_files
+
+    now = datetime.now()
+    sources = {
+        "store": list(partition_files()),
+        "delta": list(delta_partition_files()),
+        "raw": glob.glob(os.path.join("data", "raw", "arrivals_*.json")),
+    }
+    print("🩺 파이프라인 상태 점검")
+    newest = None
+    for name, paths in sources.items():
+        path, mtime = _latest(paths)
+        if path is None:
+            print(f"   - 수집({name}): 없음")
+            continue
+        newest = max(newest or mtime, mtime)
+        print(f"   - 수집({name}): 파일 {len(paths)}개, 최근 {mtime:%Y-%m-%d %H:%M:%S} ({path})")
+
+    for label, pattern in [("베이스라인 캐시", os.path.join("data", "cache", "baseline_*.parquet")),
+                           ("프로필 배열", os.path.join("data", "cache", "profile_*.npz")),
+                           ("리포트 Parquet", os.path.join(REPORT_DIR, "date=*", "*.parquet"))]:
+        paths = glob.glob(pattern)
+        path, mtime = _latest(paths)
+        print(f"   - {label}: " + (f"{len(paths)}개, 최근 {mtime:%Y-%m-%d %H:%M:%S}" if path else "없음"))
+
+    for name, (spent, limit) in _quota_status().items():
+        print(f"   - 쿼터({name}): 오늘 {spent}/{limit}회 사용")
+
+    code = 0
+    if newest is None:
+        print("❌ 수집된 실시간 데이터가 없습니다.")
+        code = 1
+    else:
+        age_min = (now - newest).total_seconds() / 60
+        if age_min > args.max_age:
+            print(f"❌ 마지막 수집이 {age_min:.0f}분 전입니다. (기준 {args.max_age}분)")
+            code = 1
+        else:
+            print(f"✅ 정상 (마지막 수집 {age_min:.1f}분 전)")
+
+    if args.quick:
+        return code
+    # 수집이 멈췄어도 쌓인 이력으로 진단은 진행
+    return _run_diagnostics(args.date_from, args.station) or code
+
+
+def cmd_serve(args) -> int:
+    from query_service import serve
+
+    serve(port=args.port)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="지하철 혼잡도 파이프라인 통합 CLI")
+    sub = parser.add_subparsers(dest="command", metavar="<명령>")
+    sub.required = True
+
+    p = sub.add_parser("collect", help="실시간 도착정보 수집 (COLLECTOR_* / STORAGE_MODE 환경변수 사용)")
+    p.set_defaults(func=cmd_collect)
+
+    p = sub.add_parser("stats", help="승하차 통계 CSV 변환 / 여러 달 일괄 처리")
+    p.add_argument("--csv", default="data/station_passenger.csv", help="변환할 CSV (기본: data/station_passenger.csv)")
+    p.add_argument("--stream", action="store_true", help="청크 단위로 Parquet 변환 (대용량 파일)")
+    p.add_argument("--batch", metavar="SOURCE", help="여러 달 CSV 폴더 또는 glob 패턴을 프로세스 풀로 일괄 처리")
+    p.add_argument("--workers", type=int, default=None, help="(--batch) 프로세스 수")
+    p.add_argument("--force", action="store_true", help="(--batch) 이미 처리된 파일도 다시 처리")
+    p.add_argument("--no-merge", action="store_true", help="(--batch) 베이스라인 캐시 갱신 생략")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("process", help="새 스냅샷 적재 + 혼잡도 리포트 갱신")
+    p.add_argument("--full", action="store_true", help="인메모리로 전체 재계산")
+    p.add_argument("--csv", action="store_true", help="태블로용 CSV 도 내보내기")
+    p.add_argument("--diagnose", action="store_true", help="끝난 뒤 조인 커버리지 진단 실행")
+    p.set_defaults(func=cmd_process)
+
+    p = sub.add_parser("enrich", help="리포트 Parquet 을 좌표 포함 태블로용 CSV 로 내보내기")
+    p.add_argument("--output", default=os.path.join("data", "realtime_report_for_tableau.csv"), help="출력 CSV 경로")
+    p.add_argument("--compact", action="store_true", help="지난 날짜 파티션의 part 파일 먼저 병합")
+    p.set_defaults(func=cmd_enrich)
+
+    p = sub.add_parser("diagnose", help="데이터 상태 점검 (헬스 체크) + 조인 커버리지 진단")
+    p.add_argument("--max-age", type=float, default=STALE_AFTER_MIN, help=f"수집 지연 허용(분, 기본 {STALE_AFTER_MIN})")
+    p.add_argument("--quick", action="store_true", help="파일 메타데이터 점검만 (pandas/duckdb 없이)")
+    p.add_argument("--station", default=None, help="이 역의 시간대별 매칭 상태도 출력 (예: 서울)")
+    p.add_argument("--date-from", default=None, help="YYYY-MM-DD 이후 데이터만 진단")
+    p.set_defaults(func=cmd_diagnose)
+
+    p = sub.add_parser("serve", help="실시간 혼잡도 조회 서비스 (HTTP/JSON)")
+    p.add_argument("--port", type=int, default=None, help="포트 (기본: QUERY_PORT 또는 8080)")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,67 +2,120 @@
 실시간 지하철 도착정보 수집기 (File 기반)
 - 역할: API에서 실시간 데이터를 가져와 JSON 파일로 저장 (DuckDB가 읽을 용도)
 """
+import atexit
 import json
+import logging
 import os
 import time
 from datetime import datetime
 from pathlib import Path
 from api_client import SeoulMetroAPI
+from delta_store import DeltaWriter
+from key_pool import ApiKeyPool
+from snapshot_store import append_snapshot
+from stream import get_broker, publish_arrivals
+from scheduler import AdaptiveScheduler, load_hourly_baseline
+from sharding import shard_from_env, shard_stations
+from metrics import BYTES_WRITTEN, REGISTRY, ROWS_INGESTED, get_logger, log_event
+
+logger = get_logger("collector")
 
 def collect_and_save_realtime_data():
-    api = SeoulMetroAPI()
+    # 수집기를 여러 개 띄우면 역과 API 키를 수집기별로 나눠 맡음 (COLLECTOR_SHARD_INDEX / COUNT)
+    shard_index, shard_count = shard_from_env()
+    key_pool = ApiKeyPool.from_env(shard_index, shard_count)
+    # 쿼터 사용량은 몇 번에 한 번씩 저장하므로 종료할 때 남은 분량을 기록
+    atexit.register(key_pool.flush)
+    api = SeoulMetroAPI(key_pool=key_pool)
+    
+    # [수정] 수집할 역 목록 (COLLECTOR_STATIONS 에 쉼표로 지정 가능) 중 이 수집기가 맡은 역
+    all_stations = [s.strip() for s in os.environ.get("COLLECTOR_STATIONS", "서울,강남,홍대입구,신도림,잠실").split(",")
+                    if s.strip()]
+    stations = shard_stations(all_stations, shard_index, shard_count)
     
-    # [수정] 수집할 역 목록 (필요한 역 추가 가능)
-    stations = ["서울", "강남", "홍대입구", "신도림", "잠실"]
+    # 저장 방식: store(날짜/역 파티션 압축 NDJSON, 기본값), delta(키프레임 + 바뀐 열차만),
+    # json(틱마다 파일 하나, 예전 방식)
+    storage_mode = os.environ.get("STORAGE_MODE", "store")
+    delta_writer = DeltaWriter() if storage_mode == "delta" else None
     
     # 데이터 저장 폴더 생성 (data/raw)
     raw_dir = Path("data/raw")
     raw_dir.mkdir(parents=True, exist_ok=True)
     
-    print("📡 실시간 데이터 수집 및 JSON 저장 시작...")
+    # 이 수집기가 가진 키들의 하루 호출 한도 합을 예산으로 보고 붐비는 역/시간대를 더 자주 조회
+    scheduler = AdaptiveScheduler(stations, key_pool, load_hourly_baseline())
+    
+    # STREAM_PUBLISH=1 이면 레코드를 metro-arrivals 토픽에도 발행 (전송 방식은 STREAM_BACKEND)
+    broker = get_broker() if os.environ.get("STREAM_PUBLISH") == "1" else None
+    
+    print(f"📡 실시간 데이터 수집 및 JSON 저장 시작... (수집기 {shard_index + 1}/{shard_count}, "
+          f"역 {len(stations)}/{len(all_stations)}개, API 키 {len(key_pool.keys)}개)")
     
     while True:
+        due = scheduler.due_stations()
+        if not due:
+            wait_sec = scheduler.seconds_until_next()
+            log_event(logger, logging.INFO, "⏳ 다음 조회까지 대기 중... (종료하려면 Ctrl+C)",
+                      wait_sec=round(wait_sec), remaining_calls=scheduler.quota.remaining())
+            time.sleep(max(wait_sec, 1))
+            continue
+        
         collected_at = datetime.now().isoformat()
         all_arrivals = []
         
-        for station in stations:
-            # API 호출
-            data = api.get_arrival_info(station)
+        # 이번 틱에 조회할 역들을 동시에 조회 (느린 역은 마감 시간 이후 제외)
+        # 메시지/코드는 API 클라이언트에서 한 번만 해석해 타입이 정해진 ArrivalRecord 로 받음
+        # (남은 정거장 수, 현재 위치, 도착 상태, 정수 남은 초, 호선/상하행/열차번호)
+        received = api.get_arrival_records(due, collected_at)
+        scheduler.mark_polled(due)
+        
+        for station in due:
+            records = received.get(station)
             
-            if "realtimeArrivalList" in data:
-                count = 0
-                for item in data["realtimeArrivalList"]:
-                    # DuckDB에서 읽기 편한 구조로 정리
-                    all_arrivals.append({
-                        # '강남역' -> '강남'으로 통일시켜 CSV 통계와 조인되게 만듦
-                        "station_name": item.get("statnNm").replace("역", ""), 
-                        "train_line": item.get("trainLineNm"),
-                        "arrival_message": item.get("arvlMsg2"),
-                        "arrival_time_sec": item.get("barvlDt", "0") # 남은 초
-                    })
-                    count += 1
-                print(f" -> [수집 완료] {station}: {count}대 열차 대기 중")
+            if records:
+                all_arrivals.extend(records)
+                log_event(logger, logging.DEBUG, " -> [수집 완료]", station=station, trains=len(records))
             else:
-                print(f" -> [데이터 없음] {station}")
+                log_event(logger, logging.DEBUG, " -> [데이터 없음]", station=station)
+        ROWS_INGESTED.inc(len(all_arrivals), source="collector")
+        log_event(logger, logging.INFO, "📡 틱 수집 완료", stations=len(due),
+                  responded=len(received), arrivals=len(all_arrivals))
+        
+        # 스트림 소비자가 바로 반영할 수 있도록 먼저 발행
+        # 응답한 역마다 스냅샷 끝 표시도 보내서, 열차 없이 응답한 역은 소비자가 이전 열차를 비움
+        if received and broker:
+            publish_arrivals(broker, collected_at, all_arrivals, stations=received.keys())
+        
+        # 모은 데이터를 파티션 저장소에 이어 쓰기
+        if all_arrivals and storage_mode == "store":
+            append_snapshot(collected_at, all_arrivals)
+            log_event(logger, logging.INFO, "💾 저장소 추가 완료: data/store/arrivals", rows=len(all_arrivals))
+        
+        # 델타 방식: 직전 틱과 달라진 열차만 기록 (주기적으로 전체 키프레임)
+        # 응답한 역을 함께 넘겨서, 열차가 없다고 응답한 역은 이전 열차를 지움
+        elif received and delta_writer:
+            changed = delta_writer.append(collected_at, all_arrivals, stations=received.keys())
+            log_event(logger, logging.INFO, "💾 델타 저장 완료: data/store/deltas",
+                      rows=len(all_arrivals), changed=changed)
         
-        # 모은 데이터를 하나의 JSON 파일로 저장
-        if all_arrivals:
+        # (예전 방식) 모은 데이터를 하나의 JSON 파일로 저장
+        elif all_arrivals:
             timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
             filepath = raw_dir / f"arrivals_{timestamp_str}.json"
             
             final_data = {
                 "collected_at": collected_at,
-                "arrivals": all_arrivals
+                "arrivals": [arr.to_dict() for arr in all_arrivals]
             }
             
             with open(filepath, "w", encoding="utf-8") as f:
                 json.dump(final_data, f, ensure_ascii=False, indent=2)
                 
-            print(f"💾 JSON 파일 저장 완료: {filepath} (총 {len(all_arrivals)}건)")
+            BYTES_WRITTEN.inc(filepath.stat().st_size, kind="raw_json")
+            log_event(logger, logging.INFO, "💾 JSON 파일 저장 완료", path=str(filepath), rows=len(all_arrivals))
         
-        # API 한도(1000회) 관리를 위해 10분 대기
-        print("⏳ 10분 대기 중... (종료하려면 Ctrl+C)")
-        time.sleep(600)
+        # 틱마다 메트릭 파일 갱신 (data/metrics.prom, data/metrics.json)
+        REGISTRY.write_files()
 
 if __name__ == "__main__":
     collect_and_save_realtime_data()
\ No newline at end of file
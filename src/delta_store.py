@@ -0,0 +1,236 @@
+"""
+실시간 도착정보 델타 저장소 (키프레임 + 틱별 변경분)
+- 연속된 스냅샷은 대부분 같은 열차/같은 메시지이므로, 틱마다 전체 목록 대신 바뀐 열차만 저장합니다.
+- 구조: data/store/deltas/date=YYYY-MM-DD/station=역명/deltas.ndjson.gz (gzip 멤버 이어 쓰기)
+    한 줄 = 한 틱
+    {"t": 수집시각, "kind": "key", "rows": {열차키: 레코드, ...}}                 : 전체 키프레임
+    {"t": 수집시각, "kind": "delta", "upsert": {열차키: 레코드}, "delete": [열차키]} : 변경분
+- 열차키: 호선ID|상하행|열차번호 (열차번호가 없으면 행선지와 순번)
+- 키프레임: 파티션 파일의 첫 틱, 프로세스 재시작 후 첫 틱, 그리고 DELTA_KEYFRAME_EVERY(기본 30) 틱마다
+  -> 파일 하나만으로 복원 가능하고, 어느 시점이든 가까운 키프레임부터 변경분만 적용하면 됩니다.
+- 읽기: snapshot_at(특정 시점 복원), iter_snapshots(틱별 전체 목록), iter_changes(변경분만),
+        iter_states(대량 적재용, 행 dict 를 새로 만들지 않음)
+- 실행: python delta_store.py stats  (저장소 크기와 전체 스냅샷 대비 레코드 수)
+"""
+import glob
+import gzip
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from metrics import BYTES_WRITTEN
+from snapshot_store import ARRIVAL_SCHEMA, _to_int
+
+DELTA_DIR = os.path.join("data", "store", "deltas")
+KEYFRAME_EVERY = int(os.environ.get("DELTA_KEYFRAME_EVERY", "30"))
+
+# 레코드에 저장하는 필드 (수집시각/역명은 줄과 파티션에 있으므로 제외)
+RECORD_FIELDS = [name for name in ARRIVAL_SCHEMA if name != "collected_at"]
+_INT_FIELDS = {name for name, typ in ARRIVAL_SCHEMA.items() if typ == "INTEGER"}
+
+
+def train_key(record: dict, ordinal: int = 0) -> str:
+    """역 안에서 열차 하나를 가리키는 키 (호선|방향|열차번호)"""
+    train = record.get("train_no") or f"{record.get('train_line')}#{ordinal}"
+    return f"{record.get('line_id') or ''}|{record.get('direction') or ''}|{train}"
+
+
+def _keyed_rows(arrivals: list) -> dict:
+    rows = {}
+    for arr in arrivals:
+        row = {name: _to_int(arr.get(name)) if name in _INT_FIELDS else arr.get(name) for name in RECORD_FIELDS}
+        ordinal = 0
+        key = train_key(row)
+        while key in rows:
+            ordinal += 1
+            key = train_key(row, ordinal)
+        rows[key] = row
+    return rows
+
+
+def _partition_path(store_dir: str, date: str, station: str) -> Path:
+    return Path(store_dir) / f"date={date}" / f"station={station}" / "deltas.ndjson.gz"
+
+
+class DeltaWriter:
+    """
+    역별 직전 스냅샷을 메모리에 들고, 틱마다 바뀐 열차만 이어 씁니다.
+    수집기 프로세스 하나에서 계속 재사용하세요. (새로 만들면 첫 틱은 키프레임)
+    """
+
+    def __init__(self, store_dir: str = DELTA_DIR, keyframe_every: int = KEYFRAME_EVERY):
+        self.store_dir = store_dir
+        self.keyframe_every = max(keyframe_every, 1)
+        self._last = {}                    # 역 -> (날짜, {열차키: 레코드})
+        self._since_key = defaultdict(int)  # 역 -> 마지막 키프레임 이후 틱 수
+        self.written = {"key": 0, "delta": 0, "rows": 0, "unchanged": 0}
+
+    def append(self, collected_at: str, arrivals: list, stations=None) -> int:
+        """
+        한 틱을 기록하고 실제로 쓴 레코드 수를 반환합니다.
+        stations 에 이번 틱에 응답한 역을 주면, 도착 정보 없이 응답한 역도 열차가 모두 사라진 것으로 기록합니다.
+        (주지 않으면 arrivals 에 나온 역만 기록)
+        """
+        date = datetime.fromisoformat(collected_at).strftime("%Y-%m-%d")
+        by_station = defaultdict(list, {station: [] for station in stations or ()})
+        for arr in arrivals:
+            by_station[arr["station_name"]].append(arr)
+
+        written = 0
+        for station, items in by_station.items():
+            rows = _keyed_rows(items)
+            last_date, last_rows = self._last.get(station, (None, None))
+            path = _partition_path(self.store_dir, date, station)
+            if not rows and last_rows is None and not path.exists():
+                continue  # 열차를 본 적 없는 역의 빈 응답은 남길 것이 없음
+
+            if last_rows is None or last_date != date or self._since_key[station] >= self.keyframe_every:
+                event = {"t": collected_at, "kind": "key", "rows": rows}
+                self._since_key[station] = 0
+                self.written["key"] += 1
+                count = len(rows)
+            else:
+                upsert = {k: r for k, r in rows.items() if last_rows.get(k) != r}
+                delete = [k for k in last_rows if k not in rows]
+                # 변하지 않은 틱도 수집시각은 남겨야 시점 복원이 정확하므로 빈 변경분을 기록
+                event = {"t": collected_at, "kind": "delta", "upsert": upsert, "delete": delete}
+                self._since_key[station] += 1
+                self.written["delta"] += 1
+                count = len(upsert) + len(delete)
+                if not count:
+                    self.written["unchanged"] += 1
+
+            self._last[station] = (date, rows)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            size_before = path.stat().st_size if path.exists() else 0
+            with gzip.open(path, "ab") as f:
+                f.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+            BYTES_WRITTEN.inc(path.stat().st_size - size_before, kind="delta_store")
+            written += count
+        self.written["rows"] += written
+        return written
+
+
+# ---------- 읽기 ----------
+def delta_partition_files(store_dir: str = DELTA_DIR) -> dict:
+    """델타 파티션 파일 경로와 현재 크기 {경로: 바이트}"""
+    pattern = os.path.join(store_dir, "date=*", "station=*", "deltas.ndjson.gz")
+    return {path: os.path.getsize(path) for path in glob.glob(pattern)}
+
+
+def _station_of(path: str) -> str:
+    return Path(path).parent.name.split("=", 1)[1]
+
+
+def iter_events(path: str):
+    """파티션 파일 하나의 틱 이벤트를 순서대로 (마지막 줄이 쓰다 만 경우는 무시)"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+    except EOFError:
+        return
+
+
+def _records(station: str, collected_at: str, rows: dict) -> list:
+    return [{"station_name": station, **row, "collected_at": collected_at} for row in rows.values()]
+
+
+def iter_states(path: str, after: str = None):
+    """
+    틱별 상태를 (수집시각, {열차키: 행}) 으로 내보냅니다. 레코드 dict 를 새로 만들지 않는 대량 적재용입니다.
+    돌려주는 dict 는 다음 틱에서 바로 고쳐지므로, 받는 쪽은 그 자리에서 읽기만 해야 합니다.
+    after 를 주면 그 시각 이후 틱만 내보냅니다. (그 전 틱도 상태 복원에는 사용)
+    """
+    rows = {}
+    for event in iter_events(path):
+        if event["kind"] == "key":
+            rows = dict(event["rows"])
+        else:
+            for key in event["delete"]:
+                rows.pop(key, None)
+            rows.update(event["upsert"])
+        if after is None or event["t"] > after:
+            yield event["t"], rows
+
+
+def iter_snapshots(path: str, after: str = None):
+    """틱별 전체 열차 목록을 복원해 (수집시각, 레코드 리스트) 로 내보냅니다."""
+    station = _station_of(path)
+    for collected_at, rows in iter_states(path, after):
+        yield collected_at, _records(station, collected_at, rows)
+
+
+def iter_changes(path: str, after: str = None):
+    """
+    변경분만 (수집시각, 추가/변경 레코드, 사라진 열차키) 로 내보냅니다.
+    키프레임은 직전 상태와 비교해 변경분으로 바꿔서 내보내므로, 받는 쪽은 키프레임을 신경 쓰지 않아도 됩니다.
+    """
+    station = _station_of(path)
+    rows = {}
+    for event in iter_events(path):
+        if event["kind"] == "key":
+            new_rows = event["rows"]
+            upsert = {k: r for k, r in new_rows.items() if rows.get(k) != r}
+            delete = [k for k in rows if k not in new_rows]
+            rows = dict(new_rows)
+        else:
+            upsert, delete = event["upsert"], event["delete"]
+            for key in delete:
+                rows.pop(key, None)
+            rows.update(upsert)
+        if (after is None or event["t"] > after) and (upsert or delete):
+            yield event["t"], _records(station, event["t"], upsert), delete
+
+
+def snapshot_at(station: str, at: str, store_dir: str = DELTA_DIR) -> list:
+    """at(ISO 시각) 시점에 그 역에 보이던 열차 목록 (그 날짜의 at 이전 마지막 틱 기준)"""
+    date = datetime.fromisoformat(at).strftime("%Y-%m-%d")
+    path = _partition_path(store_dir, date, station)
+    if not path.exists():
+        return []
+    latest = []
+    for collected_at, records in iter_snapshots(str(path)):
+        if collected_at > at:
+            break
+        latest = records
+    return latest
+
+
+def store_stats(store_dir: str = DELTA_DIR) -> dict:
+    """저장한 레코드 수와, 같은 기간을 전체 스냅샷으로 저장했을 때의 레코드 수 비교"""
+    stats = {"files": 0, "bytes": 0, "ticks": 0, "keyframes": 0, "stored_rows": 0, "full_rows": 0}
+    for path, size in delta_partition_files(store_dir).items():
+        stats["files"] += 1
+        stats["bytes"] += size
+        rows = {}
+        for event in iter_events(path):
+            stats["ticks"] += 1
+            if event["kind"] == "key":
+                stats["keyframes"] += 1
+                rows = dict(event["rows"])
+                stats["stored_rows"] += len(rows)
+            else:
+                for key in event["delete"]:
+                    rows.pop(key, None)
+                rows.update(event["upsert"])
+                stats["stored_rows"] += len(event["upsert"]) + len(event["delete"])
+            stats["full_rows"] += len(rows)
+    return stats
+
+
+if __name__ == "__main__":
+    # 사용법: python delta_store.py stats
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        s = store_stats()
+        ratio = s["stored_rows"] / s["full_rows"] if s["full_rows"] else 0
+        print(f"🧮 델타 저장소: 파일 {s['files']}개, {s['bytes']:,}바이트, 틱 {s['ticks']}개 (키프레임 {s['keyframes']}개)")
+        print(f"   저장 레코드 {s['stored_rows']:,}건 / 전체 스냅샷 기준 {s['full_rows']:,}건 ({ratio:.1%})")
+    else:
+        print("사용법: python delta_store.py stats")
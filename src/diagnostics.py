@@ -0,0 +1,255 @@
+"""
+조인 커버리지 진단 (debug.py / check_db.py 대체)
+- 실시간 도착 레코드 전체를 한 번만 스캔해서 (역 표기, 시, 요일 유형) 단위로 줄인 뒤 베이스라인과 맞춰 봅니다.
+    matched         : 리포트에서 예상 하차 인원이 붙는 행
+    station_missing : 베이스라인에 없는 역 (표기가 달라 매칭이 안 되는 경우 가장 비슷한 베이스라인 역을 함께 표시)
+    hour_missing    : 역은 있지만 그 시간대/요일 유형의 베이스라인이 없음
+    invalid_key     : 역명 또는 수집시각이 비어 있어 조인할 수 없음
+- 같은 스캔에서 컬럼별 NULL / 잘못된 값 개수도 셉니다.
+- 통계 CSV 는 앞부분(64KB)만 읽어 인코딩과 헤더를 확인합니다. (전체 파일을 디코딩하지 않음)
+- 결과는 data/diagnostics.json 과 metro_join_coverage_ratio 메트릭으로 남깁니다.
+- 실행: python cli.py diagnose [--station 서울] [--date-from YYYY-MM-DD]
+"""
+import json
+import os
+import time
+
+from metrics import JOIN_COVERAGE
+
+CSV_PATH = 'data/station_passenger.csv'
+DIAGNOSTICS_PATH = os.path.join("data", "diagnostics.json")
+SAMPLE_BYTES = 64 * 1024
+# 통계 CSV 헤더에 반드시 있어야 하는 컬럼
+REQUIRED_CSV_COLUMNS = ('날짜', '역명', '구분')
+
+# 컬럼별 (NULL 조건은 공통, 잘못된 값 조건)
+COLUMN_CHECKS = {
+    "station_name": "TRIM(station_name) = ''",
+    "collected_at": "CAST(collected_at AS TIMESTAMP) > CAST(current_timestamp AS TIMESTAMP) + INTERVAL 1 HOUR",
+    "train_line": "TRIM(train_line) = ''",
+    "arrival_message": "TRIM(arrival_message) = ''",
+    "arrival_time_sec": "arrival_time_sec < 0 OR arrival_time_sec > 7200",
+    "stations_away": "stations_away < 0",
+    "arrival_state": "arrival_state = 'unknown'",
+    "train_no": "TRIM(train_no) = ''",
+}
+
+# (역 표기, 시, 요일 유형) 단위로 한 번에 집계 ({arrivals}, {day_type}, {checks} 자리는 coverage_groups_sql() 로 채움)
+GROUPS_SQL = """
+    SELECT
+        TRIM(station_name) AS station_name,
+        CAST(strftime(CAST(collected_at AS TIMESTAMP), '%H') AS INTEGER) AS hour_int,
+        {day_type} AS day_type,
+        COUNT(*) AS row_count,
+        {checks}
+    FROM {arrivals}
+    GROUP BY ALL
+"""
+
+# 집계 결과를 베이스라인(station_id 기준, 하차)과 맞춰 행마다 상태를 붙임
+COVERAGE_SQL = """
+    WITH baseline_stations AS (
+        SELECT DISTINCT station_id FROM baseline WHERE type = '하차'
+    )
+    SELECT
+        g.station_name, g.hour_int, g.day_type, g.row_count, a.station_id,
+        CASE
+            WHEN g.station_name IS NULL OR g.station_name = '' OR g.hour_int IS NULL THEN 'invalid_key'
+            WHEN bs.station_id IS NULL THEN 'station_missing'
+            WHEN b.station_id IS NULL THEN 'hour_missing'
+            ELSE 'matched'
+        END AS status
+    FROM diag_groups g
+    LEFT JOIN station_alias a ON a.alias = g.station_name
+    LEFT JOIN baseline_stations bs ON bs.station_id = a.station_id
+    LEFT JOIN baseline b
+        ON b.station_id = a.station_id
+        AND b.hour_int = g.hour_int
+        AND b.day_type = g.day_type
+        AND b.type = '하차'
+"""
+
+# 베이스라인에 없는 역 표기 + 이름이 가장 비슷한 베이스라인 역
+MISSING_STATIONS_SQL = """
+    WITH missing AS (
+        SELECT station_name, SUM(row_count) AS row_count
+        FROM diag_coverage WHERE status = 'station_missing'
+        GROUP BY station_name
+    ),
+    candidates AS (
+        SELECT DISTINCT s.station_name
+        FROM baseline b JOIN dim_station s ON s.station_id = b.station_id
+    )
+    SELECT m.station_name, m.row_count,
+           arg_max(c.station_name, jaro_winkler_similarity(m.station_name, c.station_name)) AS closest_baseline,
+           max(jaro_winkler_similarity(m.station_name, c.station_name)) AS similarity
+    FROM missing m
+    LEFT JOIN candidates c ON true
+    GROUP BY m.station_name, m.row_count
+    ORDER BY m.row_count DESC
+"""
+
+
+def sniff_encoding(csv_path: str, sample_bytes: int = SAMPLE_BYTES) -> dict:
+    """
+    파일 앞부분 sample_bytes 만 읽어 인코딩(utf-8-sig / cp949)과 헤더를 확인합니다.
+    잘린 멀티바이트 문자(샘플 끝)는 오류로 보지 않습니다.
+    """
+    with open(csv_path, 'rb') as f:
+        head = f.read(sample_bytes)
+    result = {"path": csv_path, "sample_bytes": len(head), "bom": head.startswith(b'\xef\xbb\xbf')}
+
+    for encoding in ('utf-8-sig', 'cp949'):
+        try:
+            text = head.decode(encoding)
+        except UnicodeDecodeError as e:
+            if e.start < len(head) - 3:
+                continue
+            text = head[:e.start].decode(encoding)
+        header = text.splitlines()[0].split(',') if text else []
+        result.update(encoding=encoding, header_columns=len(header),
+                      header_ok=all(col in (h.strip().strip('"') for h in header) for col in REQUIRED_CSV_COLUMNS))
+        return result
+    result.update(encoding=None, header_columns=0, header_ok=False)
+    return result
+
+
+def coverage_groups_sql(arrivals: str) -> str:
+    from baseline_profile import day_type_sql
+
+    checks = ",\n        ".join(
+        f'COUNT(*) FILTER (WHERE {col} IS NULL) AS "null:{col}", '
+        f'COUNT(*) FILTER (WHERE {cond}) AS "invalid:{col}"'
+        for col, cond in COLUMN_CHECKS.items()
+    )
+    return GROUPS_SQL.format(arrivals=arrivals, day_type=day_type_sql("CAST(collected_at AS TIMESTAMP)"),
+                             checks=checks)
+
+
+def run_diagnostics(date_from: str = None, station: str = None, csv_path: str = CSV_PATH,
+                    output_path: str = DIAGNOSTICS_PATH) -> dict:
+    """
+    조인 커버리지, 컬럼별 NULL / 잘못된 값, 통계 CSV 인코딩을 진단하고 결과 dict 를 반환합니다.
+    station 을 주면 그 역(정규화 이름 기준)의 시간대별 매칭 상태도 함께 보여줍니다.
+    """
+    import duckdb
+
+    from baseline_profile import DAY_TYPES
+    from duckdb_processor import ensure_baseline, raw_json_scan_sql
+    from headway import arrivals_source
+    from snapshot_store import pending_raw_files
+    from stations import normalize_station_name, register_station_names
+
+    start = time.perf_counter()
+    result = {"csv": sniff_encoding(csv_path) if os.path.exists(csv_path) else None}
+
+    con = duckdb.connect(database=':memory:')
+    try:
+        try:
+            arrivals = arrivals_source(con, date_from=date_from)
+        except ValueError:
+            # 아직 적재/합치기 전이면 원본 JSON 스냅샷을 바로 진단
+            raw_files = pending_raw_files()
+            if not raw_files:
+                raise
+            arrivals = f"({raw_json_scan_sql(raw_files)})"
+        # 1. 실시간 데이터는 여기서 한 번만 스캔
+        con.execute(f"CREATE TEMP TABLE diag_groups AS {coverage_groups_sql(arrivals)}")
+
+        # 2. 베이스라인(캐시 재사용) + 리포트와 같은 규칙으로 실시간 역 표기에 station_id 부여
+        ensure_baseline(con)
+        register_station_names(con, "SELECT station_name FROM diag_groups")
+        con.execute(f"CREATE TEMP TABLE diag_coverage AS {COVERAGE_SQL}")
+
+        by_status = dict(con.execute(
+            "SELECT status, SUM(row_count) FROM diag_coverage GROUP BY status").fetchall())
+        total = sum(by_status.values())
+        result["rows"] = total
+        result["by_status"] = by_status
+        result["coverage"] = round(by_status.get("matched", 0) / total, 4) if total else None
+
+        result["missing_stations"] = [
+            {"station_name": name, "rows": rows, "closest_baseline": closest,
+             "similarity": round(sim, 3) if sim is not None else None}
+            for name, rows, closest, sim in con.execute(MISSING_STATIONS_SQL).fetchall()
+        ]
+        result["missing_hours"] = [
+            {"station_name": name, "day_type": DAY_TYPES[dt], "hours": hours, "rows": rows}
+            for name, dt, hours, rows in con.execute("""
+                SELECT station_name, day_type, list_sort(LIST(DISTINCT hour_int)), SUM(row_count)
+                FROM diag_coverage WHERE status = 'hour_missing'
+                GROUP BY station_name, day_type
+                ORDER BY SUM(row_count) DESC
+            """).fetchall()
+        ]
+
+        sums = ", ".join(f'SUM("{kind}:{col}")' for col in COLUMN_CHECKS for kind in ("null", "invalid"))
+        values = con.execute(f"SELECT {sums} FROM diag_groups").fetchone()
+        result["columns"] = {
+            col: {"null": int(values[2 * i] or 0), "invalid": int(values[2 * i + 1] or 0)}
+            for i, col in enumerate(COLUMN_CHECKS)
+        }
+
+        result["baseline"] = dict(zip(("stations", "rows"), con.execute(
+            "SELECT COUNT(DISTINCT station_id), COUNT(*) FROM baseline WHERE type = '하차'").fetchone()))
+
+        if station:
+            key = normalize_station_name(station)
+            result["station"] = [
+                {"station_name": name, "day_type": DAY_TYPES[dt] if dt is not None else None,
+                 "hour": hour, "rows": rows, "status": status}
+                for name, hour, dt, rows, status in con.execute("""
+                    SELECT c.station_name, c.hour_int, c.day_type, c.row_count, c.status
+                    FROM diag_coverage c
+                    LEFT JOIN dim_station s ON s.station_id = c.station_id
+                    WHERE s.station_name = ? OR c.station_name = ?
+                    ORDER BY c.day_type, c.hour_int, c.station_name
+                """, [key, station]).fetchall()
+            ]
+    finally:
+        con.close()
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    if result["coverage"] is not None:
+        JOIN_COVERAGE.set(result["coverage"])
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(output_path + ".tmp", output_path)
+    return result
+
+
+def print_diagnostics(result: dict, limit: int = 10):
+    csv = result.get("csv")
+    if csv is None:
+        print(f"⚠️ 통계 CSV 없음: {CSV_PATH}")
+    else:
+        mark = "✅" if csv["encoding"] and csv["header_ok"] else "❌"
+        print(f"{mark} 통계 CSV 인코딩: {csv['encoding']} (BOM {'있음' if csv['bom'] else '없음'}, "
+              f"헤더 {csv['header_columns']}개 컬럼, 앞 {csv['sample_bytes']:,}바이트 확인)")
+
+    print(f"📊 베이스라인: 역 {result['baseline']['stations']}개, 하차 행 {result['baseline']['rows']:,}개")
+    coverage = result["coverage"]
+    print(f"🔗 조인 커버리지: {coverage:.1%} ({result['rows']:,}행, {result['seconds']}s)" if coverage is not None
+          else "🔗 조인 커버리지: 실시간 데이터 없음")
+    for status, rows in sorted(result["by_status"].items(), key=lambda kv: -kv[1]):
+        print(f"   - {status}: {rows:,}행")
+
+    if result["missing_stations"]:
+        print("\n🚫 베이스라인에 없는 역 (실시간 표기 -> 가장 비슷한 베이스라인 역)")
+        for row in result["missing_stations"][:limit]:
+            print(f"   - {row['station_name']} ({row['rows']:,}행) -> {row['closest_baseline']} "
+                  f"(유사도 {row['similarity']})")
+    if result["missing_hours"]:
+        print("\n🕳️ 베이스라인 시간대가 없는 역")
+        for row in result["missing_hours"][:limit]:
+            print(f"   - {row['station_name']} [{row['day_type']}] {row['hours']}시 ({row['rows']:,}행)")
+
+    print("\n🧹 컬럼별 NULL / 잘못된 값")
+    for col, counts in result["columns"].items():
+        print(f"   - {col}: NULL {counts['null']:,} / 잘못된 값 {counts['invalid']:,}")
+
+    if result.get("station") is not None:
+        print(f"\n🔍 역별 매칭 상태 ({len(result['station'])}개 시간대)")
+        for row in result["station"]:
+            print(f"   - {row['station_name']} [{row['day_type']}] {row['hour']}시: {row['status']} ({row['rows']:,}행)")
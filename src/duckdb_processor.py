@@ -1,132 +1,600 @@
 """
 DuckDB 기반 모던 데이터 파이프라인 (Hybrid 구조)
 - 역할: Pandas로 안전하게 데이터를 로드하고, DuckDB로 초고속 인메모리 SQL 조인
+- 영구 DB 모드: data/metro.duckdb 에 적재 이력(watermark)을 남기고, 매 실행마다 새 스냅샷만 적재/리포트 갱신
+- 리포트(혼잡도 + 역 좌표)는 report_stage 가 data/report 날짜 파티션 Parquet 에 새 행만 추가합니다.
+  태블로용 CSV 가 필요하면 --csv 로 함께 내보냅니다.
 """
 import duckdb
 import pandas as pd
 import glob
+import hashlib
 import json
+import logging
 import os
+import sys
 
-def load_csv_safely():
-    print("📂 CSV 파일 로드 및 한글 복구 중...")
-    csv_path = 'data/station_passenger.csv'
-    
-    # Mac 환경에서는 utf-8일 확률이 높으므로 먼저 시도!
-    try:
-        df = pd.read_csv(csv_path, encoding='utf-8')
-    except UnicodeDecodeError:
-        df = pd.read_csv(csv_path, encoding='cp949')
-        
-    df.columns = [
-        '연번', '날짜', '호선', '역번호', '역명', '구분', 
-        '06시 이전', '06시-07시', '07시-08시', '08시-09시', '09시-10시', 
-        '10시-11시', '11시-12시', '12시-13시', '13시-14시', '14시-15시', 
-        '15시-16시', '16시-17시', '17시-18시', '18시-19시', '19시-20시', 
-        '20시-21시', '21시-22시', '22시-23시', '23시-24시', '24시 이후'
-    ]
-    
-    # 🔍 한글이 제대로 복구되었는지 확인
-    print(f"   -> [확인] 첫 번째 역명: {df['역명'].iloc[0]}")
-    return df
+from baseline_profile import BaselineProfile, RiskThresholds, day_type_sql
+from arrival_record import ArrivalBatch
+from delta_store import delta_partition_files, iter_states
+from snapshot_store import ARRIVAL_SCHEMA, arrivals_scan_sql, has_data, partition_files, pending_raw_files
+from stations import init_station_tables, register_station_names, update_station_coords
+from metrics import BYTES_WRITTEN, REGISTRY, ROWS_INGESTED, STAGE_DURATION, get_logger, log_event
+from time_slots import TIME_SLOTS
+from report_stage import create_tableau_view, discard_files, export_tableau_csv, rebuild_report, write_report
 
-def load_json_safely():
-    print("📂 JSON 파일 읽는 중 (빈 파일 필터링)...")
-    json_files = glob.glob('data/raw/arrivals_*.json')
-    all_data = []
-    
-    for f in json_files:
-        with open(f, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            collected_at = data.get('collected_at')
-            arrivals = data.get('arrivals', [])
-            
-            # 도착 정보가 있는(빈 배열이 아닌) 데이터만 쏙쏙 뽑아냅니다.
-            for arr in arrivals:
-                arr['collected_at'] = collected_at
-                all_data.append(arr)
-                
-    if not all_data:
-        raise ValueError("모든 JSON 파일에 도착 정보가 없습니다 (API 한도 초과 등)")
-        
-    return pd.DataFrame(all_data)
-
-def process_data_with_duckdb():
-    # 1. Pandas로 안전하게 메모리에 올리기
-    df_csv = load_csv_safely()
-    df_json = load_json_safely()
-    
-    print("\n🦆 DuckDB 엔진 가동 (인메모리 초고속 조인)...")
-    con = duckdb.connect(database=':memory:')
-    
-    # 2. SQL 쿼리로 단번에 합치기 (df_csv, df_json 변수를 그대로 테이블처럼 씁니다!)
-    join_query = """
-    WITH baseline_view AS (
-        WITH unpivoted AS (
-            UNPIVOT (SELECT * FROM df_csv)
-            ON "06시 이전", "06시-07시", "07시-08시", "08시-09시", "09시-10시", 
-               "10시-11시", "11시-12시", "12시-13시", "13시-14시", "14시-15시", 
-               "15시-16시", "16시-17시", "17시-18시", "18시-19시", "19시-20시", 
-               "20시-21시", "21시-22시", "22시-23시", "23시-24시", "24시 이후"
-            INTO NAME time_slot VALUE passenger_count
-        ),
-        cleaned AS (
-            SELECT 
-                TRIM(역명) AS station_name,
-                TRIM(구분) AS type,
-                CAST(
-                    CASE 
-                        WHEN time_slot = '06시 이전' THEN '5'
-                        WHEN time_slot = '24시 이후' THEN '24'
-                        ELSE SUBSTRING(time_slot, 1, 2)
-                    END 
-                AS INTEGER) AS hour_int,
-                CAST(REPLACE(CAST(passenger_count AS VARCHAR), ',', '') AS INTEGER) AS p_count
-            FROM unpivoted
-        )
-        SELECT station_name, hour_int, type, AVG(p_count)::INTEGER AS avg_passenger
+logger = get_logger("duckdb_processor")
+
+DB_PATH = os.environ.get("DUCKDB_PATH", "data/metro.duckdb")
+CSV_PATH = 'data/station_passenger.csv'
+BASELINE_CACHE_DIR = 'data/cache'
+# 베이스라인 캐시 형식 버전 (컬럼/값이 바뀌면 올려서 예전 캐시를 다시 만들게 함)
+# v3: 프로필의 월별 평균을 리포트 SQL 과 같은 정수 값으로 저장
+BASELINE_VERSION = 3
+
+# 수집 시점에 도착 메시지에서 해석해 둔 컬럼 (arrival_parser.parse_arrival)
+PARSED_ARRIVAL_COLUMNS = {
+    "stations_away": "INTEGER",
+    "current_station": "VARCHAR",
+    "arrival_state": "VARCHAR",
+    "line_id": "VARCHAR",
+    "direction": "VARCHAR",
+    "train_no": "VARCHAR",
+}
+
+# 베이스라인 원천 1) 단일 CSV: 시간대 컬럼을 세로로 펴서(UNPIVOT) 정리
+# - 펼칠 컬럼 목록은 time_slots.TIME_SLOTS 에서 만듦
+# - '24시 이후'는 0시로 봄 (실시간 수집 시각의 시(hour)와 맞춤)
+_TIME_SLOT_COLUMNS = ", ".join(f'"{slot}"' for slot in TIME_SLOTS)
+BASELINE_CSV_SOURCE_SQL = f"""
+    WITH unpivoted AS (
+        UNPIVOT (SELECT * FROM df_csv)
+        ON {_TIME_SLOT_COLUMNS}
+        INTO NAME time_slot VALUE passenger_count
+    )
+    SELECT
+        TRIM(역명) AS station_name,
+        TRIM(CAST(호선 AS VARCHAR)) AS line_name,
+        TRIM(구분) AS type,
+        TRY_CAST(날짜 AS DATE) AS service_date,
+        CAST(
+            CASE
+                WHEN time_slot = '06시 이전' THEN '5'
+                WHEN time_slot = '24시 이후' THEN '0'
+                ELSE SUBSTRING(time_slot, 1, 2)
+            END
+        AS INTEGER) AS hour_int,
+        CAST(REPLACE(CAST(passenger_count AS VARCHAR), ',', '') AS INTEGER) AS p_count
+    FROM unpivoted
+"""
+
+# 베이스라인 원천 2) 여러 달 일괄 처리 결과(batch_pipeline 의 월 파티션, 이미 세로형)
+BASELINE_HISTORY_SOURCE_SQL = """
+    SELECT
+        TRIM(station_name) AS station_name,
+        TRIM(line_num) AS line_name,
+        TRIM(type) AS type,
+        TRY_CAST(date AS DATE) AS service_date,
+        CAST(hour AS INTEGER) % 24 AS hour_int,
+        count AS p_count
+    FROM read_parquet('{history_glob}')
+"""
+
+# 역/시간/요일 유형/구분별 평균, 90퍼센타일 인원 ({source} 자리에 위 원천 중 하나)
+# - month 가 NULL 인 행은 전체 기간, 값이 있는 행은 월별 프로필 (GROUPING SETS 로 한 번에)
+BASELINE_SQL = """
+    WITH cleaned AS ({source}),
+    typed AS (
+        SELECT *, {day_type} AS day_type, month(service_date) AS month
         FROM cleaned
-        GROUP BY station_name, hour_int, type
-    ),
-    real_time AS (
-        SELECT 
+    )
+    SELECT station_name, hour_int, day_type, month, type,
+           AVG(p_count)::INTEGER AS avg_passenger,
+           quantile_cont(p_count, 0.9)::INTEGER AS p90_passenger,
+           LIST(DISTINCT line_name) AS line_names
+    FROM typed
+    GROUP BY GROUPING SETS ((station_name, hour_int, day_type, type),
+                            (station_name, hour_int, day_type, month, type))
+"""
+
+# 실시간 도착정보 + 베이스라인 조인 ({arrivals}, {baseline}, {monthly} 자리에 FROM 대상이 들어감, report_sql() 로 채움)
+# 역 매칭은 적재 시점에 붙인 정수 station_id 로만 하고, 수집 날짜와 같은 요일 유형의 베이스라인을 씁니다.
+# 수집 월의 월별 평균이 있으면 그 값을, 없으면 전체 기간 평균을 씀 (스트림의 RiskScorer.score_record 와 같은 규칙)
+REPORT_SQL = """
+    WITH real_time AS (
+        SELECT
+            station_id,
             TRIM(station_name) AS station_name,
             train_line,
             arrival_message,
             arrival_time_sec,
-            CAST(strftime(CAST(collected_at AS TIMESTAMP), '%H') AS INTEGER) AS current_hour_int
-        FROM df_json
+            collected_at,
+            CAST(strftime(CAST(collected_at AS TIMESTAMP), '%H') AS INTEGER) AS current_hour_int,
+            month(CAST(collected_at AS TIMESTAMP)) AS month,
+            {day_type} AS day_type
+        FROM {arrivals}
     )
-    SELECT 
-        r.station_name AS "역명",
-        r.train_line AS "행선지",
-        r.arrival_message AS "실시간_상태",
-        COALESCE(b.avg_passenger, 0) AS "현재시간_예상하차인원(명)",
-        CASE 
-            WHEN b.avg_passenger > 5000 AND CAST(r.arrival_time_sec AS INTEGER) <= 60 
+    SELECT
+        r.collected_at,
+        r.station_id,
+        r.station_name,
+        r.train_line,
+        r.arrival_message,
+        COALESCE(m.avg_passenger, b.avg_passenger, 0) AS expected_alighting,
+        CASE
+            WHEN {risk_value} > {risk_passengers} AND r.arrival_time_sec <= {risk_arrival_sec}
             THEN '🚨 혼잡 위험'
             ELSE '✅ 정상'
-        END AS "플랫폼_위험도"
+        END AS risk_level
     FROM real_time r
-    LEFT JOIN baseline_view b 
-        ON REPLACE(r.station_name, '역', '') = REPLACE(b.station_name, '역', '') 
+    LEFT JOIN {baseline} b
+        ON r.station_id = b.station_id
         AND r.current_hour_int = b.hour_int
+        AND r.day_type = b.day_type
         AND b.type = '하차'
-    ORDER BY "현재시간_예상하차인원(명)" DESC NULLS LAST;
+    LEFT JOIN {monthly} m
+        ON r.station_id = m.station_id
+        AND r.month = m.month
+        AND r.current_hour_int = m.hour_int
+        AND r.day_type = m.day_type
+"""
+
+# 리포트 CSV 컬럼 (한글 헤더)
+REPORT_COLUMNS_SQL = """
+    station_name AS "역명",
+    train_line AS "행선지",
+    arrival_message AS "실시간_상태",
+    expected_alighting AS "현재시간_예상하차인원(명)",
+    risk_level AS "플랫폼_위험도"
+"""
+
+def report_sql(arrivals: str, baseline: str = "baseline", thresholds: RiskThresholds = None,
+               monthly: str = "baseline_monthly") -> str:
+    """
+    REPORT_SQL 에 대상 테이블과 위험 판정 기준(RISK_PASSENGERS / RISK_ARRIVAL_SEC / RISK_STAT)을 채웁니다.
+    평균 기준이면 예상 하차 인원(월별 우선)과 비교하고, p90 기준이면 전체 기간 p90 과 비교합니다. (RiskScorer.score 와 같음)
     """
-    
-    return con.execute(join_query).fetchdf()
+    thresholds = thresholds or RiskThresholds.from_env()
+    return REPORT_SQL.format(
+        arrivals=arrivals,
+        baseline=baseline,
+        monthly=monthly,
+        day_type=day_type_sql("CAST(collected_at AS TIMESTAMP)"),
+        risk_value="b.p90_passenger" if thresholds.statistic == "p90" else "COALESCE(m.avg_passenger, b.avg_passenger)",
+        risk_passengers=thresholds.passengers,
+        risk_arrival_sec=thresholds.arrival_sec,
+    )
 
-if __name__ == "__main__":
+def load_csv_safely():
+    log_event(logger, logging.INFO, "📂 CSV 파일 로드 및 한글 복구 중...")
+    csv_path = CSV_PATH
+
+    # 시간대 열은 천 단위 콤마("1,234")가 섞인 열과 아닌 열이 있어 열마다 타입이 달라지므로
+    # 모두 문자열로 읽고, 숫자 변환은 BASELINE_CSV_SOURCE_SQL 에서 콤마를 지운 뒤 한 번에 함
+    # Mac 환경에서는 utf-8일 확률이 높으므로 먼저 시도!
     try:
-        result_df = process_data_with_duckdb()
-        print("\n✨ [결과 리포트: 실시간 열차 도착 및 하차 인원 예측]")
+        df = pd.read_csv(csv_path, encoding='utf-8', dtype=str)
+    except UnicodeDecodeError:
+        df = pd.read_csv(csv_path, encoding='cp949', dtype=str)
+
+    df.columns = ['연번', '날짜', '호선', '역번호', '역명', '구분', *TIME_SLOTS]
+
+    # 🔍 한글이 제대로 복구되었는지 확인
+    log_event(logger, logging.INFO, "   -> [확인] 첫 번째 역명", station=df['역명'].iloc[0], rows=len(df))
+    return df
+
+def raw_json_scan_sql(json_files: list = None) -> str:
+    """
+    원본 arrivals_*.json 파일을 DuckDB JSON 리더로 바로 읽는 SELECT 문을 만듭니다.
+    - 파이썬에서 행마다 dict를 만들지 않고 DuckDB가 스캔하면서 arrivals 배열을 UNNEST 합니다.
+    - 깨진 파일은 ignore_errors로, 빈 배열(API 한도 초과 등)은 스캔 안에서 걸러냅니다.
+    - 해석된 필드(남은 정거장, 위치, 상태 등)가 없는 예전 파일은 해당 컬럼이 NULL 입니다.
+    """
+    if json_files is None:
+        files_sql = "'data/raw/arrivals_*.json'"
+    else:
+        files_sql = "[" + ", ".join("'" + f.replace("'", "''") + "'" for f in json_files) + "]"
+
+    return f"""
+        SELECT
+            TRIM(arr.station_name) AS station_name,
+            arr.train_line AS train_line,
+            arr.arrival_message AS arrival_message,
+            TRY_CAST(arr.arrival_time_sec AS INTEGER) AS arrival_time_sec,
+            arr.stations_away AS stations_away,
+            arr.current_station AS current_station,
+            arr.arrival_state AS arrival_state,
+            arr.line_id AS line_id,
+            arr.direction AS direction,
+            arr.train_no AS train_no,
+            TRY_CAST(collected_at AS TIMESTAMP) AS collected_at
+        FROM (
+            SELECT collected_at, UNNEST(arrivals) AS arr
+            FROM read_json({files_sql},
+                           format = 'auto',
+                           columns = {{
+                               'collected_at': 'VARCHAR',
+                               'arrivals': 'STRUCT(station_name VARCHAR, train_line VARCHAR, arrival_message VARCHAR, arrival_time_sec VARCHAR, '
+                                             'stations_away INTEGER, current_station VARCHAR, arrival_state VARCHAR, '
+                                             'line_id VARCHAR, direction VARCHAR, train_no VARCHAR)[]'
+                           }},
+                           ignore_errors = true)
+            WHERE len(arrivals) > 0
+        )
+    """
+
+def load_delta_arrivals(con, paths: list, watermark: dict = None) -> str:
+    """
+    델타 저장소 파티션에서 틱별 전체 열차 목록을 복원해 delta_arrivals 임시 테이블에 넣고,
+    스냅샷 저장소와 같은 컬럼 순서의 SELECT 문을 돌려줍니다. (복원할 틱이 없으면 None)
+    - watermark {역명: 마지막 적재 수집시각} 을 주면 그 이후 틱만 복원합니다.
+    - 행마다 dict 를 만들지 않고 열 단위 ArrivalBatch(사전 인코딩)에 쌓아서 DataFrame 으로 한 번에 넘깁니다.
+    """
+    batch = ArrivalBatch()
+    for path in sorted(paths):
+        station = os.path.basename(os.path.dirname(path)).split("=", 1)[1]
+        for collected_at, rows in iter_states(path, after=(watermark or {}).get(station)):
+            batch.extend(rows.values(), collected_at=collected_at, station_name=station)
+    if not len(batch):
+        return None
+
+    columns = ["station_name"] + [c for c in ARRIVAL_SCHEMA if c != "collected_at"] + ["collected_at"]
+    df_delta = batch.to_pandas(columns)
+    con.register("df_delta", df_delta)
+    casts = ", ".join(f"CAST({c} AS {ARRIVAL_SCHEMA.get(c, 'VARCHAR')}) AS {c}" for c in columns)
+    con.execute(f"CREATE OR REPLACE TEMP TABLE delta_arrivals AS SELECT {casts} FROM df_delta")
+    con.unregister("df_delta")
+    return f"SELECT {', '.join(columns)} FROM delta_arrivals"
+
+def csv_fingerprint(csv_path: str = CSV_PATH) -> str:
+    """
+    CSV 내용의 sha256 해시. 크기/수정시각이 그대로면 지난번 해시를 재사용해 파일을 다시 읽지 않습니다.
+    """
+    stat = os.stat(csv_path)
+    meta_path = os.path.join(BASELINE_CACHE_DIR, "baseline_source.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("size") == stat.st_size and meta.get("mtime") == stat.st_mtime:
+            return meta["sha256"]
+
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    os.makedirs(BASELINE_CACHE_DIR, exist_ok=True)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}, f)
+    return digest.hexdigest()
+
+def ensure_baseline(con, history_dir: str = None) -> str:
+    """
+    시간대별 베이스라인을 원천 해시별 Parquet 파일로 한 번만 만들어 두고 재사용합니다.
+    원천은 여러 달 일괄 처리 결과(batch_pipeline, 기본 data/stats/passenger)가 있으면 그것, 없으면 단일 CSV 입니다.
+    원천이 바뀌면(해시가 달라지면) 새로 만들고, con 에 station_id 기준 baseline 테이블을 만듭니다.
+    같은 해시의 배열 프로필(profile_*.npz, 스트림 소비자의 O(1) 판정용)도 없으면 만듭니다.
+    """
+    from batch_pipeline import HISTORY_DIR, history_fingerprint
+
+    history_dir = history_dir or HISTORY_DIR
+    history_hash = history_fingerprint(history_dir)
+    source_hash = history_hash or csv_fingerprint()
+    cache_key = f"v{BASELINE_VERSION}_{source_hash[:16]}"
+    cache_path = os.path.join(BASELINE_CACHE_DIR, f"baseline_{cache_key}.parquet")
+    profile_path = os.path.join(BASELINE_CACHE_DIR, f"profile_{cache_key}.npz")
+
+    if os.path.exists(cache_path):
+        log_event(logger, logging.INFO, "♻️ 캐시된 베이스라인 사용", path=cache_path)
+    else:
+        log_event(logger, logging.INFO, "🧮 원천 데이터가 변경되어 베이스라인을 새로 계산합니다...",
+                  source="history" if history_hash else "csv")
+        # 월 파티션이 원천이면 csv_fingerprint() 를 거치지 않으므로 캐시 폴더를 여기서 만듦
+        os.makedirs(BASELINE_CACHE_DIR, exist_ok=True)
+        if history_hash:
+            history_glob = os.path.join(history_dir, "month=*", "*.parquet")
+            source_sql = BASELINE_HISTORY_SOURCE_SQL.format(history_glob=history_glob)
+        else:
+            con.register("df_csv", load_csv_safely())
+            source_sql = BASELINE_CSV_SOURCE_SQL
+        tmp_path = cache_path + ".tmp"
+        baseline_sql = BASELINE_SQL.format(source=source_sql, day_type=day_type_sql("service_date"))
+        con.execute(f"COPY ({baseline_sql}) TO '{tmp_path}' (FORMAT PARQUET)")
+        if not history_hash:
+            con.unregister("df_csv")
+        os.replace(tmp_path, cache_path)
+        BYTES_WRITTEN.inc(os.path.getsize(cache_path), kind="baseline_cache")
+        # 예전 해시의 캐시 파일은 정리
+        for old in glob.glob(os.path.join(BASELINE_CACHE_DIR, "baseline_*.parquet")) + \
+                glob.glob(os.path.join(BASELINE_CACHE_DIR, "profile_*.npz")):
+            if old not in (cache_path, profile_path):
+                os.remove(old)
+
+    # CSV에 나오는 역 이름/호선을 역 기준 테이블에 등록하고 좌표도 채움
+    from add_coords import load_station_coords
+    init_station_tables(con)
+    register_station_names(
+        con,
+        f"SELECT station_name, UNNEST(line_names) AS line_name FROM read_parquet('{cache_path}') WHERE month IS NULL",
+        line_column="line_name"
+    )
+    coords = load_station_coords()
+    update_station_coords(con, dict(zip(coords['station_key'], zip(coords['latitude'], coords['longitude']))))
+
+    # 같은 역의 다른 표기('서울역'/'서울')는 하나의 station_id 로 합쳐서 평균
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE baseline AS
+        SELECT a.station_id, b.hour_int, b.day_type, b.type,
+               AVG(b.avg_passenger)::INTEGER AS avg_passenger,
+               AVG(b.p90_passenger)::INTEGER AS p90_passenger
+        FROM read_parquet('{cache_path}') b
+        JOIN station_alias a ON a.alias = b.station_name
+        WHERE b.month IS NULL
+        GROUP BY a.station_id, b.hour_int, b.day_type, b.type
+    """)
+    # 월별 하차 평균 (리포트와 프로필 배열이 같은 값을 쓰도록 여기서 한 번만 계산)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE baseline_monthly AS
+        SELECT a.station_id, b.month, b.hour_int, b.day_type,
+               AVG(b.avg_passenger)::INTEGER AS avg_passenger
+        FROM read_parquet('{cache_path}') b
+        JOIN station_alias a ON a.alias = b.station_name
+        WHERE b.month IS NOT NULL AND b.type = '하차'
+        GROUP BY a.station_id, b.month, b.hour_int, b.day_type
+    """)
+    if not os.path.exists(profile_path):
+        build_profile(con).save(profile_path)
+    return source_hash
+
+def build_profile(con) -> BaselineProfile:
+    """baseline / baseline_monthly 테이블(하차)로 station_id x 시간 x 요일 유형 배열을 만듭니다."""
+    rows = con.execute("""
+        SELECT station_id, hour_int, day_type, avg_passenger, p90_passenger
+        FROM baseline WHERE type = '하차'
+    """).fetchall()
+    monthly_rows = con.execute(
+        "SELECT station_id, month, hour_int, day_type, avg_passenger FROM baseline_monthly").fetchall()
+    aliases = dict(con.execute("SELECT alias, station_id FROM station_alias").fetchall())
+    aliases.update(con.execute("SELECT station_name, station_id FROM dim_station").fetchall())
+    return BaselineProfile.from_rows(rows, aliases, monthly_rows)
+
+def attach_station_ids(con, table: str):
+    """table 의 처음 보는 역 표기를 등록하고 station_id 컬럼을 채웁니다. (적재 시점에 한 번만)"""
+    register_station_names(con, f"SELECT station_name FROM {table}")
+    con.execute(f"""
+        UPDATE {table} SET station_id = a.station_id
+        FROM station_alias a
+        WHERE a.alias = TRIM({table}.station_name)
+    """)
+
+def process_data_with_duckdb(date_from: str = None):
+    """
+    (전체 재계산 모드) 모든 데이터를 인메모리 DB에 올려 리포트를 새로 만듭니다.
+    date_from('YYYY-MM-DD')을 주면 저장소에서 그 날짜 이후 파티션만 읽습니다.
+    """
+    # 실시간 데이터: 파티션 저장소 + 델타 저장소 + 아직 합치지 않은 원본 JSON 파일
+    # (compact --keep 으로 합친 뒤 남겨 둔 원본은 저장소에 이미 있으므로 읽지 않음)
+    con = duckdb.connect(database=':memory:')
+    sources = []
+    if has_data():
+        log_event(logger, logging.INFO, "📂 스냅샷 저장소 읽는 중 (파티션 필터 적용)...", date_from=date_from)
+        sources.append(arrivals_scan_sql(date_from=date_from))
+    raw_files = pending_raw_files()
+    if raw_files:
+        log_event(logger, logging.INFO, "📂 원본 JSON 파일 스캔 (DuckDB JSON 리더, 빈 파일 필터링)...",
+                  files=len(raw_files))
+        sources.append(raw_json_scan_sql(raw_files))
+    delta_paths = [p for p in delta_partition_files()
+                   if not date_from or p.split("date=", 1)[1][:10] >= date_from]
+    if delta_paths:
+        log_event(logger, logging.INFO, "📂 델타 저장소 복원 중 (키프레임 + 변경분)...", files=len(delta_paths))
+        delta_sql = load_delta_arrivals(con, delta_paths)
+        if delta_sql:
+            sources.append(delta_sql)
+    if not sources:
+        raise ValueError("실시간 도착 데이터가 없습니다 (data/store, data/raw 모두 비어 있음)")
+    arrivals_sql = " UNION ALL ".join(sources)
+
+    log_event(logger, logging.INFO, "🦆 DuckDB 엔진 가동 (인메모리 초고속 조인)...")
+    with STAGE_DURATION.time(stage="baseline"):
+        ensure_baseline(con)
+    with STAGE_DURATION.time(stage="ingest"):
+        con.execute(f"CREATE TEMP TABLE all_arrivals AS SELECT *, NULL::INTEGER AS station_id FROM ({arrivals_sql})")
+        attach_station_ids(con, "all_arrivals")
+    ROWS_INGESTED.inc(con.execute("SELECT COUNT(*) FROM all_arrivals").fetchone()[0], source="full_rebuild")
+
+    # 2. 혼잡도 판정 + 좌표 조인을 한 쿼리로 계산해 리포트 Parquet 을 새로 씀
+    with STAGE_DURATION.time(stage="report"):
+        rebuild_report(con, report_sql("all_arrivals"))
+        return con.execute(f"""
+            SELECT {REPORT_COLUMNS_SQL}
+            FROM report_batch
+            ORDER BY "현재시간_예상하차인원(명)" DESC NULLS LAST
+        """).fetchdf()
+
+def init_database(con):
+    """영구 DB에 필요한 테이블을 준비합니다. (이미 있으면 그대로 사용)"""
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS arrivals (
+            station_name VARCHAR,
+            train_line VARCHAR,
+            arrival_message VARCHAR,
+            arrival_time_sec INTEGER,
+            collected_at TIMESTAMP,
+            station_id INTEGER,
+            stations_away INTEGER,
+            current_station VARCHAR,
+            arrival_state VARCHAR,
+            line_id VARCHAR,
+            direction VARCHAR,
+            train_no VARCHAR
+        )
+    """)
+    # 적재 이력(watermark): 원본 JSON은 파일 이름, 저장소는 파티션 파일별 적재 당시 크기를 기록
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            file_name VARCHAR PRIMARY KEY,
+            ingested_at TIMESTAMP DEFAULT current_timestamp
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS ingested_partitions (
+            path VARCHAR PRIMARY KEY,
+            size_bytes BIGINT
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS congestion_report (
+            collected_at TIMESTAMP,
+            station_id INTEGER,
+            station_name VARCHAR,
+            train_line VARCHAR,
+            arrival_message VARCHAR,
+            expected_alighting INTEGER,
+            risk_level VARCHAR
+        )
+    """)
+    init_station_tables(con)
+
+    # station_id 컬럼이 없던 예전 DB는 컬럼을 추가하고 한 번만 채움
+    for table in ("arrivals", "congestion_report"):
+        columns = [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+        if "station_id" not in columns:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN station_id INTEGER")
+            attach_station_ids(con, table)
+
+    # 도착 메시지 해석 필드가 없던 예전 arrivals 테이블은 컬럼만 추가 (예전 행은 NULL)
+    columns = [row[0] for row in con.execute("DESCRIBE arrivals").fetchall()]
+    for name, typ in PARSED_ARRIVAL_COLUMNS.items():
+        if name not in columns:
+            con.execute(f"ALTER TABLE arrivals ADD COLUMN {name} {typ}")
+
+def ingest_new_snapshots(con) -> int:
+    """
+    아직 적재하지 않은 스냅샷만 new_arrivals 임시 테이블에 모은 뒤 arrivals 에 추가합니다.
+    - 저장소: 마지막 적재 이후 크기가 바뀐(새로 이어 쓴) 파티션 파일만 읽음
+    - 원본 JSON: ingested_files 에 없는 파일만 읽음
+    - 델타 저장소: 크기가 바뀐 파티션에서 그 역의 마지막 적재 시각 이후 틱만 복원
+    - 같은 (역, 수집시각) 스냅샷이 이미 있으면 건너뛰므로 raw -> 저장소 합치기 후에도 중복되지 않음
+    """
+    con.execute("CREATE OR REPLACE TEMP TABLE new_arrivals AS SELECT * FROM arrivals LIMIT 0")
+
+    recorded = dict(con.execute("SELECT path, size_bytes FROM ingested_partitions").fetchall())
+    changed = {path: size for path, size in partition_files().items() if recorded.get(path) != size}
+    if changed:
+        con.execute(f"INSERT INTO new_arrivals BY NAME {arrivals_scan_sql(files=sorted(changed))}")
+        con.executemany("INSERT OR REPLACE INTO ingested_partitions VALUES (?, ?)",
+                        [[path, size] for path, size in changed.items()])
+
+    changed_deltas = {path: size for path, size in delta_partition_files().items() if recorded.get(path) != size}
+    if changed_deltas:
+        watermark = {name: last.isoformat() for name, last in con.execute(
+            "SELECT station_name, MAX(collected_at) FROM arrivals GROUP BY station_name").fetchall()}
+        delta_sql = load_delta_arrivals(con, list(changed_deltas), watermark)
+        if delta_sql:
+            con.execute(f"INSERT INTO new_arrivals BY NAME {delta_sql}")
+        con.executemany("INSERT OR REPLACE INTO ingested_partitions VALUES (?, ?)",
+                        [[path, size] for path, size in changed_deltas.items()])
+
+    loaded = {row[0] for row in con.execute("SELECT file_name FROM ingested_files").fetchall()}
+    new_files = [f for f in pending_raw_files() if os.path.basename(f) not in loaded]
+    if new_files:
+        con.execute(f"INSERT INTO new_arrivals BY NAME {raw_json_scan_sql(new_files)}")
+        con.executemany("INSERT INTO ingested_files (file_name) VALUES (?)",
+                        [[os.path.basename(f)] for f in new_files])
+
+    # 이미 적재된 스냅샷 제거 (새로 읽은 날짜 범위 안에서만 비교)
+    con.execute("""
+        DELETE FROM new_arrivals
+        WHERE EXISTS (
+            SELECT 1 FROM arrivals a
+            WHERE a.collected_at >= (SELECT MIN(collected_at) FROM new_arrivals)
+              AND a.collected_at = new_arrivals.collected_at
+              AND a.station_name = new_arrivals.station_name
+        )
+    """)
+    attach_station_ids(con, "new_arrivals")
+    con.execute("INSERT INTO arrivals BY NAME SELECT * FROM new_arrivals")
+
+    added = con.execute("SELECT COUNT(*) FROM new_arrivals").fetchone()[0]
+    total = con.execute("SELECT COUNT(*) FROM arrivals").fetchone()[0]
+    ROWS_INGESTED.inc(added, source="incremental")
+    log_event(logger, logging.INFO, "📥 새 스냅샷 적재", added=added, total=total)
+    return added
+
+def process_data_incremental(db_path: str = DB_PATH):
+    """
+    (영구 DB 모드) 새 스냅샷만 적재하고, 리포트 테이블과 리포트 Parquet 에도 새로 들어온 행만 추가합니다.
+    실행 시간이 전체 이력이 아니라 새 데이터 양에 비례합니다. 반환값은 이번 실행에서 추가된 리포트 행입니다.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    con = duckdb.connect(database=db_path)
+    init_database(con)
+
+    written = []
+    con.execute("BEGIN TRANSACTION")
+    try:
+        with STAGE_DURATION.time(stage="ingest"):
+            added = ingest_new_snapshots(con)
+        if added:
+            with STAGE_DURATION.time(stage="baseline"):
+                ensure_baseline(con)
+            with STAGE_DURATION.time(stage="report"):
+                written = write_report(con, report_sql("new_arrivals"))
+                con.execute("""
+                    INSERT INTO congestion_report BY NAME
+                    SELECT collected_at, station_id, station_name, train_line, arrival_message,
+                           expected_alighting, risk_level
+                    FROM report_batch
+                """)
+        log_event(logger, logging.INFO, "📝 리포트 갱신", added=added, files=len(written))
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        # DB 에 반영되지 않은 행이 Parquet 에만 남지 않도록 이번에 쓴 파일도 지움
+        discard_files(written)
+        raise
+
+    if written:
+        create_tableau_view(con)
+    # 새 행이 없으면 report_batch 가 만들어지지 않으므로 같은 컬럼의 빈 결과를 돌려줌
+    source, limit = ("report_batch", "") if added else ("congestion_report", "LIMIT 0")
+    result_df = con.execute(f"""
+        SELECT {REPORT_COLUMNS_SQL}
+        FROM {source}
+        ORDER BY "현재시간_예상하차인원(명)" DESC NULLS LAST
+        {limit}
+    """).fetchdf()
+    con.close()
+    return result_df
+
+def run_pipeline(full: bool = False, export_csv: bool = False) -> int:
+    """
+    리포트 파이프라인 실행 (기본은 영구 DB 증분 모드, full 이면 예전처럼 인메모리로 전체 재계산)
+    export_csv 면 태블로용 CSV 도 내보냅니다. 종료 코드를 반환합니다.
+    """
+    try:
+        if full:
+            result_df = process_data_with_duckdb()
+        else:
+            result_df = process_data_incremental()
+        print("\n✨ [결과 리포트: 실시간 열차 도착 및 하차 인원 예측 (이번 실행분)]")
         print("="*70)
         print(result_df.head(20).to_string(index=False))
         print("="*70)
-        
-        result_df.to_csv("data/realtime_congestion_report.csv", index=False, encoding="utf-8-sig")
-        print("💾 분석 결과가 data/realtime_congestion_report.csv 로 저장되었습니다.")
-            
+        print("💾 리포트가 data/report/date=*/ Parquet 파티션에 저장되었습니다.")
+
+        # 태블로가 CSV 를 읽어야 할 때만 전체 이력을 CSV 로 내보냄
+        if export_csv:
+            with STAGE_DURATION.time(stage="export"):
+                path = export_tableau_csv()
+            print(f"💾 태블로용 CSV 가 {path} 로 저장되었습니다.")
+        REGISTRY.write_files()
+        return 0
+
     except Exception as e:
-        print(f"\n❌ 오류 발생: {e}")
\ No newline at end of file
+        print(f"\n❌ 오류 발생: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(run_pipeline(full="--full" in sys.argv, export_csv="--csv" in sys.argv))
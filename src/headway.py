@@ -0,0 +1,183 @@
+"""
+열차 간격(헤드웨이) / 열차 위치 분석 (DuckDB 윈도 함수)
+- 수집 시점에 해석해 둔 필드(열차번호, 상하행, 남은 초, 도착 상태)로
+  역/호선/방향별로 열차가 역에 닿는 시각을 추정하고, 앞 열차와의 간격을 LAG 로 계산합니다.
+- 같은 역/호선/방향/시간대의 중앙값 간격보다 훨씬 짧으면 '몰림(bunched)', 훨씬 길면 '공백(gap)'.
+  열차가 몰린 뒤 생기는 긴 공백이 플랫폼 혼잡을 시간대 평균보다 잘 설명합니다.
+- 입력: 영구 DB(data/metro.duckdb)의 arrivals 테이블, 없으면 스냅샷 저장소
+- 실행: python headway.py [--date YYYY-MM-DD] -> data/headway_report.csv
+"""
+import os
+import sys
+
+import duckdb
+
+from snapshot_store import arrivals_scan_sql, has_data
+
+DB_PATH = os.environ.get("DUCKDB_PATH", "data/metro.duckdb")
+
+# 중앙값 대비 이 비율보다 짧으면 몰림, 길면 공백
+BUNCH_RATIO = 0.5
+GAP_RATIO = 1.5
+
+# 역 도착 시각을 추정할 수 있는 관측: 당역에 있거나(진입/도착/출발) 남은 초가 있는 경우
+_AT_STATION_STATES = "('approaching', 'arrived', 'departed')"
+
+# 열차 한 대가 역 하나를 지나간 기록(passes) -> 앞 열차와의 간격(headway_sec) -> 몰림/공백 판정
+# {arrivals} 자리에 도착 레코드 테이블/서브쿼리가 들어감
+HEADWAY_SQL = """
+    WITH observed AS (
+        SELECT
+            TRIM(station_name) AS station_name,
+            line_id,
+            direction,
+            train_no,
+            collected_at,
+            stations_away,
+            CASE
+                WHEN arrival_state IN {at_station} THEN collected_at
+                ELSE collected_at + to_seconds(arrival_time_sec)
+            END AS eta
+        FROM {arrivals}
+        WHERE train_no IS NOT NULL
+          AND direction IS NOT NULL
+          AND (arrival_state IN {at_station} OR arrival_time_sec > 0)
+    ),
+    passes AS (
+        -- 열차별로 역에 가장 가까이 있을 때(남은 정거장 최소, 가장 늦은 관측)의 추정 시각 하나만 사용
+        SELECT station_name, line_id, direction, train_no, eta
+        FROM observed
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY station_name, line_id, direction, train_no, CAST(collected_at AS DATE)
+            ORDER BY stations_away NULLS LAST, collected_at DESC
+        ) = 1
+    ),
+    headways AS (
+        SELECT
+            *,
+            LAG(train_no) OVER w AS prev_train_no,
+            epoch(eta) - LAG(epoch(eta)) OVER w AS headway_sec
+        FROM passes
+        WINDOW w AS (PARTITION BY station_name, line_id, direction, CAST(eta AS DATE) ORDER BY eta)
+    ),
+    typical AS (
+        SELECT
+            *,
+            hour(eta) AS hour_int,
+            MEDIAN(headway_sec) OVER (PARTITION BY station_name, line_id, direction, hour(eta)) AS typical_headway_sec
+        FROM headways
+        WHERE headway_sec > 0
+    )
+    SELECT
+        station_name,
+        line_id,
+        direction,
+        hour_int,
+        train_no,
+        prev_train_no,
+        eta,
+        headway_sec,
+        typical_headway_sec,
+        headway_sec / typical_headway_sec AS headway_ratio,
+        CASE
+            WHEN headway_sec < {bunch_ratio} * typical_headway_sec THEN 'bunched'
+            WHEN headway_sec > {gap_ratio} * typical_headway_sec THEN 'gap'
+            ELSE 'regular'
+        END AS spacing
+    FROM typical
+"""
+
+# 역/호선/방향/시간대별 요약 (간격 변동계수가 클수록 불규칙 운행)
+HEADWAY_SUMMARY_SQL = """
+    SELECT
+        station_name,
+        line_id,
+        direction,
+        hour_int,
+        COUNT(*) AS trains,
+        ROUND(AVG(headway_sec)) AS avg_headway_sec,
+        ROUND(MEDIAN(headway_sec)) AS median_headway_sec,
+        ROUND(MAX(headway_sec)) AS max_gap_sec,
+        ROUND(STDDEV_SAMP(headway_sec) / NULLIF(AVG(headway_sec), 0), 3) AS headway_cv,
+        COUNT(*) FILTER (WHERE spacing = 'bunched') AS bunched,
+        COUNT(*) FILTER (WHERE spacing = 'gap') AS gaps
+    FROM ({headways})
+    GROUP BY station_name, line_id, direction, hour_int
+    ORDER BY headway_cv DESC NULLS LAST, max_gap_sec DESC
+"""
+
+# 열차별 마지막으로 관측된 위치 (어느 역 기준으로 몇 정거장 전, 현재 역)
+TRAIN_POSITIONS_SQL = """
+    SELECT
+        line_id,
+        direction,
+        train_no,
+        train_line,
+        current_station,
+        TRIM(station_name) AS observed_from,
+        stations_away,
+        arrival_state,
+        arrival_time_sec,
+        collected_at
+    FROM {arrivals}
+    WHERE train_no IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY line_id, direction, train_no
+        ORDER BY collected_at DESC, stations_away NULLS LAST
+    ) = 1
+    ORDER BY line_id, direction, collected_at DESC
+"""
+
+
+def headway_sql(arrivals: str, bunch_ratio: float = BUNCH_RATIO, gap_ratio: float = GAP_RATIO) -> str:
+    return HEADWAY_SQL.format(arrivals=arrivals, at_station=_AT_STATION_STATES,
+                              bunch_ratio=bunch_ratio, gap_ratio=gap_ratio)
+
+
+def headway_summary_sql(arrivals: str, bunch_ratio: float = BUNCH_RATIO, gap_ratio: float = GAP_RATIO) -> str:
+    return HEADWAY_SUMMARY_SQL.format(headways=headway_sql(arrivals, bunch_ratio, gap_ratio))
+
+
+def train_positions_sql(arrivals: str) -> str:
+    return TRAIN_POSITIONS_SQL.format(arrivals=arrivals)
+
+
+def arrivals_source(con, date_from: str = None, date_to: str = None) -> str:
+    """
+    분석에 쓸 도착 레코드 FROM 대상. 영구 DB에 arrivals 가 있으면 그 테이블을, 없으면 저장소를 바로 읽습니다.
+    """
+    if os.path.exists(DB_PATH):
+        con.execute(f"ATTACH '{DB_PATH}' AS metro (READ_ONLY)")
+        conditions = []
+        if date_from:
+            conditions.append(f"collected_at >= DATE '{date_from}'")
+        if date_to:
+            conditions.append(f"collected_at < DATE '{date_to}' + INTERVAL 1 DAY")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"(SELECT * FROM metro.arrivals {where})"
+    if has_data():
+        return f"({arrivals_scan_sql(date_from=date_from, date_to=date_to)})"
+    raise ValueError("분석할 도착 데이터가 없습니다 (data/metro.duckdb, data/store 모두 없음)")
+
+
+def analyze_headways(date_from: str = None, date_to: str = None):
+    """(요약 DataFrame, 열차 위치 DataFrame) 반환"""
+    con = duckdb.connect(database=':memory:')
+    arrivals = arrivals_source(con, date_from, date_to)
+    summary = con.execute(headway_summary_sql(arrivals)).fetchdf()
+    positions = con.execute(train_positions_sql(arrivals)).fetchdf()
+    con.close()
+    return summary, positions
+
+
+if __name__ == "__main__":
+    # 사용법: python headway.py [--date YYYY-MM-DD]
+    date = sys.argv[sys.argv.index("--date") + 1] if "--date" in sys.argv else None
+    summary_df, positions_df = analyze_headways(date, date)
+    print("\n🚆 [열차 간격 분석: 변동이 큰 역/호선/방향/시간대]")
+    print("=" * 70)
+    print(summary_df.head(20).to_string(index=False))
+    print("=" * 70)
+    print(f"📍 위치가 파악된 열차: {len(positions_df)}대")
+    summary_df.to_csv("data/headway_report.csv", index=False, encoding="utf-8-sig")
+    print("💾 분석 결과가 data/headway_report.csv 로 저장되었습니다.")
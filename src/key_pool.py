@@ -0,0 +1,108 @@
+"""
+API 키 풀 (키별 호출 한도 관리 + 순환 사용)
+- 키 목록: SEOUL_API_KEYS (쉼표로 구분), 없으면 SEOUL_API_KEY 하나
+- 키마다 QuotaTracker 를 따로 두고 (data/state/quota_<키 해시>.json), 남은 호출이 가장 많은 키부터 사용
+- 일일 트래픽 초과 응답(ERROR-337)을 받은 키는 자정까지 쓰지 않습니다.
+- 스케줄러에는 QuotaTracker 대신 그대로 넘길 수 있습니다. (remaining = 모든 키의 남은 호출 합)
+- 수집기를 여러 개 띄우면(COLLECTOR_SHARD_COUNT) 키도 수집기별로 나눠 가집니다.
+  키가 모자라 함께 쓰는 경우에도 사용량은 상태 파일에 합산됩니다. (QuotaTracker 의 잠금 + 합산 저장)
+"""
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime
+
+from metrics import get_logger, log_event
+from scheduler import QuotaTracker
+from sharding import shard_from_env
+
+logger = get_logger("key_pool")
+
+# 일일 호출 한도를 넘었을 때 돌아오는 응답 코드
+QUOTA_ERROR_CODES = {"ERROR-337"}
+
+
+def key_label(key: str) -> str:
+    """로그/메트릭/파일 이름에 쓰는 키 식별자 (키 원문은 남기지 않음)"""
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+
+
+class ApiKeyPool:
+    def __init__(self, keys: list, daily_limit: int = None, state_dir: str = "data/state", reserve: int = 20):
+        keys = [k.strip() for k in keys if k and k.strip()]
+        if not keys:
+            raise ValueError("SEOUL_API_KEY(S)가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+        self.keys = list(dict.fromkeys(keys))
+        self._lock = threading.Lock()
+        if len(self.keys) == 1:
+            # 키가 하나면 예전과 같은 상태 파일을 그대로 사용
+            paths = {self.keys[0]: os.path.join(state_dir, "quota.json")}
+        else:
+            paths = {k: os.path.join(state_dir, f"quota_{key_label(k)}.json") for k in self.keys}
+        self.trackers = {
+            k: QuotaTracker(daily_limit, state_path=paths[k], reserve=reserve,
+                            label=key_label(k) if len(self.keys) > 1 else None)
+            for k in self.keys
+        }
+
+    @classmethod
+    def from_env(cls, shard_index: int = None, shard_count: int = None, **kwargs):
+        """
+        환경변수에서 키 목록을 읽습니다.
+        수집기가 여러 개(shard_count > 1)이고 키가 그 이상이면 키를 shard_index 기준으로 나눠 가집니다.
+        """
+        keys = [k for k in os.getenv("SEOUL_API_KEYS", "").split(",") if k.strip()]
+        if not keys and os.getenv("SEOUL_API_KEY"):
+            keys = [os.getenv("SEOUL_API_KEY")]
+        if shard_count is None:
+            shard_index, shard_count = shard_from_env()
+        if shard_count > 1 and len(keys) >= shard_count:
+            keys = keys[shard_index::shard_count]
+        elif shard_count > 1:
+            # 같은 키의 사용량은 상태 파일에서 수집기끼리 합산됨 (QuotaTracker._save)
+            log_event(logger, logging.INFO, "🔑 API 키가 수집기 수보다 적어 키를 함께 씁니다.",
+                      keys=len(keys), shards=shard_count)
+        return cls(keys, **kwargs)
+
+    # ---------- 키 선택 ----------
+    def acquire(self, now: datetime = None) -> str:
+        """
+        남은 호출이 가장 많은 키를 골라 호출 1회를 기록하고 반환합니다. (모두 소진이면 None)
+        여러 스레드가 동시에 불러도 같은 키의 한도를 넘겨 배정하지 않습니다.
+        """
+        with self._lock:
+            key = max(self.keys, key=lambda k: self.trackers[k].remaining(now))
+            if self.trackers[key].remaining(now) <= 0:
+                return None
+            self.trackers[key].spend(1, now)
+            return key
+
+    def mark_exhausted(self, key: str, now: datetime = None):
+        """서버가 한도 초과로 응답한 키는 오늘 남은 호출을 0으로 맞춤"""
+        with self._lock:
+            tracker = self.trackers[key]
+            tracker.spend(max(tracker.remaining(now), 0), now)
+
+    # ---------- QuotaTracker 호환 (AdaptiveScheduler 용) ----------
+    @property
+    def daily_limit(self) -> int:
+        return sum(t.daily_limit for t in self.trackers.values())
+
+    def remaining(self, now: datetime = None) -> int:
+        return sum(t.remaining(now) for t in self.trackers.values())
+
+    def spend(self, calls: int = 1, now: datetime = None):
+        # 실제 사용량은 acquire() 에서 키별로 이미 기록했으므로 여기서는 기록하지 않음
+        pass
+
+    def flush(self):
+        """키별로 아직 저장하지 않은 사용량을 상태 파일에 기록 (수집기 종료 시)"""
+        with self._lock:
+            for tracker in self.trackers.values():
+                tracker.flush()
+
+    def status(self, now: datetime = None) -> dict:
+        """{키 식별자: 남은 호출 수}"""
+        return {key_label(k): t.remaining(now) for k, t in self.trackers.items()}
+
@@ -0,0 +1,218 @@
+"""
+파이프라인 계측(Metrics) + 레벨별 구조화 로그
+- 메트릭: API 지연 히스토그램, 응답 코드별 카운트, 쿼터 사용량, 적재 행 수, 단계별 소요 시간, 저장 파일 크기
+- 내보내기: Prometheus 텍스트 형식(to_prometheus) / JSON(to_json)
+    - 파일: data/metrics.prom (node_exporter textfile collector 용), data/metrics.json
+    - HTTP: query_service 의 /metrics, /metrics.json
+- 로그: LOG_LEVEL(기본 INFO), LOG_FORMAT=json 이면 한 줄 JSON. 꺼진 레벨은 메시지를 만들지도 않습니다.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# 지연 시간 히스토그램 기본 구간(초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape_label(value) -> str:
+    """Prometheus 텍스트 형식의 라벨 값 이스케이프 (역슬래시, 큰따옴표, 줄바꿈)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0
+                for upper, count in zip(self.buckets, state["counts"]):
+                    cumulative += count
+                    out.append((f"{self.name}_bucket", key, {"le": upper}, cumulative))
+                out.append((f"{self.name}_bucket", key, {"le": "+Inf"}, state["count"]))
+                out.append((f"{self.name}_sum", key, None, state["sum"]))
+                out.append((f"{self.name}_count", key, None, state["count"]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key, extra)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        out = {}
+        for metric in list(self._metrics.values()):
+            out[metric.name] = [
+                {"labels": {**dict(key), **(extra or {})}, "value": value, "sample": name}
+                for name, key, extra, value in metric.samples()
+            ]
+        return out
+
+    def write_files(self, data_dir: str = None):
+        """data/metrics.prom, data/metrics.json 으로 내보내기 (임시 파일에 쓰고 교체)"""
+        data_dir = data_dir or os.environ.get("DATA_DIR", "./data")
+        os.makedirs(data_dir, exist_ok=True)
+        for filename, content in (("metrics.prom", self.to_prometheus()),
+                                  ("metrics.json", json.dumps(self.to_json(), ensure_ascii=False))):
+            path = os.path.join(data_dir, filename)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+
+# 프로세스 전체에서 공유하는 기본 레지스트리와 공통 메트릭
+REGISTRY = Registry()
+API_LATENCY = REGISTRY.histogram("metro_api_latency_seconds", "API 응답 시간(초)")
+API_RESPONSES = REGISTRY.counter("metro_api_responses_total", "API 응답 코드별 건수 (INFO-000 / 오류 코드 / network_error)")
+API_CALLS = REGISTRY.counter("metro_api_calls_total", "API 호출 수 (쿼터 소비량)")
+QUOTA_REMAINING = REGISTRY.gauge("metro_quota_remaining", "오늘 남은 API 호출 수")
+QUOTA_SPENT = REGISTRY.gauge("metro_quota_spent", "오늘 사용한 API 호출 수")
+ROWS_INGESTED = REGISTRY.counter("metro_rows_ingested_total", "적재한 행 수")
+STAGE_DURATION = REGISTRY.histogram("metro_stage_duration_seconds", "파이프라인 단계별 소요 시간(초)",
+                                    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300))
+BYTES_WRITTEN = REGISTRY.counter("metro_bytes_written_total", "저장한 파일 크기(바이트)")
+JOIN_COVERAGE = REGISTRY.gauge("metro_join_coverage_ratio", "실시간 행 중 베이스라인과 매칭된 비율 (diagnostics)")
+
+
+# ---------- 로그 ----------
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {"ts": self.formatTime(record), "level": record.levelname,
+                   "logger": record.name, "msg": record.getMessage()}
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, ensure_ascii=False)
+
+
+_configured = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """LOG_LEVEL / LOG_FORMAT 환경변수로 설정된 로거 (처음 한 번만 핸들러 설정)"""
+    global _configured
+    if not _configured:
+        handler = logging.StreamHandler(sys.stdout)
+        if os.environ.get("LOG_FORMAT") == "json":
+            handler.setFormatter(_JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        root = logging.getLogger("metro")
+        root.addHandler(handler)
+        root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+        root.propagate = False
+        _configured = True
+    return logging.getLogger(f"metro.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, message: str, /, **fields):
+    """
+    구조화 로그 한 줄. 해당 레벨이 꺼져 있으면 바로 반환하므로 메시지/필드 포맷 비용이 없습니다.
+    (fields 는 LOG_FORMAT=json 일 때 JSON 키로, 아니면 key=value 로 붙음.
+     앞의 세 인자는 위치 전용이라 message= / level= 같은 이름도 필드로 쓸 수 있음)
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if os.environ.get("LOG_FORMAT") != "json" and fields:
+        message = f"{message} " + " ".join(f"{k}={v}" for k, v in fields.items())
+    logger.log(level, message, extra={"fields": fields})
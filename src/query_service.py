@@ -0,0 +1,133 @@
+"""
+실시간 혼잡도 조회 서비스 (HTTP/JSON)
+- 역할: 스트림 소비자가 갱신하는 역별 혼잡 상태를 메모리에 들고, 역별/Top-N 조회에 바로 응답
+- 읽기 일관성: 갱신할 때마다 새 스냅샷 객체를 만들어 참조만 바꾸므로, 요청 하나는 항상 한 시점의 상태만 봅니다.
+- 엔드포인트
+    GET /health
+    GET /stations/<역명>     : 역 하나의 (호선, 상하행)별 요약과 열차별 상태
+    GET /top?n=10            : 혼잡 위험 열차 수, 예상 하차 인원 순 상위 N개 역
+    GET /snapshot            : 전체 상태
+    GET /metrics             : Prometheus 텍스트 형식 메트릭 (/metrics.json 은 JSON)
+- 실행: python query_service.py (포트는 QUERY_PORT, 기본 8080)
+"""
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from metrics import REGISTRY
+from stations import normalize_station_name
+
+
+class CongestionView:
+    """조회용 읽기 전용 스냅샷 보관소"""
+
+    def __init__(self):
+        self._snapshot = {"updated_at": None, "stations": {}, "ranking": []}
+
+    def refresh(self, state):
+        """CongestionState 로부터 새 스냅샷을 만들어 통째로 교체합니다."""
+        stations = {}
+        for name, st in state.snapshot().items():
+            stations[normalize_station_name(name)] = {
+                "station_name": name,
+                "collected_at": st["collected_at"],
+                "expected_alighting": st.get("expected_alighting", 0),
+                "risk_count": st.get("risk_count", 0),
+                "imminent_ewma": round(st["imminent_ewma"], 3),
+                "directions": st["directions"],
+                "trains": st["trains"],
+            }
+        # Top-N 조회가 매번 정렬하지 않도록 순위를 미리 계산
+        ranking = sorted(stations, key=lambda k: (stations[k]["risk_count"], stations[k]["expected_alighting"]),
+                         reverse=True)
+        # 참조 교체는 원자적이므로 읽는 쪽은 락 없이 이전/새 스냅샷 중 하나를 온전히 봄
+        self._snapshot = {"updated_at": state.updated_at, "stations": stations, "ranking": ranking}
+
+    def get(self) -> dict:
+        return self._snapshot
+
+
+def make_handler(view: CongestionView):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send_json(self, payload, status: int = 200):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            snap = view.get()
+
+            if url.path == "/health":
+                return self._send_json({"status": "ok", "updated_at": snap["updated_at"],
+                                        "stations": len(snap["stations"])})
+
+            if url.path.startswith("/stations/"):
+                name = normalize_station_name(unquote(url.path[len("/stations/"):]))
+                station = snap["stations"].get(name)
+                if station is None:
+                    return self._send_json({"error": f"역을 찾을 수 없습니다: {name}"}, 404)
+                return self._send_json({"updated_at": snap["updated_at"], **station})
+
+            if url.path == "/top":
+                try:
+                    n = int(parse_qs(url.query).get("n", ["10"])[0])
+                except ValueError:
+                    return self._send_json({"error": "n 은 정수여야 합니다."}, 400)
+                top = [snap["stations"][k] for k in snap["ranking"][:max(n, 0)]]
+                return self._send_json({"updated_at": snap["updated_at"], "stations": top})
+
+            if url.path == "/snapshot":
+                return self._send_json(snap)
+
+            # 이 프로세스의 메트릭 (Prometheus 스크레이프 / JSON)
+            if url.path == "/metrics":
+                body = REGISTRY.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if url.path == "/metrics.json":
+                return self._send_json(REGISTRY.to_json())
+
+            return self._send_json({"error": "지원하지 않는 경로입니다."}, 404)
+
+        def log_message(self, format, *args):
+            # 요청마다 콘솔에 찍지 않음 (응답 지연 방지)
+            pass
+
+    return QueryHandler
+
+
+def serve(port: int = None, broker=None):
+    """스트림 소비자를 백그라운드 스레드로 돌리면서 조회 서비스를 띄웁니다."""
+    from stream import run_consumer
+
+    port = port or int(os.environ.get("QUERY_PORT", "8080"))
+    view = CongestionView()
+    consumer = threading.Thread(
+        target=run_consumer,
+        kwargs={"group": "query-service", "broker": broker, "on_update": view.refresh},
+        daemon=True,
+    )
+    consumer.start()
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), make_handler(view))
+    print(f"🌐 혼잡도 조회 서비스 시작: http://localhost:{port} (/health, /stations/<역명>, /top?n=10)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 조회 서비스를 종료합니다.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,193 @@
+"""
+혼잡도 리포트 저장 단계 (좌표 포함, 날짜 파티션 Parquet)
+- 역할: 혼잡도 판정 + 역 좌표(dim_station) 조인을 DuckDB 쿼리 하나로 계산해서 바로 Parquet 에 씀
+- 구조: data/report/date=YYYY-MM-DD/part-<실행시각>.parquet
+- 증분 모드에서는 이번 실행에 새로 적재된 행만 새 파일로 추가하므로, 이력이 쌓여도 갱신 비용이 일정합니다.
+- 태블로용 CSV(한글 헤더, UTF-8 BOM)는 필요할 때만 Parquet 에서 내보냅니다. (--csv)
+- 실행: python report_stage.py csv [출력경로] | compact
+"""
+import glob
+import logging
+import os
+import shutil
+import sys
+from datetime import date, datetime
+
+from metrics import BYTES_WRITTEN, get_logger, log_event
+
+logger = get_logger("report_stage")
+
+REPORT_DIR = os.path.join("data", "report")
+TABLEAU_CSV_PATH = os.path.join("data", "realtime_report_for_tableau.csv")
+
+# 혼잡도 리포트({report}) + 역 좌표를 한 번에 (station_id 정수 조인)
+REPORT_WITH_COORDS_SQL = """
+    SELECT
+        r.collected_at,
+        r.station_id,
+        r.station_name,
+        r.train_line,
+        r.arrival_message,
+        r.expected_alighting,
+        r.risk_level,
+        s.latitude,
+        s.longitude,
+        CAST(CAST(r.collected_at AS TIMESTAMP) AS DATE) AS report_date
+    FROM ({report}) r
+    LEFT JOIN dim_station s ON s.station_id = r.station_id
+"""
+
+# 태블로용 한글 헤더 (예전 realtime_report_for_tableau.csv 와 같은 이름 + 수집시각)
+TABLEAU_COLUMNS_SQL = """
+    station_name AS "역명",
+    train_line AS "행선지",
+    arrival_message AS "실시간_상태",
+    expected_alighting AS "현재시간_예상하차인원(명)",
+    risk_level AS "플랫폼_위험도",
+    latitude AS "위도(Latitude)",
+    longitude AS "경도(Longitude)",
+    collected_at AS "수집시각"
+"""
+
+
+def has_report(report_dir: str = REPORT_DIR) -> bool:
+    return bool(glob.glob(os.path.join(report_dir, "date=*", "*.parquet")))
+
+
+def report_scan_sql(report_dir: str = REPORT_DIR, date_from: str = None) -> str:
+    """리포트 Parquet 전체를 읽는 SELECT 문 (date 는 폴더 이름에서 오는 파티션 컬럼)"""
+    files_glob = os.path.join(report_dir, "date=*", "*.parquet")
+    where = f"WHERE date >= '{date_from}'" if date_from else ""
+    return f"SELECT * FROM read_parquet('{files_glob}', hive_partitioning = true) {where}"
+
+
+def write_report(con, report_select: str, report_dir: str = REPORT_DIR) -> list:
+    """
+    report_select(혼잡도 리포트 SELECT 문) 결과에 좌표를 붙여 날짜 파티션마다 새 part 파일로 씁니다.
+    이미 쓴 파일은 건드리지 않습니다. 새로 만든 파일 경로 목록을 반환합니다.
+    """
+    con.execute(f"CREATE OR REPLACE TEMP TABLE report_batch AS {REPORT_WITH_COORDS_SQL.format(report=report_select)}")
+    dates = [row[0] for row in con.execute("SELECT DISTINCT report_date FROM report_batch WHERE report_date IS NOT NULL").fetchall()]
+
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    written = []
+    try:
+        for day in sorted(dates):
+            path = os.path.join(report_dir, f"date={day.isoformat()}", f"part-{run_id}.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 다 쓴 뒤에만 제자리로 옮겨서, 읽는 쪽이 쓰다 만 파일을 보지 않게 함
+            con.execute(f"""
+                COPY (SELECT * EXCLUDE (report_date) FROM report_batch WHERE report_date = DATE '{day.isoformat()}')
+                TO '{path}.tmp' (FORMAT PARQUET, COMPRESSION ZSTD)
+            """)
+            os.replace(path + ".tmp", path)
+            written.append(path)
+            BYTES_WRITTEN.inc(os.path.getsize(path), kind="report_parquet")
+    except Exception:
+        discard_files(written)
+        raise
+
+    log_event(logger, logging.INFO, "🗂️ 리포트 Parquet 추가", files=len(written),
+              rows=con.execute("SELECT COUNT(*) FROM report_batch").fetchone()[0])
+    return written
+
+
+def rebuild_report(con, report_select: str, report_dir: str = REPORT_DIR) -> list:
+    """(전체 재계산 모드) 임시 폴더에 새로 쓴 뒤 기존 리포트 폴더와 바꿉니다."""
+    tmp_dir = report_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    written = write_report(con, report_select, tmp_dir)
+    shutil.rmtree(report_dir, ignore_errors=True)
+    if os.path.isdir(tmp_dir):
+        os.replace(tmp_dir, report_dir)
+    return [p.replace(tmp_dir, report_dir, 1) for p in written]
+
+
+def discard_files(paths: list):
+    """실패한 실행이 남긴 part 파일을 지움 (DB 트랜잭션을 되돌릴 때 같이 호출)"""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def export_tableau_csv(con=None, output_path: str = TABLEAU_CSV_PATH, report_dir: str = REPORT_DIR) -> str:
+    """
+    리포트 Parquet 을 태블로용 CSV(한글 헤더, UTF-8 BOM)로 내보냅니다.
+    전체 이력을 다시 쓰는 작업이므로 대시보드가 CSV 를 요구할 때만 실행합니다.
+    """
+    import duckdb
+
+    if not has_report(report_dir):
+        raise FileNotFoundError(f"리포트 Parquet 이 없습니다: {report_dir}")
+    own = con is None
+    con = con or duckdb.connect(database=":memory:")
+    try:
+        df = con.execute(f"""
+            SELECT {TABLEAU_COLUMNS_SQL}
+            FROM ({report_scan_sql(report_dir)})
+            ORDER BY collected_at, station_name
+        """).fetchdf()
+    finally:
+        if own:
+            con.close()
+    df.to_csv(output_path + ".tmp", index=False, encoding="utf-8-sig")
+    os.replace(output_path + ".tmp", output_path)
+    BYTES_WRITTEN.inc(os.path.getsize(output_path), kind="report_csv")
+    log_event(logger, logging.INFO, "💾 태블로용 CSV 저장", path=output_path, rows=len(df))
+    return output_path
+
+
+def create_tableau_view(con, report_dir: str = REPORT_DIR):
+    """DB 안에서 한글 헤더로 바로 조회할 수 있는 tableau_report 뷰 (Parquet 을 그대로 읽음)"""
+    con.execute(f"""
+        CREATE OR REPLACE VIEW tableau_report AS
+        SELECT {TABLEAU_COLUMNS_SQL}
+        FROM ({report_scan_sql(os.path.abspath(report_dir))})
+    """)
+
+
+def compact_report(report_dir: str = REPORT_DIR, before: str = None) -> int:
+    """
+    지난 날짜(before 이전, 기본 오늘 이전) 파티션의 part 파일들을 하나로 합칩니다.
+    증분 실행마다 파일이 하나씩 늘어나므로, 하루가 끝난 파티션을 정리해 읽기 비용을 줄입니다.
+    """
+    import duckdb
+
+    before = before or date.today().isoformat()
+    compacted = 0
+    con = duckdb.connect(database=":memory:")
+    try:
+        for part_dir in sorted(glob.glob(os.path.join(report_dir, "date=*"))):
+            day = os.path.basename(part_dir).split("=", 1)[1]
+            parts = sorted(glob.glob(os.path.join(part_dir, "part-*.parquet")))
+            if day >= before or len(parts) <= 1:
+                continue
+            merged = os.path.join(part_dir, "part-compacted.parquet")
+            files_sql = "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in parts) + "]"
+            con.execute(f"""
+                COPY (SELECT * FROM read_parquet({files_sql}) ORDER BY collected_at)
+                TO '{merged}.tmp' (FORMAT PARQUET, COMPRESSION ZSTD)
+            """)
+            # 병합본을 먼저 제자리에 둔 뒤 원래 part 를 지움 (중간에 멈춰도 그날 데이터가 사라지지 않고,
+            # 읽는 쪽이 빈 파티션을 보지 않음)
+            os.replace(merged + ".tmp", merged)
+            for p in parts:
+                if p != merged:
+                    os.remove(p)
+            compacted += len(parts)
+    finally:
+        con.close()
+    log_event(logger, logging.INFO, "🧹 리포트 파티션 정리", merged_parts=compacted)
+    return compacted
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "csv"
+    if command == "compact":
+        compact_report()
+    elif command == "csv":
+        path = export_tableau_csv(output_path=sys.argv[2] if len(sys.argv) > 2 else TABLEAU_CSV_PATH)
+        print(f"✅ 태블로용 파일이 저장되었습니다: {path}")
+    else:
+        print("사용법: python report_stage.py csv [출력경로] | compact")
+        sys.exit(1)
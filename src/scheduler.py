@@ -0,0 +1,231 @@
+"""
+API 호출 한도(Quota) 기반 적응형 수집 스케줄러
+- 역할: 하루 API 호출 한도를 '예산'으로 보고, 붐비는 역/출퇴근 시간은 자주, 한산한 역/심야는 드물게 조회
+- 기준 데이터: CardSubwayTime 시간대별 하차 인원 (data/station_passenger.csv)
+- 사용량(spent)은 data/state/quota.json 에 저장되어 재시작해도 유지됩니다. (여러 수집기가 같은 파일을 써도 합산)
+"""
+import csv
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import fcntl  # 여러 수집기가 같은 쿼터 파일을 쓸 때의 잠금 (Windows 에는 없음)
+except ImportError:
+    fcntl = None
+
+from metrics import QUOTA_REMAINING, QUOTA_SPENT, get_logger, log_event
+from stations import normalize_station_name
+from time_slots import TIME_SLOT_HOURS, TIME_SLOTS
+
+logger = get_logger("scheduler")
+
+
+def load_hourly_baseline(csv_path: str = 'data/station_passenger.csv', type_filter: str = '하차') -> dict:
+    """
+    역별 시간대 평균 하차 인원을 {역명: [0~23시 평균]} 형태로 읽어옵니다.
+    스케줄러는 자주 재시작되므로 pandas 없이 표준 csv 모듈로 가볍게 읽습니다.
+    """
+    if not os.path.exists(csv_path):
+        log_event(logger, logging.WARNING, "⚠️ 기준 CSV가 없어 시간대별 베이스라인 없이 진행합니다", path=csv_path)
+        return {}
+
+    for encoding in ('utf-8', 'cp949'):
+        try:
+            with open(csv_path, 'r', encoding=encoding, newline='') as f:
+                rows = list(csv.reader(f))
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        log_event(logger, logging.WARNING, "⚠️ CSV 인코딩을 판별할 수 없습니다", path=csv_path)
+        return {}
+
+    # 헤더 이름은 파일마다 깨질 수 있으므로 duckdb_processor와 같은 고정 순서를 사용
+    # [연번, 날짜, 호선, 역번호, 역명, 구분, 06시 이전 ... 24시 이후]
+    slot_hours = [TIME_SLOT_HOURS[slot] for slot in TIME_SLOTS]
+    sums, counts = {}, {}
+    for row in rows[1:]:
+        if len(row) < 6 + len(slot_hours) or row[5].strip() != type_filter:
+            continue
+        # 역 기준 테이블(stations)과 같은 규칙: '서울역' -> '서울', '신촌(경의중앙선)' -> '신촌'
+        station = normalize_station_name(row[4])
+        hourly = sums.setdefault(station, [0.0] * 24)
+        counts[station] = counts.get(station, 0) + 1
+        for hour, value in zip(slot_hours, row[6:6 + len(slot_hours)]):
+            try:
+                hourly[hour] += float(value.replace(',', '') or 0)
+            except ValueError:
+                pass
+
+    return {st: [v / counts[st] for v in hourly] for st, hourly in sums.items()}
+
+
+class QuotaTracker:
+    """
+    하루 API 호출 한도와 사용량을 관리하고 파일로 저장합니다.
+    - 호출마다 파일을 다시 쓰지 않고 SAVE_EVERY 회 또는 SAVE_INTERVAL_SEC 초마다 (한도를 다 쓰면 바로) 저장합니다.
+    - 저장할 때는 잠금 파일(<상태 파일>.lock)을 잡고, 파일의 사용량에 이 프로세스가 아직 저장하지 않은 호출 수를
+      더해서 씁니다. 같은 키를 쓰는 수집기가 여럿이어도 서로의 사용량을 덮어쓰지 않습니다.
+    """
+
+    SAVE_EVERY = 10
+    SAVE_INTERVAL_SEC = 30
+
+    def __init__(self, daily_limit: int = None, state_path: str = 'data/state/quota.json', reserve: int = 20,
+                 label: str = None):
+        self.daily_limit = daily_limit or int(os.getenv("API_DAILY_LIMIT", "1000"))
+        # 수동 테스트나 재시작 시 쓸 여유분은 예산에서 제외
+        self.reserve = reserve
+        self.state_path = Path(state_path)
+        self.date = datetime.now().strftime("%Y-%m-%d")
+        self.spent = 0
+        self._unsaved = 0          # 이 프로세스가 쓰고 아직 파일에 더하지 않은 호출 수
+        self._saved_at = None      # 마지막 저장 시각 (time.monotonic)
+        # 키가 여러 개일 때 메트릭을 키별로 구분 (key_pool.ApiKeyPool)
+        self._labels = {"key": label} if label else {}
+        self._load()
+
+    def _read_state(self) -> dict:
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            log_event(logger, logging.WARNING, "⚠️ 쿼터 상태 파일을 읽지 못해 0부터 시작합니다",
+                      path=str(self.state_path))
+            return {}
+
+    def _load(self):
+        state = self._read_state()
+        if state.get("date") == self.date:
+            self.spent = int(state.get("spent", 0))
+
+    def _publish_metrics(self):
+        QUOTA_SPENT.set(self.spent, **self._labels)
+        QUOTA_REMAINING.set(max(self.daily_limit - self.reserve - self.spent, 0), **self._labels)
+
+    def _save(self):
+        """잠금을 잡고 파일의 사용량 + 저장하지 않은 호출 수를 기록 (다른 프로세스의 사용량도 반영됨)"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path.with_name(self.state_path.name + ".lock"), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._read_state()
+            disk_date = state.get("date") or ""
+            if disk_date > self.date:
+                # 다른 프로세스가 먼저 날짜를 넘김: 어제 쓴 호출은 오늘 사용량에 더하지 않음
+                self.date, self._unsaved = disk_date, 0
+            base = int(state.get("spent", 0)) if disk_date == self.date else 0
+            self.spent = base + self._unsaved
+            tmp_path = self.state_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"date": self.date, "spent": self.spent, "daily_limit": self.daily_limit}, f)
+            os.replace(tmp_path, self.state_path)
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._publish_metrics()
+
+    def flush(self):
+        """저장하지 않은 사용량이 있으면 바로 저장 (종료 직전 등)"""
+        if self._unsaved:
+            self._save()
+
+    def _roll_over(self, now: datetime = None):
+        today = (now or datetime.now()).strftime("%Y-%m-%d")
+        if today != self.date:
+            self.date, self.spent, self._unsaved = today, 0, 0
+            self._save()
+
+    def remaining(self, now: datetime = None) -> int:
+        self._roll_over(now)
+        return max(self.daily_limit - self.reserve - self.spent, 0)
+
+    def spend(self, calls: int = 1, now: datetime = None):
+        self._roll_over(now)
+        self.spent += calls
+        self._unsaved += calls
+        due = self._saved_at is None or time.monotonic() - self._saved_at >= self.SAVE_INTERVAL_SEC
+        if due or self._unsaved >= self.SAVE_EVERY or self.remaining(now) <= 0:
+            self._save()
+        else:
+            self._publish_metrics()
+
+
+class AdaptiveScheduler:
+    """
+    남은 호출 예산을 '남은 시간 x 역별 혼잡도' 비중으로 나눠 역마다 다음 조회 시각을 정합니다.
+    - 비중이 큰 (역, 시간대)일수록 조회 간격이 짧아집니다.
+    - 한산한 역도 완전히 빠지지 않도록 최소 비중(min_weight_ratio)을 둡니다.
+    """
+
+    MIN_INTERVAL = 60        # 아무리 붐벼도 1분보다 자주 조회하지 않음
+    MAX_INTERVAL = 3600      # 아무리 한산해도 1시간에 한 번은 조회
+
+    def __init__(self, stations: list, quota: QuotaTracker, baseline: dict = None, min_weight_ratio: float = 0.05):
+        self.stations = list(stations)
+        self.quota = quota
+        self.baseline = baseline or {}
+        self.min_weight_ratio = min_weight_ratio
+        self.next_due = {station: datetime.min for station in self.stations}
+        # 전체 역 중 가장 붐비는 (역, 시간대)를 1.0으로 놓고 비중을 정규화
+        self.peak = max((max(h) for st, h in self.baseline.items() if st in self.next_due and h), default=0) or 1.0
+
+    def weight(self, station: str, hour: int) -> float:
+        hourly = self.baseline.get(station)
+        if not hourly:
+            # 기준 데이터가 없는 역은 중간 정도의 비중으로 조회
+            return 0.5
+        return max(hourly[hour] / self.peak, self.min_weight_ratio)
+
+    def _remaining_weight(self, now: datetime) -> float:
+        """오늘 남은 시간 동안의 전체 비중 합 (현재 시간은 남은 분량만큼만 반영)"""
+        hour_left = 1 - (now.minute * 60 + now.second) / 3600
+        total_weight = 0.0
+        for st in self.stations:
+            total_weight += self.weight(st, now.hour) * hour_left
+            total_weight += sum(self.weight(st, h) for h in range(now.hour + 1, 24))
+        return total_weight
+
+    def interval(self, station: str, now: datetime, total_weight: float = None) -> float:
+        """현재 남은 예산 기준으로 이 역의 다음 조회까지 간격(초)을 계산합니다."""
+        remaining = self.quota.remaining(now)
+        if remaining <= 0:
+            # 예산 소진: 자정(쿼터 초기화)까지 대기
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            return (midnight - now).total_seconds()
+
+        total_weight = total_weight or self._remaining_weight(now)
+        calls_per_hour = remaining * self.weight(station, now.hour) / total_weight
+        seconds = 3600 / calls_per_hour if calls_per_hour > 0 else self.MAX_INTERVAL
+        return min(max(seconds, self.MIN_INTERVAL), self.MAX_INTERVAL)
+
+    def due_stations(self, now: datetime = None) -> list:
+        """지금 조회해야 하는 역 목록 (남은 예산을 넘지 않도록 잘라서 반환)"""
+        now = now or datetime.now()
+        due = [st for st in self.stations if self.next_due[st] <= now]
+        # 비중이 큰 역부터 예산을 배정
+        due.sort(key=lambda st: self.weight(st, now.hour), reverse=True)
+        return due[:self.quota.remaining(now)]
+
+    def mark_polled(self, stations: list, now: datetime = None):
+        """조회를 마친 역들의 사용량을 기록하고 다음 조회 시각을 정합니다."""
+        now = now or datetime.now()
+        if not stations:
+            return
+        self.quota.spend(len(stations), now)
+        total_weight = self._remaining_weight(now)
+        for st in stations:
+            self.next_due[st] = now + timedelta(seconds=self.interval(st, now, total_weight))
+
+    def seconds_until_next(self, now: datetime = None) -> float:
+        now = now or datetime.now()
+        if self.quota.remaining(now) <= 0:
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            return (midnight - now).total_seconds()
+        soonest = min(self.next_due.values())
+        return max((soonest - now).total_seconds(), 0)
@@ -0,0 +1,48 @@
+"""
+수집 대상 역을 수집기 N개에 나누는 일관 해싱(consistent hashing)
+- 같은 역 목록 + 같은 수집기 수면 어느 프로세스에서 계산해도 같은 결과 (별도 조정 서버 없음)
+- 수집기 수가 바뀌어도 약 1/N 의 역만 담당이 바뀝니다. (가상 노드로 고르게 분산)
+- 설정: COLLECTOR_SHARD_INDEX (0부터), COLLECTOR_SHARD_COUNT (기본 1)
+"""
+import bisect
+import hashlib
+import os
+
+from stations import normalize_station_name
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def shard_from_env() -> tuple:
+    """(COLLECTOR_SHARD_INDEX, COLLECTOR_SHARD_COUNT), 기본 (0, 1)"""
+    count = max(int(os.getenv("COLLECTOR_SHARD_COUNT", "1")), 1)
+    index = int(os.getenv("COLLECTOR_SHARD_INDEX", "0"))
+    if not 0 <= index < count:
+        raise ValueError(f"COLLECTOR_SHARD_INDEX({index})는 0 이상 COLLECTOR_SHARD_COUNT({count}) 미만이어야 합니다.")
+    return index, count
+
+
+class ConsistentHashRing:
+    def __init__(self, nodes: list, vnodes: int = 128):
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str):
+        """key 해시 값에서 시계 방향으로 가장 가까운 가상 노드의 주인"""
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+def shard_stations(stations: list, shard_index: int = None, shard_count: int = None) -> list:
+    """stations 중 shard_index 번 수집기가 맡을 역 (입력 순서 유지)"""
+    if shard_count is None:
+        shard_index, shard_count = shard_from_env()
+    if shard_count <= 1:
+        return list(stations)
+    ring = ConsistentHashRing(range(shard_count))
+    # '서울역' / '서울' 처럼 표기가 달라도 같은 수집기가 맡도록 정규화한 이름으로 배정
+    return [st for st in stations if ring.node_for(normalize_station_name(st)) == shard_index]
@@ -0,0 +1,191 @@
+"""
+실시간 도착정보 스냅샷 저장소 (날짜/역 파티션, 압축 NDJSON)
+- 역할: 틱마다 JSON 파일을 새로 만드는 대신, 날짜/역별 파일 하나에 gzip 멤버를 이어 붙여 저장
+- 구조: data/store/arrivals/date=YYYY-MM-DD/station=역명/arrivals.ndjson.gz
+- DuckDB에서 hive 파티션으로 읽으므로 날짜/역 조건을 주면 해당 폴더만 스캔합니다.
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from arrival_parser import fill_parsed_fields
+from metrics import BYTES_WRITTEN, get_logger, log_event
+
+logger = get_logger("snapshot_store")
+
+STORE_DIR = os.path.join("data", "store", "arrivals")
+
+# 저장소 한 줄(레코드)의 고정 스키마 (date, station은 폴더 이름이 파티션 컬럼이 됨)
+ARRIVAL_SCHEMA = {
+    "collected_at": "TIMESTAMP",
+    "train_line": "VARCHAR",
+    "arrival_message": "VARCHAR",
+    "arrival_time_sec": "INTEGER",
+    "stations_away": "INTEGER",
+    "current_station": "VARCHAR",
+    "arrival_state": "VARCHAR",
+    "line_id": "VARCHAR",
+    "direction": "VARCHAR",
+    "train_no": "VARCHAR",
+}
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def append_snapshot(collected_at: str, arrivals: list, store_dir: str = STORE_DIR) -> int:
+    """
+    한 틱의 도착정보를 역별 파티션 파일 끝에 이어 씁니다.
+    gzip은 멤버를 이어 붙여도 하나의 스트림으로 읽히므로 append 모드로 안전하게 쓸 수 있습니다.
+    """
+    date = datetime.fromisoformat(collected_at).strftime("%Y-%m-%d")
+    by_station = defaultdict(list)
+    for arr in arrivals:
+        by_station[arr["station_name"]].append({
+            "collected_at": collected_at,
+            "train_line": arr.get("train_line"),
+            "arrival_message": arr.get("arrival_message"),
+            "arrival_time_sec": _to_int(arr.get("arrival_time_sec")),
+            "stations_away": _to_int(arr.get("stations_away")),
+            "current_station": arr.get("current_station"),
+            "arrival_state": arr.get("arrival_state"),
+            "line_id": arr.get("line_id"),
+            "direction": arr.get("direction"),
+            "train_no": arr.get("train_no"),
+        })
+
+    for station, rows in by_station.items():
+        part_dir = Path(store_dir) / f"date={date}" / f"station={station}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+        part_path = part_dir / "arrivals.ndjson.gz"
+        size_before = part_path.stat().st_size if part_path.exists() else 0
+        with gzip.open(part_path, "ab") as f:
+            f.write(payload.encode("utf-8"))
+        BYTES_WRITTEN.inc(part_path.stat().st_size - size_before, kind="store")
+    return len(arrivals)
+
+
+def has_data(store_dir: str = STORE_DIR) -> bool:
+    return bool(glob.glob(os.path.join(store_dir, "date=*", "station=*", "*.ndjson.gz")))
+
+
+def partition_files(store_dir: str = STORE_DIR) -> dict:
+    """저장소의 파티션 파일 경로와 현재 크기 {경로: 바이트} (증분 적재 판단용)"""
+    pattern = os.path.join(store_dir, "date=*", "station=*", "*.ndjson.gz")
+    return {path: os.path.getsize(path) for path in glob.glob(pattern)}
+
+
+def arrivals_scan_sql(store_dir: str = STORE_DIR, date_from: str = None, date_to: str = None,
+                      stations: list = None, files: list = None) -> str:
+    """
+    저장소를 읽는 SELECT 문을 만들어 줍니다. (다른 쿼리의 FROM/CTE 안에 그대로 넣어 사용)
+    - date_from/date_to('YYYY-MM-DD'), stations 조건은 파티션 컬럼에 걸리므로 해당 폴더만 읽습니다.
+    - files를 주면 glob 대신 해당 파티션 파일들만 읽습니다.
+    """
+    if files:
+        pattern = "[" + ", ".join("'" + f.replace("'", "''") + "'" for f in files) + "]"
+    else:
+        pattern = "'" + os.path.join(store_dir, "date=*", "station=*", "*.ndjson.gz").replace("'", "''") + "'"
+    columns = ", ".join(f"'{name}': '{typ}'" for name, typ in ARRIVAL_SCHEMA.items())
+
+    conditions = []
+    if date_from:
+        conditions.append(f"date >= DATE '{date_from}'")
+    if date_to:
+        conditions.append(f"date <= DATE '{date_to}'")
+    if stations:
+        names = ", ".join("'" + s.replace("'", "''") + "'" for s in stations)
+        conditions.append(f"station IN ({names})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return f"""
+        SELECT
+            station AS station_name,
+            train_line,
+            arrival_message,
+            arrival_time_sec,
+            stations_away,
+            current_station,
+            arrival_state,
+            line_id,
+            direction,
+            train_no,
+            collected_at
+        FROM read_json({pattern},
+                       format = 'newline_delimited',
+                       compression = 'gzip',
+                       columns = {{{columns}}},
+                       hive_partitioning = true,
+                       hive_types = {{'date': 'DATE', 'station': 'VARCHAR'}})
+        {where}
+    """
+
+
+def _compacted_manifest(store_dir: str = STORE_DIR) -> Path:
+    return Path(store_dir) / "_compacted_files.txt"
+
+
+def pending_raw_files(raw_dir: str = "data/raw", store_dir: str = STORE_DIR) -> list:
+    """
+    아직 저장소로 합치지 않은 원본 arrivals_*.json 파일 목록 (정렬됨)
+    compact_raw_json(keep=True)로 합친 뒤 남겨 둔 파일은 빼므로, 저장소와 함께 읽어도 두 번 세지 않습니다.
+    """
+    manifest_path = _compacted_manifest(store_dir)
+    compacted = set()
+    if manifest_path.exists():
+        compacted = set(manifest_path.read_text(encoding="utf-8").split())
+    return sorted(f for f in glob.glob(os.path.join(raw_dir, "arrivals_*.json"))
+                  if os.path.basename(f) not in compacted)
+
+
+def compact_raw_json(raw_dir: str = "data/raw", store_dir: str = STORE_DIR, keep: bool = False) -> int:
+    """
+    기존 data/raw/arrivals_*.json 파일들을 저장소로 합칩니다.
+    - 합친 원본 파일은 삭제합니다. (keep=True면 남기고, 다시 합치지 않도록 목록에 기록)
+    """
+    manifest_path = _compacted_manifest(store_dir)
+    files = pending_raw_files(raw_dir, store_dir)
+    log_event(logger, logging.INFO, "🗜️ 원본 JSON 을 저장소로 합치는 중...", files=len(files))
+
+    total = 0
+    for path in files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            log_event(logger, logging.WARNING, "⚠️ 건너뜀 (읽기 실패)", path=path, error=str(e))
+            continue
+
+        # 예전 레코드는 메시지에서 꺼낼 수 있는 필드(남은 정거장, 위치, 상태)를 채워서 합침
+        arrivals = [fill_parsed_fields(arr) for arr in data.get("arrivals", [])]
+        if arrivals and data.get("collected_at"):
+            total += append_snapshot(data["collected_at"], arrivals, store_dir)
+
+        if keep:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(manifest_path, "a", encoding="utf-8") as f:
+                f.write(os.path.basename(path) + "\n")
+        else:
+            os.remove(path)
+
+    log_event(logger, logging.INFO, "✅ 합치기 완료", rows=total, store_dir=store_dir)
+    return total
+
+
+if __name__ == "__main__":
+    # 사용법: python snapshot_store.py compact [--keep]
+    if len(sys.argv) > 1 and sys.argv[1] == "compact":
+        compact_raw_json(keep="--keep" in sys.argv)
+    else:
+        print("사용법: python snapshot_store.py compact [--keep]")
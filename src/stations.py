@@ -0,0 +1,98 @@
+"""
+역 기준 정보(Station Dimension)
+- 역할: 역 이름의 모든 표기(서울역 / 서울 / 신촌(경의중앙선) ...)를 정수 station_id 하나로 통일
+- 테이블
+    dim_station   (station_id, station_name, latitude, longitude)  : 정규화된 역 하나당 한 행
+    station_alias (alias, station_id)                              : 원본 표기 -> station_id
+    station_line  (station_id, line_name)                          : 역이 속한 호선 목록
+- 한 번 만든 매핑을 적재 시점에 적용하므로, 이후 모든 조인은 정수 station_id 동등 조인이 됩니다.
+"""
+import re
+
+# 괄호 안 부가 설명 제거용: '신촌(경의중앙선)' -> '신촌'
+_PAREN_PATTERN = re.compile(r"\s*\(.*?\)\s*$")
+
+
+def normalize_station_name(name: str) -> str:
+    """
+    역 이름을 표준 표기로 바꿉니다.
+    - 앞뒤 공백, 끝의 괄호 설명을 제거
+    - 끝에 붙은 '역'만 제거 ('서울역' -> '서울'). 이름 중간의 '역'은 그대로 둡니다. ('역삼' -> '역삼')
+    """
+    if name is None:
+        return None
+    name = _PAREN_PATTERN.sub("", str(name).strip())
+    if name.endswith("역") and len(name) > 2:
+        name = name[:-1]
+    return name
+
+
+def init_station_tables(con):
+    """역 기준 테이블을 준비합니다. (이미 있으면 그대로 사용)"""
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS dim_station (
+            station_id INTEGER PRIMARY KEY,
+            station_name VARCHAR UNIQUE,
+            latitude DOUBLE,
+            longitude DOUBLE
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS station_alias (
+            alias VARCHAR PRIMARY KEY,
+            station_id INTEGER
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS station_line (
+            station_id INTEGER,
+            line_name VARCHAR,
+            PRIMARY KEY (station_id, line_name)
+        )
+    """)
+
+
+def register_station_names(con, names_sql: str, line_column: str = None) -> int:
+    """
+    names_sql 결과의 station_name 중 처음 보는 표기를 station_alias 에 등록합니다.
+    - 정규화한 이름이 이미 있으면 같은 station_id, 없으면 새 번호를 부여 (기존 번호는 바뀌지 않음)
+    - line_column 을 주면 (역, 호선) 조합도 station_line 에 기록
+    새로 등록된 표기 수를 반환합니다.
+    """
+    new_aliases = [row[0] for row in con.execute(f"""
+        SELECT DISTINCT TRIM(station_name) AS alias
+        FROM ({names_sql})
+        WHERE station_name IS NOT NULL
+          AND TRIM(station_name) NOT IN (SELECT alias FROM station_alias)
+    """).fetchall()]
+
+    if new_aliases:
+        known = dict(con.execute("SELECT station_name, station_id FROM dim_station").fetchall())
+        next_id = max(known.values(), default=0) + 1
+        new_stations, alias_rows = [], []
+        for alias in new_aliases:
+            canonical = normalize_station_name(alias)
+            if canonical not in known:
+                known[canonical] = next_id
+                new_stations.append([next_id, canonical])
+                next_id += 1
+            alias_rows.append([alias, known[canonical]])
+        if new_stations:
+            con.executemany("INSERT INTO dim_station (station_id, station_name) VALUES (?, ?)", new_stations)
+        con.executemany("INSERT INTO station_alias VALUES (?, ?)", alias_rows)
+
+    if line_column:
+        con.execute(f"""
+            INSERT OR IGNORE INTO station_line
+            SELECT DISTINCT a.station_id, TRIM(CAST(s.{line_column} AS VARCHAR))
+            FROM ({names_sql}) s
+            JOIN station_alias a ON a.alias = TRIM(s.station_name)
+            WHERE s.{line_column} IS NOT NULL
+        """)
+    return len(new_aliases)
+
+
+def update_station_coords(con, coords: dict):
+    """{역명: (위도, 경도)} 좌표를 dim_station 에 채웁니다. (역명은 어떤 표기든 정규화해서 매칭)"""
+    rows = [[lat, lng, normalize_station_name(name)] for name, (lat, lng) in coords.items()]
+    con.executemany("UPDATE dim_station SET latitude = ?, longitude = ? WHERE station_name = ?", rows)
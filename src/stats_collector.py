@@ -4,16 +4,29 @@
 - 실행 주기: 배치(Batch) 실행 (데이터 업데이트 시)
 """
 import json
+import logging
 import os
+import sys
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
+from metrics import get_logger, log_event
+from time_slots import TIME_SLOT_HOURS, TIME_SLOTS
+
+logger = get_logger("stats_collector")
+
+# 시간대 컬럼 -> 시(hour) 문자열 매핑 (clean_time 규칙과 동일, 행마다 apply 하지 않고 map으로 한 번에 변환)
+# time_slots 표에서 만들되, 통계 출력에서는 '24시 이후'를 '24'로 둠
+HOUR_MAP = {slot: '24' if slot == '24시 이후' else f"{TIME_SLOT_HOURS[slot]:02d}" for slot in TIME_SLOTS}
+
+ID_COLUMNS = ['날짜', '호선', '역번호', '역명', '구분']
+
 def process_csv_data(csv_path: str):
     """
     CSV 파일을 읽어 분석하기 좋은 형태(Long Format)로 변환합니다.
     """
-    print(f"📂 CSV 파일 로딩 중: {csv_path}")
+    log_event(logger, logging.INFO, "📂 CSV 파일 로딩 중", path=csv_path)
     
     try:
         # 1. CSV 읽기 (인코딩은 상황에 따라 'utf-8', 'cp949', 'euc-kr' 확인 필요)
@@ -23,7 +36,7 @@ def process_csv_data(csv_path: str):
         except UnicodeDecodeError:
             df = pd.read_csv(csv_path, encoding='cp949')
 
-        print(f"   - 원본 데이터 크기: {len(df)} 행")
+        log_event(logger, logging.INFO, "   - 원본 데이터 크기", rows=len(df))
 
         # 2. 불필요한 컬럼 제거 및 정리
         # '연번' 등 분석에 필요 없는 컬럼 제외
@@ -75,11 +88,11 @@ def process_csv_data(csv_path: str):
         # 딕셔너리 리스트로 변환
         result_list = final_df.to_dict(orient='records')
         
-        print(f"✅ 데이터 변환 완료: 총 {len(result_list)}건의 시간대별 데이터 생성")
+        log_event(logger, logging.INFO, "✅ 데이터 변환 완료", rows=len(result_list))
         return result_list
 
     except Exception as e:
-        print(f"❌ CSV 처리 중 오류 발생: {e}")
+        log_event(logger, logging.ERROR, "❌ CSV 처리 중 오류 발생", path=csv_path, error=str(e))
         return []
 
 def save_stats_to_json(data_list: list, output_dir: str = None) -> str:
@@ -105,10 +118,85 @@ def save_stats_to_json(data_list: list, output_dir: str = None) -> str:
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(final_data, f, ensure_ascii=False, indent=2)
         
-    print(f"💾 저장 완료: {filepath}")
+    log_event(logger, logging.INFO, "💾 저장 완료", path=str(filepath))
     return str(filepath)
 
+def detect_encoding(csv_path: str) -> str:
+    """파일 앞부분만 읽어서 utf-8 / cp949 여부를 판단합니다. (utf-8-sig는 BOM이 있어도 없어도 읽힘)"""
+    from diagnostics import sniff_encoding
+    return sniff_encoding(csv_path)['encoding'] or 'cp949'
+
+def transform_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """가로형 CSV 청크(문자열 dtype) -> 세로형 (date, line_num, station_code, station_name, type, hour, count)"""
+    value_vars = [c for c in chunk.columns if c not in ID_COLUMNS and c != '연번']
+    melted = chunk.melt(id_vars=ID_COLUMNS, value_vars=value_vars,
+                        var_name='시간대', value_name='인원수')
+
+    counts = pd.to_numeric(melted['인원수'].str.replace(',', '', regex=False), errors='coerce')
+    return pd.DataFrame({
+        'date': melted['날짜'],
+        'line_num': melted['호선'],
+        'station_code': melted['역번호'],
+        'station_name': melted['역명'],
+        'type': melted['구분'],
+        'hour': melted['시간대'].map(HOUR_MAP),
+        'count': counts.fillna(0).astype('int64'),
+    })
+
+def stats_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('date', pa.string()),
+        ('line_num', pa.string()),
+        ('station_code', pa.string()),
+        ('station_name', pa.string()),
+        ('type', pa.string()),
+        ('hour', pa.string()),
+        ('count', pa.int64()),
+    ])
+
+def process_csv_streaming(csv_path: str, output_path: str = None, chunksize: int = 50_000) -> str:
+    """
+    (스트리밍 모드) CSV를 chunksize 행씩 읽어 변환하고 Parquet 파일에 바로 이어 씁니다.
+    - 시간대 변환은 map, 인원수 변환은 벡터 연산으로 처리
+    - 전체를 메모리에 올리지 않으므로 입력 크기와 상관없이 메모리 사용량이 일정합니다.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if output_path is None:
+        stats_dir = Path(os.environ.get("DATA_DIR", "./data")) / "stats"
+        stats_dir.mkdir(parents=True, exist_ok=True)
+        output_path = str(stats_dir / f"passenger_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet")
+
+    schema = stats_schema()
+
+    encoding = detect_encoding(csv_path)
+    log_event(logger, logging.INFO, "📂 CSV 스트리밍 변환 시작", path=csv_path, encoding=encoding, chunksize=chunksize)
+
+    total = 0
+    writer = pq.ParquetWriter(output_path + ".tmp", schema, compression='zstd')
+    try:
+        # 모든 값을 문자열로 읽어 청크마다 타입 추론이 달라지지 않게 함
+        for chunk in pd.read_csv(csv_path, encoding=encoding, chunksize=chunksize, dtype=str):
+            out = transform_chunk(chunk)
+            writer.write_table(pa.Table.from_pandas(out, schema=schema, preserve_index=False))
+            total += len(out)
+    finally:
+        writer.close()
+    os.replace(output_path + ".tmp", output_path)
+
+    log_event(logger, logging.INFO, "✅ 데이터 변환 완료", rows=total, path=output_path)
+    return output_path
+
 if __name__ == "__main__":
+    # 0. 여러 달 CSV 일괄 처리: python stats_collector.py --batch "data/monthly/*.csv"
+    if "--batch" in sys.argv:
+        from batch_pipeline import run_batch
+        run_batch(sys.argv[sys.argv.index("--batch") + 1], force="--force" in sys.argv)
+        sys.exit(0)
+
     # 1. CSV 파일 경로 지정 (data 폴더 안에 파일을 넣어주세요)
     # 예: data/station_passenger.csv
     csv_file_path = "data/station_passenger.csv" 
@@ -116,6 +204,9 @@ if __name__ == "__main__":
     if not os.path.exists(csv_file_path):
         print(f"⚠️ 파일을 찾을 수 없습니다: {csv_file_path}")
         print("CSV 파일을 'data/station_passenger.csv'로 저장 후 다시 실행해주세요.")
+    elif "--stream" in sys.argv:
+        # 2-1. 대용량 파일: 청크 단위로 변환해 Parquet으로 저장
+        process_csv_streaming(csv_file_path)
     else:
         # 2. 처리 및 저장
         processed_data = process_csv_data(csv_file_path)
@@ -0,0 +1,307 @@
+"""
+실시간 도착정보 스트리밍 파이프라인
+- 역할: 수집기가 도착 레코드를 metro-arrivals 토픽에 발행하고, 소비자가 역별 혼잡 상태를 즉시 갱신
+- 전송 계층(MessageBroker)은 교체 가능
+    kafka  : docker compose 의 Kafka (kafka-python 필요)
+    file   : data/stream/<토픽>.ndjson 에 이어 쓰는 파일 큐 (프로세스 간 공유, Kafka 없이 동작)
+    memory : 같은 프로세스 안의 큐 (테스트/단일 프로세스용)
+- 선택: 환경변수 STREAM_BACKEND (기본 file), KAFKA_BOOTSTRAP (기본 kafka:9092)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from metrics import get_logger, log_event
+
+logger = get_logger("stream")
+
+TOPIC = "metro-arrivals"
+# 수집기가 응답한 역마다 한 틱의 마지막에 보내는 표시 메시지의 키
+END_OF_SNAPSHOT = "end_of_snapshot"
+
+
+class MessageBroker:
+    """토픽 발행/구독 인터페이스"""
+
+    def publish(self, topic: str, message: dict):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def poll(self, topic: str, group: str, max_records: int = 500, timeout: float = 1.0) -> list:
+        """group 기준으로 아직 읽지 않은 메시지를 최대 max_records 개 반환 (없으면 timeout 초 대기)"""
+        raise NotImplementedError
+
+
+class InProcessBroker(MessageBroker):
+    """같은 프로세스 안에서만 쓰는 메모리 큐"""
+
+    def __init__(self):
+        self._logs = defaultdict(list)
+        self._offsets = defaultdict(int)
+        self._cond = threading.Condition()
+
+    def publish(self, topic: str, message: dict):
+        with self._cond:
+            self._logs[topic].append(message)
+            self._cond.notify_all()
+
+    def poll(self, topic: str, group: str, max_records: int = 500, timeout: float = 1.0) -> list:
+        key = (topic, group)
+        with self._cond:
+            if self._offsets[key] >= len(self._logs[topic]):
+                self._cond.wait(timeout)
+            start = self._offsets[key]
+            batch = self._logs[topic][start:start + max_records]
+            self._offsets[key] = start + len(batch)
+            return batch
+
+
+class FileBroker(MessageBroker):
+    """
+    토픽별 NDJSON 파일에 이어 쓰는 파일 큐
+    - 소비 위치(바이트 offset)는 <토픽>.<그룹>.offset 파일에 저장되어 재시작해도 이어서 읽습니다.
+    """
+
+    def __init__(self, stream_dir: str = None):
+        if stream_dir is None:
+            stream_dir = os.path.join(os.environ.get("DATA_DIR", "./data"), "stream")
+        self.stream_dir = Path(stream_dir)
+        self.stream_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _log_path(self, topic: str) -> Path:
+        return self.stream_dir / f"{topic}.ndjson"
+
+    def _offset_path(self, topic: str, group: str) -> Path:
+        return self.stream_dir / f"{topic}.{group}.offset"
+
+    def publish(self, topic: str, message: dict):
+        line = json.dumps(message, ensure_ascii=False) + "\n"
+        with self._lock, open(self._log_path(topic), "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def poll(self, topic: str, group: str, max_records: int = 500, timeout: float = 1.0) -> list:
+        log_path, offset_path = self._log_path(topic), self._offset_path(topic, group)
+        offset = int(offset_path.read_text()) if offset_path.exists() else 0
+
+        deadline = time.monotonic() + timeout
+        while not log_path.exists() or log_path.stat().st_size <= offset:
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(0.05)
+
+        batch = []
+        with open(log_path, "rb") as f:
+            f.seek(offset)
+            while len(batch) < max_records:
+                line = f.readline()
+                # 아직 다 쓰이지 않은 마지막 줄은 다음 poll 에서 읽음
+                if not line or not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                batch.append(json.loads(line))
+
+        offset_path.write_text(str(offset))
+        return batch
+
+
+class KafkaBroker(MessageBroker):
+    """docker compose 의 Kafka 브로커 (kafka-python 은 이 클래스를 쓸 때만 불러옵니다)"""
+
+    def __init__(self, bootstrap_servers: str = None):
+        from kafka import KafkaProducer
+
+        self.bootstrap_servers = bootstrap_servers or os.environ.get("KAFKA_BOOTSTRAP", "kafka:9092")
+        self._producer = KafkaProducer(
+            bootstrap_servers=self.bootstrap_servers,
+            value_serializer=lambda m: json.dumps(m, ensure_ascii=False).encode("utf-8"),
+            linger_ms=50,
+        )
+        self._consumers = {}
+
+    def publish(self, topic: str, message: dict):
+        self._producer.send(topic, message)
+
+    def flush(self):
+        self._producer.flush()
+
+    def poll(self, topic: str, group: str, max_records: int = 500, timeout: float = 1.0) -> list:
+        from kafka import KafkaConsumer
+
+        key = (topic, group)
+        if key not in self._consumers:
+            self._consumers[key] = KafkaConsumer(
+                topic,
+                bootstrap_servers=self.bootstrap_servers,
+                group_id=group,
+                value_deserializer=lambda b: json.loads(b.decode("utf-8")),
+                auto_offset_reset="earliest",
+            )
+        records = self._consumers[key].poll(timeout_ms=int(timeout * 1000), max_records=max_records)
+        return [r.value for batch in records.values() for r in batch]
+
+
+def get_broker(backend: str = None) -> MessageBroker:
+    backend = backend or os.environ.get("STREAM_BACKEND", "file")
+    if backend == "kafka":
+        return KafkaBroker()
+    if backend == "memory":
+        return InProcessBroker()
+    return FileBroker()
+
+
+class CongestionState:
+    """
+    역별 혼잡 상태를 레코드 단위로 갱신하는 롤링 상태
+    - 역마다 가장 최근 스냅샷의 열차 목록만 유지 (새 수집시각이 오면 그 역의 열차 목록을 교체)
+    - 열차 목록과 함께 (호선 ID, 상하행)별 열차 수 / 위험 열차 수 / 가장 빠른 도착(초)을 누적 집계
+    - 수집기가 응답한 역마다 보내는 스냅샷 끝 표시(END_OF_SNAPSHOT)를 받으면, 열차가 없다고 응답한 역도 목록을 비움
+    - 1분 이내 도착 열차 수의 지수이동평균(EWMA)으로 최근 추세를 같이 유지
+    - scorer(baseline_profile.RiskScorer)가 있으면 요일 유형별 프로필 배열로 판정하고,
+      없으면 baseline(시간대별 평균)과 고정 기준값을 씁니다.
+    """
+
+    RISK_PASSENGERS = 5000
+    RISK_ARRIVAL_SEC = 60
+
+    def __init__(self, baseline: dict = None, alpha: float = 0.3, scorer=None):
+        # baseline: {역명: [0~23시 평균 하차 인원]} (scheduler.load_hourly_baseline 형식)
+        self.baseline = baseline or {}
+        self.alpha = alpha
+        self.scorer = scorer
+        if scorer is not None:
+            self.RISK_ARRIVAL_SEC = scorer.thresholds.arrival_sec
+        self.stations = {}
+        self.updated_at = None
+
+    def _new_station(self, collected_at: str) -> dict:
+        return {"collected_at": collected_at, "trains": [], "directions": {}, "risk_count": 0,
+                "expected_alighting": 0, "imminent_ewma": 0.0}
+
+    def _finish_snapshot(self, state: dict):
+        imminent = sum(1 for t in state["trains"] if t["arrival_time_sec"] <= self.RISK_ARRIVAL_SEC)
+        state["imminent_ewma"] = self.alpha * imminent + (1 - self.alpha) * state["imminent_ewma"]
+
+    def _station_state(self, station: str, collected_at: str):
+        """이 레코드를 반영할 역 상태 (늦게 도착한 예전 스냅샷 레코드면 None)"""
+        state = self.stations.get(station)
+        if state is None:
+            state = self.stations[station] = self._new_station(collected_at)
+        elif collected_at > state["collected_at"]:
+            # 이 역의 새 스냅샷 시작: 이전 스냅샷을 추세에 반영하고 열차 목록 교체
+            self._finish_snapshot(state)
+            state.update(collected_at=collected_at, trains=[], directions={}, risk_count=0)
+        elif collected_at < state["collected_at"]:
+            return None
+        return state
+
+    def update(self, record: dict):
+        station = record["station_name"]
+        collected_at = record["collected_at"]
+        state = self._station_state(station, collected_at)
+        if state is None:
+            return  # 늦게 도착한 예전 레코드는 무시
+        self.updated_at = max(self.updated_at or collected_at, collected_at)
+        if record.get(END_OF_SNAPSHOT):
+            return  # 이 역의 스냅샷 끝 (열차 없이 응답한 역은 위에서 목록만 비워짐)
+
+        try:
+            arrival_sec = int(record.get("arrival_time_sec") or 0)
+        except (TypeError, ValueError):
+            arrival_sec = 0
+        if self.scorer is not None:
+            expected, risky = self.scorer.score_record({**record, "arrival_time_sec": arrival_sec})
+            expected = int(expected)
+        else:
+            hour = datetime.fromisoformat(collected_at).hour
+            hourly = self.baseline.get(station)
+            expected = int(hourly[hour]) if hourly else 0
+            risky = expected > self.RISK_PASSENGERS and arrival_sec <= self.RISK_ARRIVAL_SEC
+
+        line_id, direction = record.get("line_id"), record.get("direction")
+        state["trains"].append({
+            "line_id": line_id,
+            "direction": direction,
+            "train_line": record.get("train_line"),
+            "arrival_message": record.get("arrival_message"),
+            "arrival_time_sec": arrival_sec,
+            "arrival_state": record.get("arrival_state"),
+            "stations_away": record.get("stations_away"),
+            "expected_alighting": expected,
+            "risk_level": "🚨 혼잡 위험" if risky else "✅ 정상",
+        })
+        group = state["directions"].get((line_id, direction))
+        if group is None:
+            group = state["directions"][(line_id, direction)] = {
+                "line_id": line_id, "direction": direction, "trains": 0, "risk_count": 0,
+                "next_arrival_sec": arrival_sec}
+        group["trains"] += 1
+        group["risk_count"] += risky
+        group["next_arrival_sec"] = min(group["next_arrival_sec"], arrival_sec)
+        state["expected_alighting"] = expected
+        state["risk_count"] += risky
+
+    def update_many(self, records: list):
+        for record in records:
+            self.update(record)
+
+    def snapshot(self) -> dict:
+        """
+        현재 상태의 복사본 (읽는 쪽에서 수정해도 원본에 영향 없음)
+        directions 는 (호선 ID, 상하행) 순으로 정렬한 목록으로 돌려줍니다.
+        """
+        return {
+            station: {**state, "trains": list(state["trains"]),
+                      "directions": [dict(g) for _, g in sorted(state["directions"].items(),
+                                                                key=lambda kv: tuple(str(k) for k in kv[0]))]}
+            for station, state in self.stations.items()
+        }
+
+
+def publish_arrivals(broker: MessageBroker, collected_at: str, arrivals: list, topic: str = TOPIC,
+                     stations=None):
+    """
+    수집기가 한 틱의 도착 레코드를 하나씩 발행합니다.
+    stations 에 이번 틱에 응답한 역을 주면, 역마다 스냅샷 끝 표시를 이어서 발행합니다.
+    (열차 없이 응답한 역도 소비자가 이전 열차 목록을 비울 수 있도록)
+    """
+    for arr in arrivals:
+        broker.publish(topic, {**arr, "collected_at": collected_at})
+    for station in stations or ():
+        broker.publish(topic, {"station_name": station, "collected_at": collected_at, END_OF_SNAPSHOT: True})
+    broker.flush()
+
+
+def run_consumer(group: str = "congestion-state", broker: MessageBroker = None, on_update=None):
+    """
+    metro-arrivals 토픽을 계속 읽으면서 역별 혼잡 상태를 갱신합니다.
+    on_update(state)를 주면 배치마다 호출합니다. (예: 조회 서비스에 반영)
+    """
+    from baseline_profile import load_latest_scorer
+    from scheduler import load_hourly_baseline
+
+    broker = broker or get_broker()
+    # duckdb_processor 가 만든 요일 유형별 프로필이 있으면 사용, 없으면 CSV 시간대 평균
+    scorer = load_latest_scorer()
+    state = CongestionState(None if scorer else load_hourly_baseline(), scorer=scorer)
+    log_event(logger, logging.INFO, f"🎧 {TOPIC} 토픽 구독 시작", broker=type(broker).__name__, group=group)
+    while True:
+        records = broker.poll(TOPIC, group)
+        if not records:
+            continue
+        state.update_many(records)
+        log_event(logger, logging.INFO, "🔄 스트림 반영", records=len(records), stations=len(state.stations),
+                  updated_at=state.updated_at)
+        if on_update:
+            on_update(state)
+
+
+if __name__ == "__main__":
+    run_consumer()
@@ -0,0 +1,11 @@
+"""
+CardSubwayTime CSV 시간대 컬럼 정의
+- 역할: 시간대별 승하차 CSV 의 시간대 열 이름과 시(hour) 매핑을 한곳에서 관리
+- 사용처: scheduler(수집 기준), duckdb_processor(CSV 적재 SQL), stats_collector(JSON 변환), bench 합성 데이터
+"""
+
+# CSV 시간대 컬럼 (파일의 열 순서 그대로: 06시 이전, 06시-07시 ... 23시-24시, 24시 이후)
+TIME_SLOTS = ('06시 이전', *(f"{h:02d}시-{h + 1:02d}시" for h in range(6, 24)), '24시 이후')
+
+# CSV 시간대 컬럼 -> 시(hour) 매핑 ("06시 이전"은 5시, "24시 이후"는 자정 0시로 취급)
+TIME_SLOT_HOURS = {slot: (5 + i) % 24 for i, slot in enumerate(TIME_SLOTS)}
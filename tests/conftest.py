@@ -0,0 +1,21 @@
+"""
+pytest 공통 설정
+- src/ 의 모듈을 스크립트에서처럼 바로 import 할 수 있게 경로에 추가
+- 모듈들이 data/... 상대 경로를 쓰므로, workdir 픽스처로 임시 폴더에서 실행
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """임시 폴더를 작업 디렉터리로 (data/ 아래 파일이 저장소를 건드리지 않음)"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return tmp_path
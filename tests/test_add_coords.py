@@ -0,0 +1,53 @@
+import random
+
+import pandas as pd
+import pytest
+
+from add_coords import STATION_COORDS, StationSpatialIndex, add_coordinates, load_station_coords
+
+
+def brute_force(index, lat, lng):
+    import numpy as np
+
+    dist = index._distances(lat, lng, np.arange(len(index.names)))
+    return sorted(zip(index.names.tolist(), dist.tolist()), key=lambda x: x[1])
+
+
+@pytest.fixture
+def index():
+    rng = random.Random(1)
+    names = [f"역{i}" for i in range(300)]
+    lats = [rng.uniform(37.45, 37.70) for _ in names]
+    lngs = [rng.uniform(126.80, 127.15) for _ in names]
+    return StationSpatialIndex(names, lats, lngs)
+
+
+def test_nearest_matches_brute_force(index):
+    rng = random.Random(2)
+    for lat, lng in [(rng.uniform(37.4, 37.75), rng.uniform(126.75, 127.2)) for _ in range(20)] + [(35.1, 129.0)]:
+        expected = brute_force(index, lat, lng)[:5]
+        assert [n for n, _ in index.nearest(lat, lng, 5)] == [n for n, _ in expected]
+
+
+def test_within_radius_matches_brute_force(index):
+    lat, lng = 37.56, 126.98
+    expected = [(n, d) for n, d in brute_force(index, lat, lng) if d <= 2000]
+    assert index.within_radius(lat, lng, 2000) == pytest.approx(expected)
+    assert index.within_radius(0.0, 0.0, 1000) == []
+
+
+def test_add_coordinates_normalizes_names(workdir):
+    df = pd.DataFrame({"역명": ["서울역", "강남", "없는역", "서울"]})
+    out = add_coordinates(df, load_station_coords())
+    assert out["위도(Latitude)"].tolist()[:2] == [STATION_COORDS["서울"][0], STATION_COORDS["강남"][0]]
+    assert pd.isna(out["위도(Latitude)"][2])
+    assert out["경도(Longitude)"][3] == STATION_COORDS["서울"][1]
+
+
+def test_coords_csv_overrides_and_averages_lines(workdir):
+    pd.DataFrame({"역사명": ["서울역", "서울", "강남"], "위도": [37.0, 38.0, 37.5], "경도": [127.0, 127.2, 127.1]}) \
+        .to_csv("data/station_coords.csv", index=False)
+    coords = load_station_coords().set_index("station_key")
+    assert coords.loc["서울", "latitude"] == pytest.approx(37.5)
+    assert coords.loc["서울", "longitude"] == pytest.approx(127.1)
+    assert len(coords) == 2
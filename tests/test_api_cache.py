@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from api_cache import ResponseCache, stats_ttl
+
+
+def test_hit_miss_and_empty_results_not_cached():
+    cache = ResponseCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"v": len(calls)}
+
+    assert cache.get_or_fetch("realtime", "강남", fetch) == {"v": 1}
+    assert cache.get_or_fetch("realtime", "강남", fetch) == {"v": 1}
+    assert cache.get_or_fetch("realtime", "역삼", lambda: {}) == {}
+    assert cache.get_or_fetch("realtime", "역삼", fetch) == {"v": 2}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = ResponseCache(ttl={"realtime": 10})
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    assert cache.get_or_fetch("realtime", "k", lambda: {"v": 1}) == {"v": 1}
+    now[0] += 5
+    assert cache.get_or_fetch("realtime", "k", lambda: {"v": 2}) == {"v": 1}
+    now[0] += 6
+    assert cache.get_or_fetch("realtime", "k", lambda: {"v": 3}) == {"v": 3}
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    for key in "abc":
+        cache.get_or_fetch("stats", key, lambda: {"k": 1})
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+
+def test_concurrent_requests_are_coalesced():
+    cache = ResponseCache()
+    calls = []
+    started = threading.Event()
+
+    def slow_fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"v": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("realtime", "k", slow_fetch)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"v": 1}] * 5
+    assert cache.stats()["coalesced"] + cache.stats()["hits"] == 4
+
+
+def test_errors_are_shared_and_not_cached():
+    cache = ResponseCache()
+
+    def boom():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("realtime", "k", boom)
+    assert cache.get_or_fetch("realtime", "k", lambda: {"v": 1}) == {"v": 1}
+
+
+def test_disk_cache_survives_new_instance(tmp_path):
+    ResponseCache(disk_dir=str(tmp_path)).get_or_fetch("stats", "202301/1/100", lambda: {"v": 1}, ttl=None)
+    cache = ResponseCache(disk_dir=str(tmp_path))
+    assert cache.get_or_fetch("stats", "202301/1/100", lambda: {"v": 2}) == {"v": 1}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_stats_ttl_keeps_past_months_forever():
+    assert stats_ttl("200001") is None
+    assert stats_ttl("299912") == 24 * 3600
@@ -0,0 +1,54 @@
+import logging
+
+from api_client import SeoulMetroAPI
+from key_pool import ApiKeyPool
+
+
+class FakeResponse:
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return FakeResponse(self.payload)
+
+
+def make_api(tmp_path, payload: dict) -> SeoulMetroAPI:
+    api = SeoulMetroAPI(key_pool=ApiKeyPool(["test-key"], daily_limit=100, state_dir=str(tmp_path)))
+    api.session = FakeSession(payload)
+    return api
+
+
+def test_error_payload_is_logged_and_returns_empty(tmp_path, caplog):
+    api = make_api(tmp_path, {"errorMessage": {"code": "INFO-200", "message": "해당하는 데이터가 없습니다."}})
+    with caplog.at_level(logging.WARNING, logger="api_client"):
+        assert api._fetch_arrival_info("강남역", timeout=1) == {}
+    record = next(r for r in caplog.records if "API 에러" in r.getMessage())
+    assert record.fields == {"station": "강남역", "code": "INFO-200", "error_message": "해당하는 데이터가 없습니다."}
+
+
+def test_quota_error_marks_key_exhausted(tmp_path):
+    api = make_api(tmp_path, {"code": "ERROR-337", "message": "일일 트래픽 초과"})
+    assert api._fetch_arrival_info("강남", timeout=1) == {}
+    assert api.key_pool.remaining() == 0
+    assert api._fetch_arrival_info("강남", timeout=1) == {}
+    assert len(api.session.urls) == 1
+
+
+def test_success_payload_is_returned(tmp_path):
+    payload = {"errorMessage": {"code": "INFO-000"}, "realtimeArrivalList": [{"statnNm": "강남"}]}
+    api = make_api(tmp_path, payload)
+    assert api._fetch_arrival_info("강남", timeout=1) is payload
+    assert api.session.urls[0].endswith("/realtimeStationArrival/0/10/강남")
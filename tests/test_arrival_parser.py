@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import duckdb
+import pytest
+
+from arrival_parser import fill_parsed_fields, parse_arrival, parse_message
+from headway import headway_sql, headway_summary_sql, train_positions_sql
+
+
+@pytest.mark.parametrize("message, code, expected", [
+    ("[9]번째 전역 (가산디지털단지)", "99", (9, "가산디지털단지", "running")),
+    ("전역 도착", "5", (1, None, "prev_arrived")),
+    ("전역 도착", None, (1, None, "prev_arrived")),
+    ("강남 진입", None, (0, "강남", "approaching")),
+    ("3분 20초 후 (역삼역)", None, (None, "역삼", "running")),
+    ("", None, (None, None, "unknown")),
+])
+def test_parse_message(message, code, expected):
+    parsed = parse_message(message, code, station="강남역")
+    assert (parsed["stations_away"], parsed["current_station"], parsed["arrival_state"]) == expected
+
+
+def test_parse_arrival_seconds_fall_back_to_message():
+    item = {"statnNm": "강남역", "trainLineNm": "성수행 - 역삼방면", "arvlMsg2": "2분 5초 후 (선릉)",
+            "barvlDt": "0", "subwayId": "1002", "updnLine": "내선", "btrainNo": "2211"}
+    row = parse_arrival(item)
+    assert row["station_name"] == "강남"
+    assert row["arrival_time_sec"] == 125
+    assert (row["line_id"], row["direction"], row["train_no"]) == ("1002", "내선", "2211")
+
+    item["barvlDt"] = "90"
+    assert parse_arrival(item)["arrival_time_sec"] == 90
+
+
+def test_fill_parsed_fields_keeps_parsed_records():
+    old = {"station_name": "강남", "arrival_message": "[3]번째 전역 (교대)", "arrival_time_sec": "0"}
+    filled = fill_parsed_fields(old)
+    assert (filled["stations_away"], filled["current_station"]) == (3, "교대")
+    assert fill_parsed_fields(filled) is filled
+
+
+def _arrivals(con, etas):
+    base = datetime(2024, 5, 2, 8, 0)
+    rows = [("강남", "2호선", "1002", "내선", f"T{i}", base + timedelta(minutes=m), 0, "arrived", 0, "강남")
+            for i, m in enumerate(etas)]
+    con.execute("""CREATE TABLE arrivals (station_name VARCHAR, train_line VARCHAR, line_id VARCHAR,
+                   direction VARCHAR, train_no VARCHAR, collected_at TIMESTAMP, arrival_time_sec INTEGER,
+                   arrival_state VARCHAR, stations_away INTEGER, current_station VARCHAR)""")
+    con.executemany("INSERT INTO arrivals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def test_headways_flag_bunching_and_gaps():
+    con = duckdb.connect()
+    _arrivals(con, [0, 5, 6, 20])
+    rows = con.execute(f"SELECT train_no, headway_sec, spacing FROM ({headway_sql('arrivals')}) "
+                       "ORDER BY eta").fetchall()
+    assert rows == [("T1", 300, "regular"), ("T2", 60, "bunched"), ("T3", 840, "gap")]
+
+    summary = con.execute(headway_summary_sql("arrivals")).fetchall()
+    assert len(summary) == 1
+    station, line_id, direction, hour, trains, *_, bunched, gaps = summary[0]
+    assert (station, hour, trains, bunched, gaps) == ("강남", 8, 3, 1, 1)
+
+
+def test_train_positions_latest_observation():
+    con = duckdb.connect()
+    _arrivals(con, [0, 5])
+    con.execute("INSERT INTO arrivals VALUES ('역삼', '2호선', '1002', '내선', 'T0', "
+                "TIMESTAMP '2024-05-02 08:02:00', 0, 'arrived', 0, '역삼')")
+    positions = {row[2]: row[4] for row in con.execute(train_positions_sql("arrivals")).fetchall()}
+    assert positions == {"T0": "역삼", "T1": "강남"}
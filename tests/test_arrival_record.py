@@ -0,0 +1,83 @@
+import pytest
+
+from arrival_record import FIELDS, INT_NULL, ArrivalBatch, ArrivalRecord, from_epoch_us, to_epoch_us
+
+ITEM = {"statnNm": "강남역", "trainLineNm": "성수행 - 역삼방면", "arvlMsg2": "[2]번째 전역 (선릉)",
+        "arvlCd": "99", "barvlDt": "240", "subwayId": "1002", "updnLine": "내선", "btrainNo": "2231"}
+
+
+def test_epoch_round_trip():
+    assert from_epoch_us(to_epoch_us("2024-01-01T08:00:00.123456")) == "2024-01-01T08:00:00.123456"
+    assert to_epoch_us(None) is None and from_epoch_us(None) is None
+
+
+def test_record_mapping_protocol():
+    rec = ArrivalRecord.from_api(ITEM, "2024-01-01T08:00:00")
+    assert rec["station_name"] == "강남"
+    assert rec["stations_away"] == 2
+    assert rec.get("arrival_time_sec") == 240
+    assert rec["collected_at"] == "2024-01-01T08:00:00"
+    assert rec.get("collected_at") == "2024-01-01T08:00:00"
+    assert rec.get("unknown", "x") == "x"
+    with pytest.raises(KeyError):
+        rec["unknown"]
+    # {**rec} 는 레코드 필드만 (collected_at 은 저장소/스트림이 따로 붙임)
+    assert list({**rec}) == list(FIELDS)
+    assert ArrivalRecord(station_name="강남").get("collected_at") is None
+
+
+def test_record_dict_round_trip():
+    rec = ArrivalRecord.from_api(ITEM, "2024-01-01T08:00:00")
+    row = rec.to_dict(with_time=True)
+    assert row["collected_at"] == "2024-01-01T08:00:00"
+    assert ArrivalRecord.from_dict(row) == rec
+    assert ArrivalRecord.from_dict(rec.to_dict(), collected_at="2024-01-01T08:00:00") == rec
+
+
+def test_batch_round_trip():
+    records = [ArrivalRecord.from_api({**ITEM, "barvlDt": str(i * 60)}, "2024-01-01T08:00:00") for i in range(3)]
+    records.append(ArrivalRecord(station_name="역삼", collected_at="2024-01-01T08:10:00"))
+
+    batch = ArrivalBatch()
+    batch.extend(records[:3])
+    batch.append(records[3])
+    assert len(batch) == 4
+    assert list(batch) == records
+    assert batch.to_dicts()[3]["collected_at"] == "2024-01-01T08:10:00"
+    assert len(batch.dictionaries["station_name"]) == 2
+    assert batch.nbytes() > 0
+
+
+def test_batch_accepts_dicts_and_overrides():
+    batch = ArrivalBatch()
+    batch.extend([{"train_line": "a", "arrival_time_sec": "30"}, {"train_line": "b"}],
+                 collected_at="2024-01-01T08:00:00", station_name="강남")
+    assert [r.station_name for r in batch] == ["강남", "강남"]
+    assert batch.record(1).arrival_time_sec is None
+    assert batch.ints["arrival_time_sec"][1] == INT_NULL
+
+
+def test_to_pandas_null_handling():
+    import pandas as pd
+
+    batch = ArrivalBatch()
+    batch.append({"station_name": "강남", "arrival_time_sec": 30, "stations_away": None},
+                 collected_at="2024-01-01T08:00:00")
+    batch.append({"station_name": None, "arrival_time_sec": None, "stations_away": 2})
+    df = batch.to_pandas()
+
+    assert isinstance(df["station_name"].dtype, pd.CategoricalDtype)
+    assert df["station_name"].isna().tolist() == [False, True]
+    assert df["arrival_time_sec"].dtype == "Int32"
+    assert df["arrival_time_sec"].isna().tolist() == [False, True]
+    assert df["stations_away"].isna().tolist() == [True, False]
+    assert df["collected_at"].dtype == "datetime64[us]"
+    assert df["collected_at"].isna().tolist() == [False, True]
+    assert df["collected_at"][0] == pd.Timestamp("2024-01-01T08:00:00")
+    assert list(batch.to_pandas(["station_name", "collected_at"]).columns) == ["station_name", "collected_at"]
+
+
+def test_empty_batch_to_pandas():
+    df = ArrivalBatch().to_pandas()
+    assert len(df) == 0
+    assert set(FIELDS) | {"collected_at"} == set(df.columns)
@@ -0,0 +1,62 @@
+import csv
+import glob
+import os
+
+import duckdb
+import pytest
+
+import duckdb_processor
+from duckdb_processor import csv_fingerprint, ensure_baseline
+from time_slots import TIME_SLOTS
+from synthetic import write_passenger_csv
+
+
+def write_csv(rows):
+    with open("data/station_passenger.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["연번", "날짜", "호선", "역번호", "역명", "구분", *TIME_SLOTS])
+        writer.writerows(rows)
+
+
+def test_baseline_values_and_station_ids(workdir):
+    # 2024-01-01 은 공휴일(신정), 01-02 는 평일
+    slots = ["1,000" if s == "08시-09시" else "0" for s in TIME_SLOTS]
+    write_csv([[1, "2024-01-02", "2호선", 222, "강남역", "하차", *slots],
+               [2, "2024-01-02", "2호선", 222, "강남", "승차", *slots],
+               [3, "2024-01-01", "2호선", 222, "강남", "하차", *["7"] * len(TIME_SLOTS)]])
+    con = duckdb.connect()
+    ensure_baseline(con)
+
+    rows = con.execute("""
+        SELECT day_type, avg_passenger FROM baseline
+        WHERE type = '하차' AND hour_int = 8 ORDER BY day_type
+    """).fetchall()
+    assert rows == [(0, 1000), (2, 7)]
+    assert con.execute("SELECT COUNT(DISTINCT station_id) FROM baseline").fetchone()[0] == 1
+
+
+def test_cache_is_reused_until_csv_changes(workdir, monkeypatch):
+    write_passenger_csv("data/station_passenger.csv", n_stations=3, n_days=3)
+    first = ensure_baseline(duckdb.connect())
+    assert first == csv_fingerprint()
+    assert len(glob.glob("data/cache/baseline_*.parquet")) == 1
+    assert len(glob.glob("data/cache/profile_*.npz")) == 1
+
+    # 캐시가 있으면 CSV 를 다시 읽지 않음
+    def fail():
+        raise AssertionError("CSV를 다시 읽었습니다")
+    with monkeypatch.context() as m:
+        m.setattr(duckdb_processor, "load_csv_safely", fail)
+        assert ensure_baseline(duckdb.connect()) == first
+
+    write_passenger_csv("data/station_passenger.csv", n_stations=3, n_days=4)
+    second = ensure_baseline(duckdb.connect())
+    assert second != first
+    # 예전 해시의 캐시는 지워짐
+    assert [os.path.basename(p) for p in glob.glob("data/cache/baseline_*.parquet")] == \
+        [f"baseline_v{duckdb_processor.BASELINE_VERSION}_{second[:16]}.parquet"]
+
+
+def test_missing_csv_raises(workdir):
+    with pytest.raises(FileNotFoundError):
+        ensure_baseline(duckdb.connect())
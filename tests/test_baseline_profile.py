@@ -0,0 +1,113 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from baseline_profile import (HOLIDAY, SATURDAY, WEEKDAY, BaselineProfile, RiskScorer, RiskThresholds, day_type,
+                              day_type_sql)
+
+
+def make_profile():
+    rows = [(1, h, d, 1000.0 + h, 2000.0 + h) for h in range(24) for d in range(3)]
+    rows += [(2, 8, WEEKDAY, 6000.0, 7000.0)]
+    monthly_rows = [(1, 3, 8, WEEKDAY, 5500.0)]
+    return BaselineProfile.from_rows(rows, {"강남": 1, "서울": 2}, monthly_rows)
+
+
+def test_day_type_rules():
+    assert day_type(date(2024, 1, 3)) == WEEKDAY
+    assert day_type("2024-01-06T08:00:00") == SATURDAY
+    assert day_type(date(2024, 1, 7)) == HOLIDAY
+    assert day_type(date(2024, 3, 1)) == HOLIDAY
+
+
+def test_day_type_sql_matches_python():
+    import duckdb
+
+    con = duckdb.connect()
+    days = [date(2024, 1, d) for d in range(1, 15)] + [date(2024, 3, 1), date(2024, 12, 25)]
+    con.execute("CREATE TABLE days (d DATE)")
+    con.executemany("INSERT INTO days VALUES (?)", [[d] for d in days])
+    result = dict(con.execute(f"SELECT d, {day_type_sql('d')} FROM days").fetchall())
+    assert result == {d: day_type(d) for d in days}
+
+
+def test_expected_uses_month_and_falls_back():
+    profile = make_profile()
+    assert profile.expected(1, 8, WEEKDAY) == 1008.0
+    assert profile.expected(1, 8, WEEKDAY, month=3) == 5500.0
+    assert profile.expected(1, 8, WEEKDAY, month=4) == 1008.0
+    assert profile.expected(1, 8, WEEKDAY, "p90", month=3) == 2008.0
+    assert profile.expected(1, 32, WEEKDAY) == 1008.0  # 시간은 24로 나눈 나머지
+    assert profile.expected(99, 8, WEEKDAY) == 0.0
+    assert profile.station_id("서울역") == 2
+    assert profile.station_id("없는역") == 0
+
+
+def test_expected_batch_matches_expected_with_months():
+    profile = make_profile()
+    ids = np.array([1, 1, 1, 2, 99, 1])
+    hours = np.array([8, 8, 8, 8, 8, 32])
+    days = np.array([WEEKDAY] * 6)
+    months = np.array([3, 4, 13, 3, 3, 3])
+    batch = profile.expected_batch(ids, hours, days, months=months)
+    single = [profile.expected(int(i), int(h), int(d), month=int(m)) for i, h, d, m in zip(ids, hours, days, months)]
+    assert batch.tolist() == single
+    assert profile.expected_batch(ids, hours, days).tolist()[0] == 1008.0
+
+
+@pytest.mark.parametrize("statistic", ["mean", "p90"])
+def test_score_batch_matches_score(statistic):
+    scorer = RiskScorer(make_profile(), RiskThresholds(passengers=5000, arrival_sec=60, statistic=statistic))
+    ids, hours, days, secs, months = [1, 1, 2, 2], [8, 8, 8, 8], [WEEKDAY] * 4, [30, 30, 30, 120], [3, 4, 3, 3]
+    expected, risky = scorer.score_batch(ids, hours, days, secs, months)
+    single = [scorer.score(*args) for args in zip(ids, hours, days, secs, months)]
+    assert expected.tolist() == [e for e, _ in single]
+    assert risky.tolist() == [r for _, r in single]
+
+
+def test_profile_save_load_round_trip(tmp_path):
+    profile = make_profile()
+    path = str(tmp_path / "profile.npz")
+    profile.save(path)
+    loaded = BaselineProfile.load(path)
+    assert np.array_equal(loaded.mean, profile.mean)
+    assert np.array_equal(loaded.monthly_mean, profile.monthly_mean, equal_nan=True)
+    assert loaded.aliases == profile.aliases
+
+
+def test_invalid_statistic_rejected():
+    with pytest.raises(ValueError):
+        RiskThresholds(statistic="median")
+
+
+def test_report_sql_and_stream_scorer_agree(workdir, monkeypatch):
+    import duckdb
+
+    from baseline_profile import load_latest_scorer
+    from duckdb_processor import process_data_incremental
+    from synthetic import write_passenger_csv, write_raw_snapshots
+
+    # 두 달치 통계라 월별 평균과 전체 평균이 다름
+    monkeypatch.setenv("RISK_PASSENGERS", "1000")
+    write_passenger_csv("data/station_passenger.csv", n_stations=4, n_days=60)
+    write_raw_snapshots("data/raw", 6, n_stations=4, start="2024-02-05T07:00:00", interval_sec=1800)
+    process_data_incremental("data/metro.duckdb")
+
+    scorer = load_latest_scorer(thresholds=RiskThresholds.from_env())
+    # 같은 (역, 행선지, 메시지)의 열차는 남은 초도 같으므로 적재된 arrivals 와 이어서 남은 초를 가져옴
+    rows = duckdb.connect("data/metro.duckdb").execute("""
+        SELECT DISTINCT r.station_name, CAST(r.collected_at AS VARCHAR), a.arrival_time_sec,
+               r.expected_alighting, r.risk_level
+        FROM congestion_report r
+        JOIN arrivals a
+            ON a.collected_at = r.collected_at AND a.station_name = r.station_name
+            AND a.train_line = r.train_line AND a.arrival_message = r.arrival_message
+    """).fetchall()
+    assert rows
+    for station, collected_at, arrival_sec, expected, risk_level in rows:
+        record = {"station_name": station, "collected_at": collected_at.replace(" ", "T"),
+                  "arrival_time_sec": arrival_sec}
+        stream_expected, risky = scorer.score_record(record)
+        assert int(stream_expected) == expected
+        assert risky == (risk_level != "✅ 정상")
@@ -0,0 +1,51 @@
+import glob
+import os
+
+from batch_pipeline import history_fingerprint, load_manifest, run_batch
+from synthetic import write_passenger_csv
+
+
+def write_months(folder: str):
+    write_passenger_csv(os.path.join(folder, "2024-01.csv"), n_stations=3, n_days=3, start_date="2024-01-01")
+    write_passenger_csv(os.path.join(folder, "2024-02.csv"), n_stations=3, n_days=3, start_date="2024-02-01")
+
+
+def test_batch_is_idempotent_and_partitions_by_month(workdir):
+    write_months("monthly")
+    result = run_batch("monthly", history_dir="hist", workers=2, merge=False)
+    assert len(result["processed"]) == 2 and not result["failed"]
+    assert sorted(os.path.basename(p) for p in glob.glob("hist/month=*")) == ["month=202401", "month=202402"]
+    assert len(load_manifest("hist")) == 2
+
+    again = run_batch("monthly", history_dir="hist", workers=2, merge=False)
+    assert again["processed"] == [] and len(again["skipped"]) == 2
+
+
+def test_changed_file_replaces_its_old_partition(workdir):
+    write_months("monthly")
+    run_batch("monthly", history_dir="hist", workers=1, merge=False)
+    before = history_fingerprint("hist")
+    write_passenger_csv("monthly/2024-01.csv", n_stations=3, n_days=3, seed=1, start_date="2024-01-01")
+
+    result = run_batch("monthly", history_dir="hist", workers=1, merge=False)
+    assert [os.path.basename(p) for p in result["processed"]] == ["2024-01.csv"]
+    assert len(glob.glob("hist/month=202401/*.parquet")) == 1
+    assert history_fingerprint("hist") != before
+
+
+def test_merge_builds_baseline_from_given_history_dir(workdir):
+    import duckdb
+    from duckdb_processor import ensure_baseline
+
+    # data/station_passenger.csv 가 없으므로 history_dir 이 전달되지 않으면 CSV 를 찾다가 실패함
+    write_months("monthly")
+    run_batch("monthly", history_dir="hist", workers=1)
+    assert not os.path.exists(os.path.join("data", "stats", "passenger"))
+    caches = glob.glob("data/cache/baseline_*.parquet")
+    assert len(caches) == 1
+
+    con = duckdb.connect()
+    assert ensure_baseline(con, "hist") == history_fingerprint("hist")
+    months = {row[0] for row in con.execute(
+        f"SELECT DISTINCT month FROM read_parquet('{caches[0]}') WHERE month IS NOT NULL").fetchall()}
+    assert months == {1, 2}
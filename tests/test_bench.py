@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import shutil
+
+from synthetic import write_passenger_csv, write_raw_snapshots
+
+
+def test_synthetic_csv_mixes_thousands_separators(workdir):
+    write_passenger_csv("data/station_passenger.csv", n_stations=10, n_days=3)
+    with open("data/station_passenger.csv", encoding="utf-8") as f:
+        assert '"' in f.read()  # 콤마가 들어간 값은 따옴표로 감싸짐
+
+
+def test_load_csv_safely_reads_mixed_slot_columns_as_text(workdir):
+    from duckdb_processor import load_csv_safely
+
+    write_passenger_csv("data/station_passenger.csv", n_stations=10, n_days=3)
+    df = load_csv_safely()
+    assert {str(dtype) for dtype in df.dtypes} == {"object"}
+
+
+def test_run_bench_smoke(workdir, monkeypatch):
+    """작은 크기로 벤치마크 전 단계를 실행 (결과 파일은 저장하지 않음)"""
+    import run_bench
+
+    monkeypatch.setenv("SEOUL_API_KEY", "bench-key")
+    args = argparse.Namespace(stations=3, days=2, snapshots=2, repeat=1, latency=0.0, error_rate=0.0)
+    try:
+        report = run_bench.run_benchmarks(args)
+    finally:
+        bench_dir = os.getcwd()
+        os.chdir(workdir)
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+    stages = report["stages"]
+    for name in ("fetch_sequential", "fetch_concurrent", "process_csv_data", "realtime_json_scan",
+                 "duckdb_join", "add_coords", "tableau_csv_export", "risk_score_batch"):
+        assert "min_sec" in stages[name], (name, stages[name])
+    assert report["params"]["arrival_rows"] > 0
+
+
+def test_synthetic_snapshots_keep_inner_station_characters(tmp_path):
+    write_raw_snapshots(str(tmp_path), 1, n_stations=10)
+    (path,) = tmp_path.iterdir()
+    names = {a["station_name"] for a in json.loads(path.read_text(encoding="utf-8"))["arrivals"]}
+    assert {"서울", "역삼"} <= names
@@ -0,0 +1,65 @@
+import json
+
+import pyarrow.parquet as pq
+
+import bulk_loader
+from bulk_loader import CardSubwayTimeBulkLoader, month_range
+
+
+class FakeStatsApi:
+    """CardSubwayTime 페이지 응답 흉내 (fail_pages 에 있는 페이지는 오류 응답)"""
+
+    def __init__(self, total: int, fail_pages=()):
+        self.total = total
+        self.fail_pages = set(fail_pages)
+        self.calls = []
+
+    def get_passenger_stats(self, date, start_index=1, end_index=100):
+        page = (start_index - 1) // bulk_loader.PAGE_SIZE + 1
+        self.calls.append(page)
+        if page in self.fail_pages:
+            return {"RESULT": {"CODE": "ERROR-500"}}
+        rows = [{"USE_MON": date, "SUB_STA_NM": f"역{i}", "HR_7_GET_ON_NUM": str(i)}
+                for i in range(start_index, min(end_index, self.total) + 1)]
+        return {"CardSubwayTime": {"list_total_count": self.total, "row": rows}}
+
+
+def test_month_range_crosses_year():
+    assert month_range("202311", "202402") == ["202311", "202312", "202401", "202402"]
+
+
+def test_resume_reads_checkpoint_and_skips_saved_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_loader, "PAGE_SIZE", 10)
+    month_dir = tmp_path / "month=202401"
+
+    api = FakeStatsApi(total=35, fail_pages={3})
+    loader = CardSubwayTimeBulkLoader(api=api, output_dir=str(tmp_path), max_workers=2)
+    assert loader.load_month("202401") == 3
+    assert not (month_dir / "_SUCCESS").exists()
+    assert json.loads((month_dir / "_checkpoint.json").read_text()) == {"month": "202401", "total": 35, "pages": 4}
+
+    # 다시 실행: 첫 페이지와 저장된 페이지는 요청하지 않고 실패한 페이지만 수집
+    api.fail_pages.clear()
+    api.calls.clear()
+    assert loader.load_month("202401") == 1
+    assert api.calls == [3]
+    assert (month_dir / "_SUCCESS").exists()
+
+    table = pq.read_table(sorted(month_dir.glob("part-*.parquet")))
+    assert table.num_rows == 35
+    assert str(table.schema.field("HR_7_GET_ON_NUM").type) == "int64"
+
+    api.calls.clear()
+    assert loader.load_month("202401") == 0
+    assert api.calls == []
+
+
+def test_checkpoint_of_other_month_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_loader, "PAGE_SIZE", 10)
+    month_dir = tmp_path / "month=202402"
+    month_dir.mkdir()
+    (month_dir / "_checkpoint.json").write_text(json.dumps({"month": "202401", "total": 5, "pages": 1}))
+
+    api = FakeStatsApi(total=15)
+    CardSubwayTimeBulkLoader(api=api, output_dir=str(tmp_path)).load_month("202402")
+    assert sorted(api.calls) == [1, 2]
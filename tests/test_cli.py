@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from cli import build_parser, main
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def test_parser_requires_command():
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+    args = build_parser().parse_args(["diagnose", "--quick", "--max-age", "5"])
+    assert (args.quick, args.max_age, args.func.__name__) == (True, 5.0, "cmd_diagnose")
+
+
+def test_diagnose_quick_without_data_fails(workdir, capsys):
+    assert main(["diagnose", "--quick"]) == 1
+    assert "수집된 실시간 데이터가 없습니다" in capsys.readouterr().out
+
+
+def test_diagnose_quick_reports_stale_and_fresh(workdir):
+    raw = workdir / "data" / "raw"
+    raw.mkdir()
+    path = raw / "arrivals_20240502_080000.json"
+    path.write_text("[]", encoding="utf-8")
+    assert main(["diagnose", "--quick"]) == 0
+
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    assert main(["diagnose", "--quick", "--max-age", "30"]) == 1
+
+
+def test_stats_missing_csv(workdir):
+    assert main(["stats", "--csv", "data/none.csv"]) == 1
+
+
+def test_diagnose_quick_does_not_import_heavy_libraries(tmp_path):
+    code = ("import sys; import cli; cli.main(['diagnose', '--quick']); "
+            "print(sorted(m for m in ('pandas', 'duckdb', 'numpy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                         env={**os.environ, "PYTHONPATH": SRC}, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,75 @@
+import time
+
+from api_client import SeoulMetroAPI
+from key_pool import ApiKeyPool
+from mock_server import MockMetroServer
+
+
+def make_api(tmp_path, delays: dict) -> SeoulMetroAPI:
+    api = SeoulMetroAPI(key_pool=ApiKeyPool(["k"], daily_limit=1000, state_dir=str(tmp_path)))
+
+    def fake_info(station, timeout=10):
+        time.sleep(delays.get(station, 0))
+        return {} if station == "빈역" else {"realtimeArrivalList": [{"statnNm": station}]}
+
+    api.get_arrival_info = fake_info
+    return api
+
+
+def test_concurrent_fetch_overlaps_requests_and_keeps_order(tmp_path):
+    stations = ["a", "b", "c", "d"]
+    api = make_api(tmp_path, {s: 0.2 for s in stations})
+    start = time.perf_counter()
+    results = api.get_multiple_stations(stations, concurrent=True)
+    assert time.perf_counter() - start < 0.6
+    assert [r["station"] for r in results] == stations
+
+
+def test_deadline_drops_slow_stations(tmp_path):
+    api = make_api(tmp_path, {"느린역": 2.0})
+    start = time.perf_counter()
+    results = api.get_multiple_stations(["강남", "느린역", "빈역", "역삼"], deadline=0.3)
+    assert time.perf_counter() - start < 1.0
+    assert [r["station"] for r in results] == ["강남", "역삼"]
+
+
+def test_sequential_mode_skips_empty_responses(tmp_path):
+    api = make_api(tmp_path, {})
+    assert [r["station"] for r in api.get_multiple_stations(["강남", "빈역"], concurrent=False)] == ["강남"]
+
+
+def test_fetch_against_mock_server(tmp_path, monkeypatch):
+    server = MockMetroServer(n_stations=5).start()
+    try:
+        monkeypatch.setattr(SeoulMetroAPI, "BASE_URL_REALTIME", server.realtime_url)
+        api = SeoulMetroAPI(key_pool=ApiKeyPool(["k"], daily_limit=1000, state_dir=str(tmp_path)))
+        records = api.get_arrival_records(["서울", "강남", "홍대입구"], collected_at="2024-01-01T08:00:00")
+    finally:
+        server.stop()
+    assert set(records) == {"서울", "강남", "홍대입구"}
+    assert server.request_count == 3
+    rec = records["강남"][0]
+    assert rec.station_name == "강남"
+    assert rec["collected_at"] == "2024-01-01T08:00:00"
+    assert isinstance(rec.arrival_time_sec, int)
+
+
+def test_workers_never_exceed_connection_pool(tmp_path):
+    import threading
+
+    api = SeoulMetroAPI(key_pool=ApiKeyPool(["k"], daily_limit=1000, state_dir=str(tmp_path)), max_workers=2)
+    assert api.session.get_adapter("https://").poolmanager.connection_pool_kw["maxsize"] == 2
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_info(station, timeout=10):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {"realtimeArrivalList": [{"statnNm": station}]}
+
+    api.get_arrival_info = fake_info
+    assert len(api.get_multiple_stations([str(i) for i in range(8)], max_workers=32)) == 8
+    assert peak[0] <= 2
@@ -0,0 +1,84 @@
+import gzip
+import json
+
+from delta_store import (DeltaWriter, delta_partition_files, iter_changes, iter_events, iter_snapshots,
+                         snapshot_at, store_stats)
+
+
+def _arrival(train_no, seconds, station="강남"):
+    return {"station_name": station, "train_line": "성수행", "arrival_message": f"{seconds}초 후",
+            "arrival_time_sec": seconds, "stations_away": 1, "current_station": "역삼",
+            "arrival_state": "running", "line_id": "1002", "direction": "내선", "train_no": train_no}
+
+
+TICKS = [
+    ("2024-05-02T08:00:00", [_arrival("A", 120), _arrival("B", 300)]),
+    ("2024-05-02T08:00:30", [_arrival("A", 90), _arrival("B", 300)]),
+    ("2024-05-02T08:01:00", [_arrival("A", 90), _arrival("B", 300)]),
+    ("2024-05-02T08:01:30", [_arrival("B", 240)]),
+]
+
+
+def _write(store_dir, keyframe_every=30):
+    writer = DeltaWriter(str(store_dir), keyframe_every=keyframe_every)
+    counts = [writer.append(t, arrivals) for t, arrivals in TICKS]
+    return writer, counts
+
+
+def test_only_changes_are_written(tmp_path):
+    writer, counts = _write(tmp_path)
+    assert counts == [2, 1, 0, 2]
+    assert writer.written["key"] == 1 and writer.written["unchanged"] == 1
+    (path,) = delta_partition_files(str(tmp_path))
+    kinds = [event["kind"] for event in iter_events(path)]
+    assert kinds == ["key", "delta", "delta", "delta"]
+
+
+def test_snapshots_round_trip(tmp_path):
+    _write(tmp_path)
+    (path,) = delta_partition_files(str(tmp_path))
+    restored = list(iter_snapshots(path))
+    assert [t for t, _ in restored] == [t for t, _ in TICKS]
+    for (_, records), (t, arrivals) in zip(restored, TICKS):
+        assert sorted(records, key=lambda r: r["train_no"]) == [{**a, "collected_at": t} for a in arrivals]
+
+    assert [r["arrival_time_sec"] for r in snapshot_at("강남", "2024-05-02T08:00:45", str(tmp_path))] == [90, 300]
+    assert snapshot_at("역삼", "2024-05-02T08:00:45", str(tmp_path)) == []
+
+
+def test_changes_and_after(tmp_path):
+    _write(tmp_path)
+    (path,) = delta_partition_files(str(tmp_path))
+    changes = list(iter_changes(path, after="2024-05-02T08:00:00"))
+    assert [(t, [r["train_no"] for r in upsert], deleted) for t, upsert, deleted in changes] == [
+        ("2024-05-02T08:00:30", ["A"], []),
+        ("2024-05-02T08:01:30", ["B"], ["1002|내선|A"]),
+    ]
+
+
+def test_keyframes_every_n_ticks_and_stats(tmp_path):
+    writer, _ = _write(tmp_path, keyframe_every=2)
+    (path,) = delta_partition_files(str(tmp_path))
+    assert [event["kind"] for event in iter_events(path)] == ["key", "delta", "delta", "key"]
+    stats = store_stats(str(tmp_path))
+    assert stats["ticks"] == 4 and stats["keyframes"] == 2
+    assert stats["full_rows"] == 7 and stats["stored_rows"] < stats["full_rows"]
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    _write(tmp_path)
+    (path,) = delta_partition_files(str(tmp_path))
+    with gzip.open(path, "ab") as f:
+        f.write(json.dumps({"t": "2024-05-02T08:02:00"}).encode("utf-8")[:10])
+    assert len(list(iter_snapshots(path))) == len(TICKS)
+
+
+def test_empty_response_deletes_previous_trains(tmp_path):
+    writer = DeltaWriter(str(tmp_path))
+    writer.append("2024-05-02T08:00:00", [_arrival("A", 120), _arrival("B", 60, station="역삼")])
+    assert writer.append("2024-05-02T08:00:30", [_arrival("B", 30, station="역삼")],
+                         stations=["강남", "역삼", "선릉"]) == 2
+    assert snapshot_at("강남", "2024-05-02T08:00:45", str(tmp_path)) == []
+    assert len(snapshot_at("역삼", "2024-05-02T08:00:45", str(tmp_path))) == 1
+    # 열차를 본 적 없는 역의 빈 응답은 파일을 만들지 않음
+    assert len(delta_partition_files(str(tmp_path))) == 2
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from diagnostics import print_diagnostics, run_diagnostics, sniff_encoding
+from synthetic import write_passenger_csv, write_raw_snapshots
+
+HEADER = "연번,날짜,호선,역번호,역명,구분,06시 이전\n"
+
+
+@pytest.mark.parametrize("encoding, bom", [("utf-8-sig", True), ("cp949", False)])
+def test_sniff_encoding(tmp_path, encoding, bom):
+    path = tmp_path / "stats.csv"
+    path.write_bytes((HEADER + "1,2024-01-01,2호선,222,강남,하차,10\n").encode(encoding))
+    result = sniff_encoding(str(path))
+    assert (result["encoding"], result["bom"], result["header_ok"], result["header_columns"]) == (
+        encoding, bom, True, 7)
+
+
+def test_sniff_encoding_ignores_truncated_tail(tmp_path):
+    path = tmp_path / "stats.csv"
+    data = HEADER.encode("utf-8")
+    path.write_bytes(data + "강남".encode("utf-8"))
+    assert sniff_encoding(str(path), sample_bytes=len(data) + 2)["encoding"] == "utf-8-sig"
+
+    path.write_bytes("날짜,역명\n".encode("utf-8"))
+    assert sniff_encoding(str(path))["header_ok"] is False
+
+
+def test_run_diagnostics_on_raw_snapshots(workdir, capsys):
+    write_passenger_csv("data/station_passenger.csv", n_stations=5, n_days=14)
+    total = write_raw_snapshots("data/raw", n_snapshots=6, n_stations=5, start="2024-01-02T07:00:00")
+    with open("data/raw/arrivals_20240102_070500.json", "w", encoding="utf-8") as f:
+        json.dump({"collected_at": "2024-01-02T07:05:00", "arrivals": [
+            {"station_name": "없는역", "train_line": "성수행", "arrival_message": "전역 도착", "arrival_time_sec": "60"},
+            {"station_name": "", "train_line": "성수행", "arrival_message": "", "arrival_time_sec": "-5"},
+        ]}, f, ensure_ascii=False)
+
+    result = run_diagnostics(station="서울역")
+    assert result["rows"] == total + 2
+    assert sum(result["by_status"].values()) == result["rows"]
+    assert result["by_status"]["matched"] == total
+    assert result["by_status"]["station_missing"] == 1 and result["by_status"]["invalid_key"] == 1
+    assert [row["station_name"] for row in result["missing_stations"]] == ["없는역"]
+    assert result["columns"]["arrival_time_sec"]["invalid"] == 1
+    assert result["csv"]["encoding"] == "utf-8-sig"
+    assert result["station"] and all(row["status"] == "matched" for row in result["station"])
+
+    with open("data/diagnostics.json", encoding="utf-8") as f:
+        assert json.load(f)["coverage"] == result["coverage"]
+    print_diagnostics(result)
+    assert "조인 커버리지" in capsys.readouterr().out
+
+
+def test_run_diagnostics_without_data(workdir):
+    with pytest.raises(ValueError):
+        run_diagnostics()
@@ -0,0 +1,49 @@
+import duckdb
+
+from duckdb_processor import init_database, ingest_new_snapshots
+from snapshot_store import append_snapshot, compact_raw_json
+from synthetic import write_raw_snapshots
+
+ROWS = [{"station_name": "강남", "train_line": "성수행", "arrival_message": "전역 도착", "arrival_time_sec": 60},
+        {"station_name": "역삼", "train_line": "성수행", "arrival_message": "[2]번째 전역 (선릉)", "arrival_time_sec": 180}]
+
+
+def open_db():
+    con = duckdb.connect("data/metro.duckdb")
+    init_database(con)
+    return con
+
+
+def test_store_partitions_are_ingested_once(workdir):
+    append_snapshot("2024-01-01T08:00:00", ROWS)
+    con = open_db()
+    assert ingest_new_snapshots(con) == 2
+    assert ingest_new_snapshots(con) == 0
+
+    # 같은 파티션 파일에 이어 쓴 틱만 새로 적재
+    append_snapshot("2024-01-01T08:10:00", ROWS)
+    assert ingest_new_snapshots(con) == 2
+    assert con.execute("SELECT COUNT(*) FROM arrivals").fetchone()[0] == 4
+    assert con.execute("SELECT COUNT(*) FROM arrivals WHERE station_id IS NULL").fetchone()[0] == 0
+
+
+def test_raw_files_moved_into_store_are_not_duplicated(workdir):
+    rows = write_raw_snapshots("data/raw", 2, n_stations=2)
+    con = open_db()
+    assert ingest_new_snapshots(con) == rows
+
+    # 적재한 원본을 저장소로 합쳐도 같은 (역, 수집시각) 스냅샷은 다시 들어가지 않음
+    compact_raw_json()
+    assert ingest_new_snapshots(con) == 0
+    assert con.execute("SELECT COUNT(*) FROM arrivals").fetchone()[0] == rows
+
+
+def test_database_persists_between_connections(workdir):
+    append_snapshot("2024-01-01T08:00:00", ROWS)
+    con = open_db()
+    ingest_new_snapshots(con)
+    con.close()
+
+    con = open_db()
+    assert ingest_new_snapshots(con) == 0
+    assert con.execute("SELECT COUNT(*) FROM arrivals").fetchone()[0] == 2
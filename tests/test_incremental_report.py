@@ -0,0 +1,39 @@
+import glob
+
+from synthetic import write_passenger_csv, write_raw_snapshots
+
+REPORT_COLUMNS = ["역명", "행선지", "실시간_상태", "현재시간_예상하차인원(명)", "플랫폼_위험도"]
+
+
+def make_data(n_snapshots: int = 3, start: str = "2024-01-01T08:00:00"):
+    write_passenger_csv("data/station_passenger.csv", n_stations=4, n_days=7)
+    return write_raw_snapshots("data/raw", n_snapshots, n_stations=4, start=start)
+
+
+def test_incremental_run_without_new_data_returns_empty_frame(workdir):
+    from duckdb_processor import process_data_incremental
+
+    rows = make_data()
+    first = process_data_incremental("data/metro.duckdb")
+    assert len(first) == rows
+    assert list(first.columns) == REPORT_COLUMNS
+    assert glob.glob("data/report/date=2024-01-01/part-*.parquet")
+
+    second = process_data_incremental("data/metro.duckdb")
+    assert len(second) == 0
+    assert list(second.columns) == REPORT_COLUMNS
+
+
+def test_incremental_run_only_reports_new_snapshots(workdir):
+    import duckdb
+    from duckdb_processor import process_data_incremental
+
+    make_data(n_snapshots=2)
+    process_data_incremental("data/metro.duckdb")
+    added = write_raw_snapshots("data/raw", 1, n_stations=4, start="2024-01-02T09:00:00")
+    assert len(process_data_incremental("data/metro.duckdb")) == added
+
+    con = duckdb.connect()
+    parquet_rows = con.execute("SELECT COUNT(*) FROM read_parquet('data/report/*/*.parquet')").fetchone()[0]
+    db_rows = duckdb.connect("data/metro.duckdb").execute("SELECT COUNT(*) FROM congestion_report").fetchone()[0]
+    assert parquet_rows == db_rows
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from key_pool import ApiKeyPool, key_label
+from sharding import ConsistentHashRing, shard_from_env, shard_stations
+
+
+def test_acquire_balances_keys_and_stops_at_limit(tmp_path):
+    pool = ApiKeyPool(["k1", "k2"], daily_limit=5, state_dir=str(tmp_path), reserve=0)
+    keys = [pool.acquire() for _ in range(10)]
+    assert sorted(keys) == ["k1"] * 5 + ["k2"] * 5
+    assert pool.acquire() is None
+    assert pool.remaining() == 0 and pool.daily_limit == 10
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == sorted(f"quota_{key_label(k)}.json" for k in ("k1", "k2"))
+
+
+def test_acquire_is_thread_safe(tmp_path):
+    pool = ApiKeyPool(["k1", "k2", "k3"], daily_limit=30, state_dir=str(tmp_path), reserve=0)
+    got = []
+    threads = [threading.Thread(target=lambda: got.extend(pool.acquire() for _ in range(40))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(k is not None for k in got) == 90
+    assert all(remaining == 0 for remaining in pool.status().values())
+
+
+def test_mark_exhausted_skips_key(tmp_path):
+    pool = ApiKeyPool(["k1", "k2"], daily_limit=100, state_dir=str(tmp_path), reserve=0)
+    pool.mark_exhausted("k1")
+    assert {pool.acquire() for _ in range(5)} == {"k2"}
+
+
+def test_single_key_keeps_legacy_state_file(tmp_path):
+    ApiKeyPool(["only"], daily_limit=10, state_dir=str(tmp_path), reserve=0).acquire()
+    assert [p.name for p in tmp_path.glob("*.json")] == ["quota.json"]
+    with pytest.raises(ValueError):
+        ApiKeyPool([" ", ""])
+
+
+def test_from_env_shards_keys(monkeypatch, tmp_path):
+    monkeypatch.setenv("SEOUL_API_KEYS", "a,b,c,d")
+    pool = ApiKeyPool.from_env(shard_index=1, shard_count=2, state_dir=str(tmp_path))
+    assert pool.keys == ["b", "d"]
+    monkeypatch.setenv("SEOUL_API_KEYS", "a")
+    assert ApiKeyPool.from_env(shard_index=1, shard_count=2, state_dir=str(tmp_path)).keys == ["a"]
+
+
+def test_shard_stations_partition_and_stability(monkeypatch):
+    stations = [f"역{i}" for i in range(300)]
+    shards = [shard_stations(stations, i, 3) for i in range(3)]
+    assert sorted(st for shard in shards for st in shard) == sorted(stations)
+    assert all(60 <= len(shard) <= 140 for shard in shards)
+
+    # 수집기가 하나 늘어도 대부분의 역은 담당이 그대로
+    before, after = ConsistentHashRing(range(3)), ConsistentHashRing(range(4))
+    moved = sum(before.node_for(st) != after.node_for(st) for st in stations)
+    assert moved < len(stations) / 2
+
+    # 표기가 달라도 같은 수집기
+    assert (shard_stations(["서울역"], 0, 3) == ["서울역"]) == (shard_stations(["서울"], 0, 3) == ["서울"])
+
+    monkeypatch.setenv("COLLECTOR_SHARD_COUNT", "2")
+    monkeypatch.setenv("COLLECTOR_SHARD_INDEX", "2")
+    with pytest.raises(ValueError):
+        shard_from_env()
+
+
+def test_quota_saves_in_batches(tmp_path):
+    from scheduler import QuotaTracker
+
+    path = tmp_path / "quota.json"
+    quota = QuotaTracker(1000, state_path=str(path), reserve=0)
+    quota.spend()  # 첫 호출은 바로 저장
+    for _ in range(QuotaTracker.SAVE_EVERY - 1):
+        quota.spend()
+    assert QuotaTracker(1000, state_path=str(path), reserve=0).spent == 1
+    quota.spend()
+    assert QuotaTracker(1000, state_path=str(path), reserve=0).spent == QuotaTracker.SAVE_EVERY + 1
+    quota.spend(3)
+    quota.flush()
+    assert QuotaTracker(1000, state_path=str(path), reserve=0).spent == QuotaTracker.SAVE_EVERY + 4
+
+
+def _spend_many(path, calls):
+    from scheduler import QuotaTracker
+
+    quota = QuotaTracker(10 ** 6, state_path=path, reserve=0)
+    for _ in range(calls):
+        quota.spend()
+    quota.flush()
+
+
+def test_quota_counts_merge_across_processes(tmp_path):
+    import multiprocessing
+
+    from scheduler import QuotaTracker
+
+    path = str(tmp_path / "quota.json")
+    procs = [multiprocessing.Process(target=_spend_many, args=(path, 95)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+    assert QuotaTracker(10 ** 6, state_path=path, reserve=0).spent == 380
@@ -0,0 +1,110 @@
+import json
+import logging
+
+from metrics import Registry, log_event
+
+
+def test_counter_gauge_histogram_export():
+    registry = Registry()
+    calls = registry.counter("calls_total", "호출 수")
+    calls.inc(station="강남")
+    calls.inc(2, station="강남")
+    registry.gauge("quota_remaining").set(42)
+    latency = registry.histogram("latency_seconds", buckets=(0.1, 1))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert registry.counter("calls_total") is calls
+    text = registry.to_prometheus()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{station="강남"} 3' in text
+    assert "quota_remaining 42" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+    samples = registry.to_json()["calls_total"]
+    assert samples == [{"labels": {"station": "강남"}, "value": 3, "sample": "calls_total"}]
+
+
+def test_histogram_time_records_duration():
+    registry = Registry()
+    stage = registry.histogram("stage_seconds")
+    with stage.time(stage="load"):
+        pass
+    count = [s for s in stage.samples() if s[0] == "stage_seconds_count"]
+    assert count == [("stage_seconds_count", (("stage", "load"),), None, 1)]
+
+
+def test_write_files(tmp_path):
+    registry = Registry()
+    registry.counter("rows_total").inc(10)
+    registry.write_files(str(tmp_path / "out"))
+    assert "rows_total 10" in (tmp_path / "out" / "metrics.prom").read_text(encoding="utf-8")
+    data = json.loads((tmp_path / "out" / "metrics.json").read_text(encoding="utf-8"))
+    assert data["rows_total"][0]["value"] == 10
+    assert not list((tmp_path / "out").glob("*.tmp"))
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(name, level):
+    logger = logging.getLogger(f"metro.test.{name}")
+    logger.setLevel(level)
+    logger.propagate = False
+    handler = _Capture()
+    logger.handlers = [handler]
+    return logger, handler
+
+
+def test_log_event_skips_disabled_level():
+    logger, handler = _logger("disabled", logging.WARNING)
+
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("비활성 레벨에서 필드를 포맷함")
+
+    log_event(logger, logging.DEBUG, "무시", value=Exploding())
+    assert handler.records == []
+
+
+def test_log_event_text_and_json_fields(monkeypatch):
+    logger, handler = _logger("fields", logging.INFO)
+    monkeypatch.delenv("LOG_FORMAT", raising=False)
+    log_event(logger, logging.INFO, "호출", station="강남", message="겹치는 이름")
+    assert handler.records[-1].getMessage() == "호출 station=강남 message=겹치는 이름"
+
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    log_event(logger, logging.INFO, "호출", station="강남", level="x")
+    record = handler.records[-1]
+    assert record.getMessage() == "호출"
+    assert record.fields == {"station": "강남", "level": "x"}
+
+
+def test_prometheus_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("errors_total").inc(error='bad "key"\\path\nnext')
+    assert 'errors_total{error="bad \\"key\\"\\\\path\\nnext"} 1' in registry.to_prometheus()
+
+
+def test_progress_output_goes_through_logging(workdir, caplog):
+    from snapshot_store import compact_raw_json
+
+    logger = logging.getLogger("metro")
+    propagate, logger.propagate = logger.propagate, True
+    try:
+        with caplog.at_level(logging.INFO, logger="metro"):
+            compact_raw_json()
+    finally:
+        logger.propagate = propagate
+    assert any(r.name == "metro.snapshot_store" and r.fields == {"rows": 0, "store_dir": "data/store/arrivals"}
+               for r in caplog.records)
@@ -0,0 +1,84 @@
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from query_service import CongestionView, make_handler
+from stream import CongestionState
+
+
+@pytest.fixture
+def service():
+    state = CongestionState({"강남": [6000] * 24, "역삼": [100] * 24})
+    state.update_many([
+        {"station_name": "강남", "collected_at": "2024-01-01T08:00:00", "arrival_time_sec": 30},
+        {"station_name": "역삼", "collected_at": "2024-01-01T08:00:00", "arrival_time_sec": 30},
+        {"station_name": "서울", "collected_at": "2024-01-01T08:00:00", "arrival_time_sec": 300},
+    ])
+    view = CongestionView()
+    view.refresh(state)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(view))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(path):
+        url = f"http://127.0.0.1:{server.server_address[1]}{urllib.parse.quote(path, safe='/?=&')}"
+        try:
+            with urllib.request.urlopen(url) as resp:
+                return resp.status, resp.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode("utf-8")
+
+    yield view, state, get
+    server.shutdown()
+    server.server_close()
+
+
+def test_health_and_station_lookup(service):
+    view, state, get = service
+    status, body = get("/health")
+    assert status == 200 and json.loads(body) == {"status": "ok", "updated_at": "2024-01-01T08:00:00", "stations": 3}
+
+    status, body = get("/stations/강남역")  # 어떤 표기로 물어도 같은 역
+    assert status == 200
+    assert json.loads(body)["risk_count"] == 1
+
+    assert get("/stations/없는역")[0] == 404
+
+
+def test_top_ranking_and_bad_input(service):
+    view, state, get = service
+    status, body = get("/top?n=2")
+    assert [s["station_name"] for s in json.loads(body)["stations"]] == ["강남", "역삼"]
+    assert get("/top?n=abc")[0] == 400
+    assert get("/nope")[0] == 404
+
+
+def test_refresh_swaps_snapshot(service):
+    view, state, get = service
+    before = view.get()
+    state.update({"station_name": "역삼", "collected_at": "2024-01-01T08:05:00", "arrival_time_sec": 30})
+    view.refresh(state)
+    assert before["updated_at"] == "2024-01-01T08:00:00"
+    assert json.loads(get("/snapshot")[1])["updated_at"] == "2024-01-01T08:05:00"
+
+
+def test_metrics_endpoints(service):
+    view, state, get = service
+    status, body = get("/metrics")
+    assert status == 200 and "# TYPE" in body
+    assert get("/metrics.json")[0] == 200
+
+
+def test_station_response_includes_directions(service):
+    view, state, get = service
+    state.update({"station_name": "강남", "collected_at": "2024-01-01T08:05:00", "arrival_time_sec": 30,
+                  "line_id": "1002", "direction": "외선"})
+    view.refresh(state)
+    body = json.loads(get("/stations/강남")[1])
+    assert body["directions"][0]["direction"] == "외선"
+    assert body["trains"][0]["direction"] == "외선"
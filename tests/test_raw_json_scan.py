@@ -0,0 +1,39 @@
+import json
+
+import duckdb
+
+from duckdb_processor import raw_json_scan_sql
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        if isinstance(data, str):
+            f.write(data)
+        else:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def test_scan_unnests_and_skips_empty_and_broken_files(workdir):
+    (workdir / "data" / "raw").mkdir()
+    write("data/raw/arrivals_20240101_080000.json", {
+        "collected_at": "2024-01-01T08:00:00",
+        "arrivals": [
+            {"station_name": " 강남 ", "train_line": "성수행", "arrival_message": "전역 도착", "arrival_time_sec": "60"},
+            {"station_name": "역삼", "train_line": "성수행", "arrival_message": "[2]번째 전역 (선릉)",
+             "arrival_time_sec": "abc", "stations_away": 2, "arrival_state": "running"},
+        ]})
+    write("data/raw/arrivals_20240101_081000.json", {"collected_at": "2024-01-01T08:10:00", "arrivals": []})
+    write("data/raw/arrivals_20240101_082000.json", "{broken")
+
+    rows = duckdb.connect().execute(f"""
+        SELECT station_name, arrival_time_sec, stations_away, arrival_state, collected_at
+        FROM ({raw_json_scan_sql()}) ORDER BY station_name
+    """).fetchall()
+    assert [r[:4] for r in rows] == [("강남", 60, None, None), ("역삼", None, 2, "running")]
+    assert str(rows[0][4]) == "2024-01-01 08:00:00"
+
+
+def test_scan_explicit_file_list_with_quotes(workdir):
+    path = str(workdir / "it's.json")
+    write(path, {"collected_at": "2024-01-01T08:00:00", "arrivals": [{"station_name": "강남"}]})
+    assert duckdb.connect().execute(f"SELECT COUNT(*) FROM ({raw_json_scan_sql([path])})").fetchone()[0] == 1
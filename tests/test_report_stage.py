@@ -0,0 +1,73 @@
+import glob
+
+import duckdb
+import pandas as pd
+import pytest
+
+from report_stage import compact_report, export_tableau_csv, rebuild_report, report_scan_sql, write_report
+
+REPORT_SELECT = """
+    SELECT * FROM (VALUES
+        ('2024-05-01 08:00:00', 1, '강남', '성수행', '전역 도착', 120, '🔴 위험'),
+        ('2024-05-01 09:00:00', 2, '역삼', '성수행', '[2]번째 전역', 30, '🟢 여유'),
+        ('2024-05-02 08:00:00', 1, '강남', '성수행', '강남 도착', 110, '🔴 위험')
+    ) t(collected_at, station_id, station_name, train_line, arrival_message, expected_alighting, risk_level)
+"""
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE dim_station AS SELECT * FROM (VALUES (1, 37.49::DOUBLE, 127.02::DOUBLE)) "
+                "t(station_id, latitude, longitude)")
+    yield con
+    con.close()
+
+
+def test_write_report_partitions_by_date_with_coords(workdir, con):
+    written = write_report(con, REPORT_SELECT, "data/report")
+    assert sorted(p.split("/")[-2] for p in written) == ["date=2024-05-01", "date=2024-05-02"]
+    rows = con.execute(f"SELECT station_name, latitude, date FROM ({report_scan_sql('data/report')}) "
+                       "ORDER BY collected_at").fetchall()
+    assert [r[:2] for r in rows] == [("강남", 37.49), ("역삼", None), ("강남", 37.49)]
+    assert con.execute(f"SELECT COUNT(*) FROM ({report_scan_sql('data/report', '2024-05-02')})").fetchone()[0] == 1
+
+
+def test_rebuild_replaces_previous_report(workdir, con):
+    write_report(con, REPORT_SELECT, "data/report")
+    write_report(con, REPORT_SELECT, "data/report")
+    rebuild_report(con, REPORT_SELECT, "data/report")
+    assert len(glob.glob("data/report/date=*/*.parquet")) == 2
+    assert not glob.glob("data/report.tmp")
+
+
+def test_compact_merges_past_partitions_only(workdir, con):
+    for _ in range(3):
+        write_report(con, REPORT_SELECT, "data/report")
+    assert compact_report("data/report", before="2024-05-02") == 3
+    assert [p.split("/")[-1] for p in glob.glob("data/report/date=2024-05-01/*.parquet")] == ["part-compacted.parquet"]
+    assert len(glob.glob("data/report/date=2024-05-02/*.parquet")) == 3
+    assert con.execute(f"SELECT COUNT(*) FROM ({report_scan_sql('data/report')})").fetchone()[0] == 9
+
+
+def test_export_tableau_csv(workdir, con):
+    with pytest.raises(FileNotFoundError):
+        export_tableau_csv(report_dir="data/report")
+    write_report(con, REPORT_SELECT, "data/report")
+    path = export_tableau_csv(output_path="data/out.csv", report_dir="data/report")
+    with open(path, "rb") as f:
+        assert f.read(3) == b"\xef\xbb\xbf"
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    assert list(df.columns[:2]) == ["역명", "행선지"] and list(df.columns[-1:]) == ["수집시각"]
+    assert list(df["역명"]) == ["강남", "역삼", "강남"]
+
+
+def test_compact_twice_keeps_previous_merge(workdir, con):
+    for _ in range(2):
+        write_report(con, REPORT_SELECT, "data/report")
+    compact_report("data/report", before="2024-05-02")
+    write_report(con, REPORT_SELECT, "data/report")
+    assert compact_report("data/report", before="2024-05-02") == 2
+    assert [p.split("/")[-1] for p in glob.glob("data/report/date=2024-05-01/*.parquet")] == ["part-compacted.parquet"]
+    assert con.execute(f"SELECT COUNT(*) FROM ({report_scan_sql('data/report', None)}) "
+                       "WHERE date = '2024-05-01'").fetchone()[0] == 6
@@ -0,0 +1,74 @@
+import csv
+from datetime import datetime
+
+from scheduler import AdaptiveScheduler, QuotaTracker, load_hourly_baseline
+from time_slots import TIME_SLOT_HOURS, TIME_SLOTS
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["연번", "날짜", "호선", "역번호", "역명", "구분", *TIME_SLOTS])
+        writer.writerows(rows)
+
+
+def test_time_slots_follow_csv_column_order():
+    assert TIME_SLOTS[0] == "06시 이전" and TIME_SLOTS[-1] == "24시 이후"
+    assert [TIME_SLOT_HOURS[s] for s in TIME_SLOTS] == [5, *range(6, 24), 0]
+
+
+def test_load_hourly_baseline_maps_each_column_to_its_hour(tmp_path):
+    path = tmp_path / "passenger.csv"
+    # 열마다 그 열이 뜻하는 시(hour)를 값으로 넣어, 자리가 밀리면 바로 드러나게 함
+    values = [str(TIME_SLOT_HOURS[s] * 100) for s in TIME_SLOTS]
+    write_csv(path, [[1, "2024-01-01", "2호선", 222, "강남역", "하차", *values],
+                     [2, "2024-01-01", "2호선", 222, "강남역", "승차", *["9,999"] * len(TIME_SLOTS)]])
+
+    hourly = load_hourly_baseline(str(path))["강남"]
+    assert hourly[0] == 0
+    assert hourly[5] == 500
+    assert hourly[6] == 600
+    assert hourly[23] == 2300
+    assert all(hourly[h] == h * 100 for h in range(5, 24))
+
+
+def test_missing_csv_gives_empty_baseline(tmp_path):
+    assert load_hourly_baseline(str(tmp_path / "none.csv")) == {}
+
+
+def test_quota_tracker_persists_and_rolls_over(tmp_path):
+    state = tmp_path / "quota.json"
+    quota = QuotaTracker(100, state_path=str(state), reserve=10)
+    quota.spend(30)
+    assert QuotaTracker(100, state_path=str(state), reserve=10).remaining() == 60
+    assert quota.remaining(datetime(2999, 1, 1)) == 90
+
+
+def test_busy_station_is_polled_more_often(tmp_path):
+    quota = QuotaTracker(1000, state_path=str(tmp_path / "quota.json"), reserve=0)
+    baseline = {"강남": [1000.0] * 24, "한산": [10.0] * 24}
+    scheduler = AdaptiveScheduler(["강남", "한산"], quota, baseline)
+    now = datetime(2024, 1, 1, 8, 0)
+    assert scheduler.due_stations(now) == ["강남", "한산"]
+    scheduler.mark_polled(["강남", "한산"], now)
+    assert scheduler.next_due["강남"] < scheduler.next_due["한산"]
+    assert quota.spent == 2
+
+
+def test_hourly_baseline_uses_station_normalization(workdir):
+    with open("data/station_passenger.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["연번", "날짜", "호선", "역번호", "역명", "구분", *TIME_SLOTS])
+        for name in ("역삼역", "신촌(경의중앙선)", "서울역"):
+            writer.writerow([1, "2024-01-02", "2호선", 222, name, "하차", *["10"] * len(TIME_SLOTS)])
+    assert sorted(load_hourly_baseline()) == ["서울", "신촌", "역삼"]
+
+
+def test_processing_modules_share_the_slot_table():
+    import duckdb_processor
+    import stats_collector
+    import synthetic
+
+    assert synthetic.TIME_SLOTS is TIME_SLOTS
+    assert list(stats_collector.HOUR_MAP) == list(TIME_SLOTS)
+    assert all(f'"{slot}"' in duckdb_processor.BASELINE_CSV_SOURCE_SQL for slot in TIME_SLOTS)
@@ -0,0 +1,67 @@
+from snapshot_store import (arrivals_scan_sql, append_snapshot, compact_raw_json, has_data, partition_files,
+                            pending_raw_files)
+from synthetic import write_passenger_csv, write_raw_snapshots
+
+
+def count(sql: str) -> int:
+    import duckdb
+
+    return duckdb.connect().execute(f"SELECT COUNT(*) FROM ({sql})").fetchone()[0]
+
+
+def test_append_snapshot_is_readable_with_partition_columns(workdir):
+    rows = [{"station_name": "강남", "train_line": "성수행", "arrival_message": "[3]번째 전역 (역삼)",
+             "arrival_time_sec": "180", "stations_away": 3}]
+    assert append_snapshot("2024-01-01T08:00:00", rows) == 1
+    assert append_snapshot("2024-01-01T08:10:00", rows) == 1
+    assert has_data()
+    assert len(partition_files()) == 1
+
+    import duckdb
+    result = duckdb.connect().execute(
+        f"SELECT station_name, stations_away, arrival_time_sec FROM ({arrivals_scan_sql()})").fetchall()
+    assert result == [("강남", 3, 180)] * 2
+
+
+def test_compact_keep_records_manifest(workdir):
+    rows = write_raw_snapshots("data/raw", 3, n_stations=2)
+    assert compact_raw_json(keep=True) == rows
+    assert len(pending_raw_files()) == 0
+    # 다시 실행해도 이미 합친 파일은 건너뜀
+    assert compact_raw_json(keep=True) == 0
+    assert count(arrivals_scan_sql()) == rows
+
+
+def test_full_process_after_compact_keep_does_not_double_count(workdir):
+    from duckdb_processor import process_data_with_duckdb
+
+    write_passenger_csv("data/station_passenger.csv", n_stations=2, n_days=7)
+    rows = write_raw_snapshots("data/raw", 2, n_stations=2, start="2024-01-01T08:00:00")
+    compact_raw_json(keep=True)
+    # 합친 뒤 새로 들어온 원본 파일은 그대로 읽어야 함
+    later = write_raw_snapshots("data/raw", 1, n_stations=2, seed=9, start="2024-01-01T09:00:00")
+    assert len(pending_raw_files()) == 1
+
+    assert len(process_data_with_duckdb()) == rows + later
+
+
+def test_incremental_process_after_compact_keep_does_not_double_count(workdir):
+    import duckdb
+    from duckdb_processor import process_data_incremental
+
+    write_passenger_csv("data/station_passenger.csv", n_stations=2, n_days=7)
+    rows = write_raw_snapshots("data/raw", 2, n_stations=2)
+    compact_raw_json(keep=True)
+    process_data_incremental("data/metro.duckdb")
+    total = duckdb.connect("data/metro.duckdb").execute("SELECT COUNT(*) FROM arrivals").fetchone()[0]
+    assert total == rows
+
+
+def test_broken_raw_file_is_skipped(workdir):
+    write_raw_snapshots("data/raw", 1, n_stations=1)
+    with open("data/raw/arrivals_20240101_999999.json", "w", encoding="utf-8") as f:
+        f.write("{broken")
+    assert compact_raw_json() > 0
+    assert pending_raw_files() == ["data/raw/arrivals_20240101_999999.json"]
+    with open("data/raw/arrivals_20240101_999999.json", encoding="utf-8") as f:
+        assert f.read() == "{broken"
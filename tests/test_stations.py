@@ -0,0 +1,77 @@
+import pytest
+import requests
+
+from api_client import SeoulMetroAPI
+from api_cache import ResponseCache
+from arrival_parser import parse_arrival
+from key_pool import ApiKeyPool
+from stations import init_station_tables, normalize_station_name, register_station_names, update_station_coords
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("서울역", "서울"),
+    ("서울", "서울"),
+    (" 강남역 ", "강남"),
+    ("역삼", "역삼"),
+    ("역삼역", "역삼"),
+    ("신촌(경의중앙선)", "신촌"),
+    ("역", "역"),
+    (None, None),
+])
+def test_normalize_station_name(name, expected):
+    assert normalize_station_name(name) == expected
+
+
+def test_register_station_names_gives_one_id_per_station():
+    import duckdb
+
+    con = duckdb.connect()
+    init_station_tables(con)
+    con.execute("CREATE TABLE src AS SELECT * FROM (VALUES ('서울역', '1호선'), ('서울', '4호선'), "
+                "('신촌(경의중앙선)', '경의중앙선'), ('신촌', '2호선'), ('역삼', '2호선')) t(station_name, line)")
+    assert register_station_names(con, "SELECT * FROM src", line_column="line") == 5
+    assert register_station_names(con, "SELECT * FROM src") == 0
+
+    ids = dict(con.execute("SELECT alias, station_id FROM station_alias").fetchall())
+    assert ids["서울역"] == ids["서울"]
+    assert ids["신촌(경의중앙선)"] == ids["신촌"]
+    assert len(set(ids.values())) == 3
+    lines = con.execute("SELECT COUNT(*) FROM station_line WHERE station_id = ?", [ids["서울"]]).fetchone()[0]
+    assert lines == 2
+
+    update_station_coords(con, {"서울역": (37.55, 126.97)})
+    assert con.execute("SELECT latitude FROM dim_station WHERE station_name = '서울'").fetchone()[0] == 37.55
+
+
+def test_parse_arrival_uses_normalized_names():
+    rec = parse_arrival({"statnNm": "역삼역", "arvlMsg2": "[2]번째 전역 (강남역)", "barvlDt": "0"})
+    assert rec["station_name"] == "역삼"
+    assert rec["current_station"] == "강남"
+
+
+def test_api_cache_key_and_url_use_normalized_name(tmp_path):
+    api = SeoulMetroAPI(cache=ResponseCache(), key_pool=ApiKeyPool(["k"], daily_limit=100, state_dir=str(tmp_path)))
+    urls = []
+
+    def fake_fetch(station_name, timeout):
+        urls.append(station_name)
+        return {"realtimeArrivalList": []}
+
+    api._fetch_arrival_info = fake_fetch
+    api.get_arrival_info("역삼역")
+    api.get_arrival_info("역삼")
+    assert len(urls) == 1  # '역삼역' 과 '역삼' 은 같은 캐시 키
+
+
+def test_api_url_keeps_leading_station_character(tmp_path):
+    api = SeoulMetroAPI(key_pool=ApiKeyPool(["k"], daily_limit=100, state_dir=str(tmp_path)))
+    urls = []
+
+    class Session:
+        def get(self, url, timeout=None):
+            urls.append(url)
+            raise requests.exceptions.ConnectionError("offline")
+
+    api.session = Session()
+    api._fetch_arrival_info("역삼역", timeout=1)
+    assert urls[0].endswith("/realtimeStationArrival/0/10/역삼")
@@ -0,0 +1,30 @@
+import pyarrow.parquet as pq
+
+from stats_collector import HOUR_MAP, detect_encoding, process_csv_data, process_csv_streaming
+from synthetic import write_passenger_csv
+
+
+def key(row):
+    return (row["date"], row["station_name"], row["type"], row["hour"], row["count"])
+
+
+def test_streaming_matches_in_memory_transform(workdir):
+    rows = write_passenger_csv("data/station_passenger.csv", n_stations=5, n_days=4)
+    out = process_csv_streaming("data/station_passenger.csv", "data/stats.parquet", chunksize=7)
+
+    streamed = pq.read_table(out).to_pylist()
+    assert len(streamed) == rows * len(HOUR_MAP)
+    assert sorted(map(key, streamed)) == sorted(map(key, process_csv_data("data/station_passenger.csv")))
+    assert {r["hour"] for r in streamed} == set(HOUR_MAP.values())
+
+
+def test_streaming_reads_cp949(workdir):
+    write_passenger_csv("data/utf8.csv", n_stations=2, n_days=1)
+    with open("data/utf8.csv", encoding="utf-8") as f:
+        text = f.read()
+    with open("data/station_passenger.csv", "w", encoding="cp949") as f:
+        f.write(text)
+
+    assert detect_encoding("data/station_passenger.csv") == "cp949"
+    table = pq.read_table(process_csv_streaming("data/station_passenger.csv", "data/stats.parquet"))
+    assert table.column("station_name").to_pylist()[0] == "서울역"
@@ -0,0 +1,88 @@
+import pytest
+
+from arrival_record import ArrivalRecord
+from stream import TOPIC, CongestionState, FileBroker, InProcessBroker, get_broker, publish_arrivals
+
+
+@pytest.fixture(params=["memory", "file"])
+def broker(request, tmp_path):
+    return InProcessBroker() if request.param == "memory" else FileBroker(str(tmp_path / "stream"))
+
+
+def test_publish_and_poll_per_group(broker):
+    records = [ArrivalRecord(station_name="강남", arrival_time_sec=30), {"station_name": "역삼"}]
+    publish_arrivals(broker, "2024-01-01T08:00:00", records)
+
+    batch = broker.poll(TOPIC, "a", timeout=0.1)
+    assert [m["station_name"] for m in batch] == ["강남", "역삼"]
+    assert all(m["collected_at"] == "2024-01-01T08:00:00" for m in batch)
+    assert broker.poll(TOPIC, "a", timeout=0.05) == []
+    # 다른 그룹은 처음부터 읽음
+    assert len(broker.poll(TOPIC, "b", max_records=1, timeout=0.1)) == 1
+
+
+def test_file_broker_offset_survives_restart(tmp_path):
+    publish_arrivals(FileBroker(str(tmp_path)), "2024-01-01T08:00:00", [{"station_name": "강남"}] * 3)
+    assert len(FileBroker(str(tmp_path)).poll(TOPIC, "g", max_records=2, timeout=0.1)) == 2
+    assert len(FileBroker(str(tmp_path)).poll(TOPIC, "g", timeout=0.1)) == 1
+
+
+def test_get_broker_backends(workdir, monkeypatch):
+    monkeypatch.setenv("STREAM_BACKEND", "memory")
+    assert isinstance(get_broker(), InProcessBroker)
+    assert isinstance(get_broker("file"), FileBroker)
+
+
+def test_congestion_state_replaces_snapshot_and_ignores_late_records():
+    state = CongestionState({"강남": [6000] * 24})
+    state.update_many([
+        {"station_name": "강남", "collected_at": "2024-01-01T08:00:00", "arrival_time_sec": "30"},
+        {"station_name": "강남", "collected_at": "2024-01-01T08:00:00", "arrival_time_sec": "300"},
+        {"station_name": "강남", "collected_at": "2024-01-01T08:01:00", "arrival_time_sec": "10"},
+        {"station_name": "강남", "collected_at": "2024-01-01T07:59:00", "arrival_time_sec": "10"},
+    ])
+    gangnam = state.snapshot()["강남"]
+    assert gangnam["collected_at"] == "2024-01-01T08:01:00"
+    assert len(gangnam["trains"]) == 1
+    assert gangnam["risk_count"] == 1
+    assert gangnam["expected_alighting"] == 6000
+    assert gangnam["imminent_ewma"] == pytest.approx(0.3)
+    assert state.updated_at == "2024-01-01T08:01:00"
+
+
+def test_snapshot_is_a_copy():
+    state = CongestionState()
+    state.update({"station_name": "역삼", "collected_at": "2024-01-01T08:00:00", "arrival_time_sec": None})
+    state.snapshot()["역삼"]["trains"].clear()
+    assert len(state.stations["역삼"]["trains"]) == 1
+
+
+def test_congestion_state_groups_by_line_and_direction():
+    state = CongestionState({"강남": [6000] * 24})
+    t = "2024-01-01T08:00:00"
+    state.update_many([
+        {"station_name": "강남", "collected_at": t, "arrival_time_sec": 30, "line_id": "1002", "direction": "내선"},
+        {"station_name": "강남", "collected_at": t, "arrival_time_sec": 200, "line_id": "1002", "direction": "내선"},
+        {"station_name": "강남", "collected_at": t, "arrival_time_sec": 90, "line_id": "1002", "direction": "외선"},
+    ])
+    gangnam = state.snapshot()["강남"]
+    assert gangnam["directions"] == [
+        {"line_id": "1002", "direction": "내선", "trains": 2, "risk_count": 1, "next_arrival_sec": 30},
+        {"line_id": "1002", "direction": "외선", "trains": 1, "risk_count": 0, "next_arrival_sec": 90},
+    ]
+    assert [train["direction"] for train in gangnam["trains"]] == ["내선", "내선", "외선"]
+    assert gangnam["risk_count"] == 1
+
+
+def test_end_of_snapshot_clears_stations_that_responded_empty():
+    broker = InProcessBroker()
+    state = CongestionState({"강남": [6000] * 24})
+    publish_arrivals(broker, "2024-01-01T08:00:00", [{"station_name": "강남", "arrival_time_sec": 30}],
+                     stations=["강남", "역삼"])
+    publish_arrivals(broker, "2024-01-01T08:01:00", [], stations=["강남"])
+    state.update_many(broker.poll(TOPIC, "g", timeout=0.1))
+    snap = state.snapshot()
+    assert snap["강남"]["trains"] == [] and snap["강남"]["risk_count"] == 0
+    assert snap["강남"]["imminent_ewma"] == pytest.approx(0.3)
+    assert snap["역삼"]["trains"] == []
+    assert state.updated_at == "2024-01-01T08:01:00"